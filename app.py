@@ -1,5 +1,10 @@
 # app.py
+import importlib
 import streamlit as st
+from utils.instrumentation import query_scope, export_query_log
+from utils.perf_hud import start_rerun, render_hud
+from utils.summaries import initialize_summaries
+from utils.cache import request_scope
 
 # Configure the page - MUST be first Streamlit command
 st.set_page_config(
@@ -9,37 +14,53 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Simple tab-based navigation
-tabs = st.tabs([
-    "📊 Quarterly Summary",
-    "👥 Client Dashboard", 
-    "⚙️ Manage Clients",
-    "📝 Bulk Payment Entry",
-    "📊 Export Data"
-])
-
-# Render the selected page based on tab
-with tabs[0]:  # Quarterly Summary
-    from pages_new.main_summary.summary import show_main_summary
-    show_main_summary()
-
-with tabs[1]:  # Client Dashboard
-    from pages_new.client_display_and_forms.client_dashboard import show_client_dashboard
-    show_client_dashboard()
-
-with tabs[2]:  # Manage Clients
-    from pages_new.manage_clients.client_management import show_manage_clients
-    show_manage_clients()
-
-with tabs[3]:  # Bulk Payment Entry
-    from pages_new.bulk_payment.bulk_entry import show_bulk_payment_entry
-    show_bulk_payment_entry()
-
-with tabs[4]:  # Export Data
-    try:
-        from pages_new.document_export import show_export_data
-        show_export_data()
-    except Exception as e:
-        st.error(f"Error loading export module: {str(e)}")
-        st.error("Please check the console for more details.")
-    
\ No newline at end of file
+# Navigation label -> (module, render function). Only the selected page's
+# module is imported and only its body runs on a rerun.
+PAGES = {
+    "📊 Quarterly Summary": ("pages_new.main_summary.summary", "show_main_summary"),
+    "👥 Client Dashboard": ("pages_new.client_display_and_forms.client_dashboard", "show_client_dashboard"),
+    "⚙️ Manage Clients": ("pages_new.manage_clients.client_management", "show_manage_clients"),
+    "📝 Bulk Payment Entry": ("pages_new.bulk_payment.bulk_entry", "show_bulk_payment_entry"),
+    "📊 Export Data": ("pages_new.document_export", "show_export_data"),
+}
+
+# Summary tables and their maintenance mode: real work only once per process
+# and only when the stored schema fingerprint is out of date
+if not initialize_summaries():
+    st.warning("Summary tables could not be initialized; some figures may be out of date.")
+
+def render_page(label: str):
+    """Import the selected page module on demand and render it."""
+    module_name, function_name = PAGES[label]
+    page = getattr(importlib.import_module(module_name), function_name)
+    page()
+
+# Developer HUD (?perf=1 or PERF_HUD=1) showing per-section timings
+start_rerun()
+
+# Collect SQL totals for the whole rerun (see utils/instrumentation.py) and
+# memoize per-rerun reads such as get_consolidated_client_data (utils/cache.py)
+with query_scope('rerun') as rerun, request_scope():
+    # The selected page is kept in session state under 'active_page'
+    active_page = st.radio(
+        "Navigation",
+        options=list(PAGES),
+        horizontal=True,
+        label_visibility="collapsed",
+        key="active_page"
+    )
+    st.divider()
+
+    if active_page == "📊 Export Data":
+        try:
+            render_page(active_page)
+        except Exception as e:
+            st.error(f"Error loading export module: {str(e)}")
+            st.error("Please check the console for more details.")
+    else:
+        render_page(active_page)
+
+render_hud(rerun)
+
+# Append this rerun's statements to SQL_LOG_FILE when it is set
+export_query_log()
@@ -0,0 +1,436 @@
+"""
+Benchmarks
+==========
+
+Standalone timing harness for database performance work. Every benchmark
+runs against scratch copies of the database, so the live file is never
+touched.
+
+Usage:
+    python benchmark.py profile     # Default vs tuned connection profile
+    python benchmark.py writes      # Concurrent direct writes vs the writer queue
+    python benchmark.py rebuild     # Full summary rebuild: per-call vs per-period vs set-based
+    python benchmark.py maintenance # Payment write latency under each summary maintenance mode
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from typing import Dict, Any, List, Callable
+
+from utils import database, writer, summaries
+from utils.database import DATABASE_PATH, ConnectionPool
+from utils.summaries import update_summaries_in_transaction
+
+# The connection settings the app ran with before profiles existed
+# (Python's sqlite3 defaults on a rollback-journal database).
+BASELINE_PROFILE = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 5000,
+    'mmap_size': 0,
+    'cache_size': -2000,
+    'temp_store': 'DEFAULT',
+}
+
+SUMMARY_READ_QUERY = """
+    SELECT c.client_id, c.display_name, qs.quarter, qs.total_payments,
+           qs.total_assets, con.provider_name, con.num_people
+    FROM clients c
+    JOIN quarterly_summaries qs ON c.client_id = qs.client_id
+    LEFT JOIN contracts con ON c.client_id = con.client_id AND con.active = 'TRUE'
+    WHERE qs.year = (SELECT MAX(year) FROM quarterly_summaries)
+    ORDER BY c.display_name, qs.quarter
+"""
+
+
+def scratch_copy(directory: str, name: str) -> str:
+    """Copy the live database into a scratch directory and return its path."""
+    path = os.path.join(directory, f"{name}.db")
+    shutil.copy(DATABASE_PATH, path)
+    return path
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Return p50/p95/max in milliseconds for a list of durations in seconds."""
+    if not samples:
+        return {'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(len(ordered) * 0.95))
+    return {
+        'p50': statistics.median(ordered) * 1000,
+        'p95': ordered[p95_index] * 1000,
+        'max': ordered[-1] * 1000,
+    }
+
+
+def print_table(title: str, rows: List[Dict[str, Any]]) -> None:
+    """Print benchmark rows as an aligned text table."""
+    print(f"\n{title}")
+    print("-" * len(title))
+    if not rows:
+        return
+    headers = list(rows[0].keys())
+    widths = [
+        max(len(h), *(len(f"{r[h]:.2f}" if isinstance(r[h], float) else str(r[h])) for r in rows))
+        for h in headers
+    ]
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        cells = [f"{row[h]:.2f}" if isinstance(row[h], float) else str(row[h]) for h in headers]
+        print("  ".join(c.ljust(w) for c, w in zip(cells, widths)))
+
+
+def _sample_payment(conn: sqlite3.Connection) -> tuple:
+    """Pick an active contract to attach benchmark payments to."""
+    row = conn.execute("""
+        SELECT client_id, contract_id FROM contracts
+        WHERE active = 'TRUE' ORDER BY contract_id LIMIT 1
+    """).fetchone()
+    if not row:
+        raise RuntimeError("Benchmark needs at least one active contract")
+    return row
+
+
+def _insert_payment(conn: sqlite3.Connection, client_id: int, contract_id: int, i: int) -> None:
+    conn.execute("""
+        INSERT INTO payments (
+            client_id, contract_id, received_date,
+            applied_start_quarter, applied_start_year,
+            applied_end_quarter, applied_end_year,
+            total_assets, actual_fee, method, notes
+        ) VALUES (?, ?, date('now'), ?, 2000, ?, 2000, 100000, 250, 'BENCH', 'benchmark')
+    """, (client_id, contract_id, i % 4 + 1, i % 4 + 1))
+    conn.commit()
+
+
+def _time_calls(fn: Callable[[int], None], iterations: int) -> List[float]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_connection_profile(iterations: int = 200) -> None:
+    """Compare read/write latency under the baseline and tuned profiles.
+
+    Three measurements per profile: summary-page reads on their own, payment
+    writes on their own, and payment writes while a reader keeps read
+    transactions open (the summary page being viewed during data entry).
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, profile in (('baseline', BASELINE_PROFILE), ('tuned', None)):
+            path = scratch_copy(tmp, label)
+            pool = ConnectionPool(path, profile)
+            conn = pool.checkout()
+            client_id, contract_id = _sample_payment(conn)
+
+            def read(_):
+                conn.execute(SUMMARY_READ_QUERY).fetchall()
+
+            read_samples = _time_calls(read, iterations)
+            write_samples = _time_calls(lambda i: _insert_payment(conn, client_id, contract_id, i), iterations)
+
+            # Writes while another connection keeps reading
+            stop = threading.Event()
+            reader_ready = threading.Event()
+
+            def reader():
+                reader_conn = pool.checkout()
+                reader_ready.set()
+                while not stop.is_set():
+                    reader_conn.execute("BEGIN")
+                    reader_conn.execute(SUMMARY_READ_QUERY).fetchall()
+                    time.sleep(0.005)  # Page render time while the snapshot is open
+                    reader_conn.execute("COMMIT")
+                pool.release(reader_conn)
+
+            reader_thread = threading.Thread(target=reader)
+            reader_thread.start()
+            reader_ready.wait()
+
+            lock_errors = 0
+            contended_samples = []
+            for i in range(iterations // 2):
+                start = time.perf_counter()
+                try:
+                    _insert_payment(conn, client_id, contract_id, i)
+                    contended_samples.append(time.perf_counter() - start)
+                except sqlite3.OperationalError:
+                    conn.rollback()
+                    lock_errors += 1
+            stop.set()
+            reader_thread.join()
+            pool.release(conn)
+            pool.close_all()
+
+            for name, samples in (
+                ('read', read_samples),
+                ('write', write_samples),
+                ('write + reader', contended_samples),
+            ):
+                stats = summarize(samples)
+                rows.append({
+                    'profile': label,
+                    'operation': name,
+                    'p50 ms': stats['p50'],
+                    'p95 ms': stats['p95'],
+                    'max ms': stats['max'],
+                    'lock errors': lock_errors if name == 'write + reader' else 0,
+                })
+
+    print_table(f"Connection profile ({iterations} iterations)", rows)
+
+
+def _payment_job(conn: sqlite3.Connection, client_id: int, contract_id: int, i: int) -> None:
+    """Insert a payment and update its summaries, as add_payment does."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO payments (
+            client_id, contract_id, received_date,
+            applied_start_quarter, applied_start_year,
+            applied_end_quarter, applied_end_year,
+            total_assets, actual_fee, method, notes
+        ) VALUES (?, ?, date('now'), ?, 2000, ?, 2000, 100000, 250, 'BENCH', 'benchmark')
+    """, (client_id, contract_id, i % 4 + 1, i % 4 + 1))
+    update_summaries_in_transaction(cursor, client_id, 2000, i % 4 + 1)
+
+
+def bench_write_queue(iterations: int = 100, threads: int = 4) -> None:
+    """Compare concurrent sessions writing directly with the background writer.
+
+    Each of `threads` sessions adds `iterations` payments. The direct mode
+    gives every session its own writer connection (the pre-queue behaviour);
+    the queue mode funnels the same work through utils.writer.
+    """
+    rows = []
+    original_path = database.DATABASE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            for mode in ('direct', 'queue'):
+                database.reset_pool(scratch_copy(tmp, mode))
+                writer.reset_writer()
+                with database.read_connection() as conn:
+                    client_id, contract_id = _sample_payment(conn)
+
+                samples = []
+                errors = []
+                samples_lock = threading.Lock()
+
+                def session(n):
+                    for i in range(iterations):
+                        start = time.perf_counter()
+                        try:
+                            if mode == 'direct':
+                                with database.write_connection() as conn:
+                                    _payment_job(conn, client_id, contract_id, i)
+                            else:
+                                writer.run_write(_payment_job, client_id, contract_id, i)
+                        except sqlite3.Error as e:
+                            errors.append(e)
+                            continue
+                        with samples_lock:
+                            samples.append(time.perf_counter() - start)
+
+                started = time.perf_counter()
+                workers = [threading.Thread(target=session, args=(n,)) for n in range(threads)]
+                for t in workers:
+                    t.start()
+                for t in workers:
+                    t.join()
+                elapsed = time.perf_counter() - started
+
+                stats = summarize(samples)
+                queue_stats = writer.get_writer_stats()
+                rows.append({
+                    'mode': mode,
+                    'writes/s': len(samples) / elapsed if elapsed else 0.0,
+                    'p50 ms': stats['p50'],
+                    'p95 ms': stats['p95'],
+                    'max ms': stats['max'],
+                    'errors': len(errors),
+                    'avg batch': queue_stats['avg_batch_size'],
+                    'max depth': queue_stats['max_queue_depth'],
+                })
+        finally:
+            writer.reset_writer()
+            database.reset_pool(original_path)
+
+    print_table(f"Write path ({threads} sessions x {iterations} payments)", rows)
+
+
+def scale_payments(path: str, scale: int) -> int:
+    """Grow a scratch database to `scale` times its payment history.
+
+    Copies of every payment are shifted forward by whole centuries so each
+    copy lands in its own set of quarters. The summary triggers are removed
+    from the scratch copy first so only the rebuild itself is timed.
+
+    Returns:
+        int: Number of payments after scaling
+    """
+    conn = sqlite3.connect(path)
+    try:
+        triggers = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'update_%'"
+        )]
+        for name in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+        for k in range(1, scale):
+            conn.execute("""
+                INSERT INTO payments (
+                    contract_id, client_id, received_date,
+                    applied_start_quarter, applied_start_year,
+                    applied_end_quarter, applied_end_year,
+                    total_assets, expected_fee, actual_fee, method, notes
+                )
+                SELECT 
+                    contract_id, client_id, received_date,
+                    applied_start_quarter, applied_start_year + ?,
+                    applied_end_quarter, applied_end_year + ?,
+                    total_assets, expected_fee, actual_fee, method, notes
+                FROM payments
+                WHERE applied_start_year < 2100
+            """, (k * 100, k * 100))
+        conn.commit()
+        return conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _rebuild_per_call() -> None:
+    """The original populate_all_summaries shape: one connection and commit per period."""
+    with database.write_connection() as conn:
+        periods = conn.execute("""
+            SELECT DISTINCT client_id, applied_start_year, applied_start_quarter
+            FROM payments ORDER BY client_id, applied_start_year, applied_start_quarter
+        """).fetchall()
+        conn.execute("DELETE FROM quarterly_summaries")
+        conn.execute("DELETE FROM yearly_summaries")
+        conn.execute("DELETE FROM client_metrics")
+    for client_id, year, quarter in periods:
+        summaries.update_quarterly_summary(client_id, year, quarter)
+    for client_id, year in sorted(set((c, y) for c, y, _ in periods)):
+        summaries.update_yearly_summary(client_id, year)
+    for client_id in sorted(set(c for c, _, _ in periods)):
+        summaries.update_client_metrics(client_id)
+
+
+def bench_rebuild(iterations: int = 3, scale: int = 10) -> None:
+    """Time a full summary rebuild on a database scaled to `scale` x payments."""
+    rows = []
+    original_path = database.DATABASE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        path = scratch_copy(tmp, 'rebuild')
+        payment_count = scale_payments(path, scale)
+        try:
+            database.reset_pool(path)
+            writer.reset_writer()
+            strategies = (
+                ('per-call', _rebuild_per_call),
+                ('per-period', lambda: summaries.populate_all_summaries('rows')),
+                ('set', lambda: summaries.populate_all_summaries('set')),
+            )
+            for label, rebuild in strategies:
+                samples = _time_calls(lambda _: rebuild(), iterations)
+                stats = summarize(samples)
+                with database.read_connection() as conn:
+                    quarters = conn.execute("SELECT COUNT(*) FROM quarterly_summaries").fetchone()[0]
+                rows.append({
+                    'strategy': label,
+                    'p50 ms': stats['p50'],
+                    'max ms': stats['max'],
+                    'quarters': quarters,
+                })
+        finally:
+            writer.reset_writer()
+            database.reset_pool(original_path)
+
+    print_table(f"Summary rebuild ({payment_count} payments, {iterations} runs)", rows)
+
+
+def _maintained_payment_job(conn: sqlite3.Connection, client_id: int, contract_id: int, i: int) -> None:
+    """Insert a payment and maintain its summaries under the active mode."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO payments (
+            client_id, contract_id, received_date,
+            applied_start_quarter, applied_start_year,
+            applied_end_quarter, applied_end_year,
+            total_assets, actual_fee, method, notes
+        ) VALUES (?, ?, date('now'), ?, 2000, ?, 2000, 100000, 250, 'BENCH', 'benchmark')
+    """, (client_id, contract_id, i % 4 + 1, i % 4 + 1))
+    summaries.maintain_summaries(cursor, after=summaries.get_payment_contribution(cursor, cursor.lastrowid))
+
+
+def bench_maintenance(iterations: int = 200) -> None:
+    """Time single payment writes under each summary maintenance mode.
+
+    Deferred mode also reports the time to flush the periods it left dirty,
+    which is the work it moves off the write path.
+    """
+    rows = []
+    original_path = database.DATABASE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            for mode in summaries.MAINTENANCE_MODES:
+                database.reset_pool(scratch_copy(tmp, mode))
+                writer.reset_writer()
+                summaries.set_maintenance_mode(mode)
+                with database.read_connection() as conn:
+                    client_id, contract_id = _sample_payment(conn)
+
+                samples = _time_calls(
+                    lambda i: writer.run_write(_maintained_payment_job, client_id, contract_id, i),
+                    iterations
+                )
+                flush_start = time.perf_counter()
+                summaries.flush_deferred_summaries()
+                flush_ms = (time.perf_counter() - flush_start) * 1000
+
+                stats = summarize(samples)
+                rows.append({
+                    'mode': mode,
+                    'p50 ms': stats['p50'],
+                    'p95 ms': stats['p95'],
+                    'max ms': stats['max'],
+                    'flush ms': flush_ms,
+                })
+        finally:
+            writer.reset_writer()
+            database.reset_pool(original_path)
+
+    print_table(f"Summary maintenance ({iterations} payments per mode)", rows)
+
+
+BENCHMARKS = {
+    'profile': bench_connection_profile,
+    'writes': bench_write_queue,
+    'rebuild': bench_rebuild,
+    'maintenance': bench_maintenance,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run database benchmarks on scratch copies of the database.")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), help="Benchmark to run")
+    parser.add_argument('--iterations', type=int, default=None, help="Override the iteration count")
+    args = parser.parse_args()
+
+    bench = BENCHMARKS[args.benchmark]
+    if args.iterations:
+        bench(iterations=args.iterations)
+    else:
+        bench()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import shutil
+
+import pytest
+
+from utils import cache, database, summaries, writer
+
+# Summary columns compared between maintained and rebuilt summaries
+SUMMARY_TABLES = {
+    'quarterly_summaries': "client_id, year, quarter, total_payments, total_assets, "
+                           "payment_count, avg_payment, expected_total, fee_count, assets_sum, assets_count",
+    'yearly_summaries': "client_id, year, total_payments, total_assets, "
+                        "payment_count, avg_payment, yoy_growth, quarter_count, assets_sum, assets_count",
+    'client_metrics': "client_id, last_payment_date, last_payment_amount, last_payment_quarter, "
+                      "last_payment_year, total_ytd_payments, avg_quarterly_payment, last_recorded_assets",
+}
+
+
+def snapshot():
+    """Return the rows of every summary table."""
+    with database.read_connection() as conn:
+        return {
+            table: conn.execute(f"SELECT {columns} FROM {table} ORDER BY 1, 2, 3").fetchall()
+            for table, columns in SUMMARY_TABLES.items()
+        }
+
+
+def assert_same_summaries(expected, actual):
+    for table in SUMMARY_TABLES:
+        assert len(actual[table]) == len(expected[table]), table
+        for want, got in zip(expected[table], actual[table]):
+            assert got == pytest.approx(want), table
+
+
+@pytest.fixture
+def scratch_db(tmp_path):
+    """Point the connection pools at a scratch copy of the database and yield its path."""
+    original_path = database.DATABASE_PATH
+    db_copy = tmp_path / '401kDATABASE.db'
+    shutil.copy(original_path, db_copy)
+    database.reset_pool(str(db_copy))
+    yield db_copy
+    database.reset_pool(original_path, database.DEFAULT_CONNECTION_PROFILE)
+
+
+@pytest.fixture
+def scratch_writer(scratch_db):
+    """A scratch database with a fresh background writer and an empty read cache."""
+    writer.reset_writer()
+    cache.clear_cache()
+    yield scratch_db
+    writer.reset_writer()
+    cache.clear_cache()
+
+
+@pytest.fixture
+def maintenance_mode(scratch_writer):
+    """A scratch database whose summary maintenance mode is forgotten after the test."""
+    yield scratch_writer
+    summaries._maintenance_mode = None
+    summaries._initialized.clear()
@@ -7,7 +7,7 @@ from utils.utils import (
     format_currency_ui,
     format_currency_db,
     validate_payment_data,
-    add_payment,
+    add_payments_bulk,
     get_payment_by_id,
     get_unique_payment_methods,
     get_clients
@@ -21,33 +21,11 @@ from ..client_display_and_forms.client_payment_utils import (
     format_period_display
 )
 
-def init_bulk_entry_state():
-    """Initialize or reset bulk payment entry state."""
-    if 'bulk_payments' not in st.session_state:
-        st.session_state.bulk_payments = [{
-            'client_id': None,
-            'received_date': datetime.now().strftime('%Y-%m-%d'),
-            'applied_start_period': None,
-            'applied_start_year': None,
-            'applied_end_period': None,
-            'applied_end_year': None,
-            'total_assets': None,
-            'actual_fee': None,
-            'method': 'None Specified',
-            'notes': '',
-            'contract': None,
-            'is_valid': False
-        }]
-    
-    if 'bulk_validation_errors' not in st.session_state:
-        st.session_state.bulk_validation_errors = {}
-    
-    if 'bulk_entry_clients' not in st.session_state:
-        st.session_state.bulk_entry_clients = get_clients()
-
-def add_payment_card():
-    """Add a new payment card to the session state."""
-    st.session_state.bulk_payments.append({
+def new_payment_card() -> Dict[str, Any]:
+    """Return an empty payment card with a card_id that stays the same while cards are added or removed."""
+    st.session_state.bulk_card_seq = st.session_state.get('bulk_card_seq', 0) + 1
+    return {
+        'card_id': st.session_state.bulk_card_seq,
         'client_id': None,
         'received_date': datetime.now().strftime('%Y-%m-%d'),
         'applied_start_period': None,
@@ -60,20 +38,44 @@ def add_payment_card():
         'notes': '',
         'contract': None,
         'is_valid': False
-    })
+    }
+
+def init_bulk_entry_state():
+    """Initialize or reset bulk payment entry state."""
+    if 'bulk_payments' not in st.session_state:
+        st.session_state.bulk_payments = [new_payment_card()]
+    
+    # Validation and submission errors, by card_id
+    if 'bulk_validation_errors' not in st.session_state:
+        st.session_state.bulk_validation_errors = {}
+    
+    if 'bulk_submit_errors' not in st.session_state:
+        st.session_state.bulk_submit_errors = {}
+    
+    if 'bulk_entry_clients' not in st.session_state:
+        st.session_state.bulk_entry_clients = get_clients()
+
+def add_payment_card():
+    """Add a new payment card to the session state."""
+    st.session_state.bulk_payments.append(new_payment_card())
 
 def remove_payment_card(index: int):
     """Remove a payment card from the session state."""
     if len(st.session_state.bulk_payments) > 1:
-        st.session_state.bulk_payments.pop(index)
-        if index in st.session_state.bulk_validation_errors:
-            del st.session_state.bulk_validation_errors[index]
+        card_id = st.session_state.bulk_payments.pop(index)['card_id']
+        st.session_state.bulk_validation_errors.pop(card_id, None)
+        st.session_state.bulk_submit_errors.pop(card_id, None)
 
 def show_payment_card(index: int):
     """Display a single payment card."""
     card_data = st.session_state.bulk_payments[index]
+    # Widgets are keyed by card_id so a card keeps its own state when others are removed
+    card_id = card_data['card_id']
     
     with st.expander(f"Payment Entry #{index + 1}", expanded=True):
+        if card_id in st.session_state.bulk_submit_errors:
+            st.error(f"Not added: {st.session_state.bulk_submit_errors[card_id]}")
+        
         # Combine client selection and delete button in a more natural way
         client_col, delete_col = st.columns([11, 1])  # Use asymmetric ratio for better spacing
         
@@ -92,13 +94,13 @@ def show_payment_card(index: int):
                 "Client",
                 options=client_names,
                 index=selected_index,
-                key=f"client_{index}"
+                key=f"client_{card_id}"
             )
         
         # Delete Button - aligned with client selection
         with delete_col:
             st.write("")  # Add some vertical spacing to align with selectbox
-            if st.button("❌", key=f"delete_{index}", help="Remove this payment"):
+            if st.button("❌", key=f"delete_{card_id}", help="Remove this payment"):
                 remove_payment_card(index)
                 st.rerun()
             
@@ -119,14 +121,14 @@ def show_payment_card(index: int):
                     "Payment Date",
                     value=datetime.strptime(card_data['received_date'], '%Y-%m-%d'),
                     format="MM/DD/YYYY",
-                    key=f"date_{index}"
+                    key=f"date_{card_id}"
                 )
                 card_data['received_date'] = received_date.strftime('%Y-%m-%d')
                 
                 amount = st.text_input(
                     "Payment Amount",
                     value=format_currency_ui(card_data['actual_fee']) if card_data['actual_fee'] else "",
-                    key=f"amount_{index}",
+                    key=f"amount_{card_id}",
                     help="Amount received"
                 )
                 if amount:
@@ -137,7 +139,7 @@ def show_payment_card(index: int):
                 assets = st.text_input(
                     "Assets Under Management",
                     value=format_currency_ui(card_data['total_assets']) if card_data['total_assets'] else "",
-                    key=f"assets_{index}",
+                    key=f"assets_{card_id}",
                     help="Total assets under management"
                 )
                 if assets:
@@ -148,7 +150,7 @@ def show_payment_card(index: int):
                     "Payment Method",
                     options=method_options,
                     index=method_options.index(card_data['method']) if card_data['method'] in method_options else 0,
-                    key=f"method_{index}"
+                    key=f"method_{card_id}"
                 )
                 card_data['method'] = method
             
@@ -174,7 +176,7 @@ def show_payment_card(index: int):
                         f"Start {period_label}",
                         options=period_options,
                         index=default_index,
-                        key=f"start_period_{index}"
+                        key=f"start_period_{card_id}"
                     )
                     start_period, start_year = parse_period_option(start_period_option, schedule)
                     
@@ -203,7 +205,7 @@ def show_payment_card(index: int):
                         f"End {period_label}",
                         options=valid_end_options,
                         index=default_end_index,
-                        key=f"end_period_{index}"
+                        key=f"end_period_{card_id}"
                     )
                     end_period, end_year = parse_period_option(end_period_option, schedule)
                     
@@ -225,7 +227,7 @@ def show_payment_card(index: int):
             notes = st.text_area(
                 "Notes",
                 value=card_data['notes'],
-                key=f"notes_{index}",
+                key=f"notes_{card_id}",
                 height=75,
                 placeholder=("Add any additional notes here..." if start_period_option == end_period_option else
                            "Add any additional notes here (e.g., reason for multi-period payment)...")
@@ -246,7 +248,7 @@ def show_payment_card(index: int):
                 'payment_schedule': card_data['contract'][3] if card_data['contract'] else None
             })
             
-            st.session_state.bulk_validation_errors[index] = validation_errors
+            st.session_state.bulk_validation_errors[card_id] = validation_errors
             card_data['is_valid'] = not validation_errors
             
             if validation_errors:
@@ -264,58 +266,55 @@ def submit_bulk_payments():
         st.error("No valid payments to submit.")
         return
     
-    progress_text = "Submitting payments..."
-    progress_bar = st.progress(0, text=progress_text)
+    batch = [
+        (payment['client_id'], {
+            'received_date': payment['received_date'],
+            'applied_start_period': payment['applied_start_period'],
+            'applied_start_year': payment['applied_start_year'],
+            'applied_end_period': payment['applied_end_period'],
+            'applied_end_year': payment['applied_end_year'],
+            'total_assets': payment['total_assets'],
+            'actual_fee': payment['actual_fee'],
+            'method': payment['method'],
+            'notes': payment['notes'],
+            'payment_schedule': payment['contract'][3] if payment['contract'] else None
+        })
+        for _, payment in valid_payments
+    ]
     
-    success_count = 0
-    failed_payments = []
+    # One transaction for the whole batch; results come back per payment
+    with st.spinner(f"Submitting {len(batch)} payments..."):
+        results = add_payments_bulk(batch)
     
-    for idx, (i, payment) in enumerate(valid_payments):
-        try:
-            form_data = {
-                'received_date': payment['received_date'],
-                'applied_start_period': payment['applied_start_period'],
-                'applied_start_year': payment['applied_start_year'],
-                'applied_end_period': payment['applied_end_period'],
-                'applied_end_year': payment['applied_end_year'],
-                'total_assets': payment['total_assets'],
-                'actual_fee': payment['actual_fee'],
-                'method': payment['method'],
-                'notes': payment['notes'],
-                'payment_schedule': payment['contract'][3] if payment['contract'] else None
-            }
-            
-            if add_payment(payment['client_id'], form_data):
-                success_count += 1
-            else:
-                failed_payments.append((i, "Database error"))
-                
-        except Exception as e:
-            failed_payments.append((i, str(e)))
-        
-        progress_bar.progress((idx + 1) / len(valid_payments))
+    added = [i for (i, _), (payment_id, _) in zip(valid_payments, results) if payment_id]
+    # Failed cards stay for correction and show their error after the rerun
+    st.session_state.bulk_submit_errors = {
+        payment['card_id']: error
+        for (_, payment), (payment_id, error) in zip(valid_payments, results) if not payment_id
+    }
+    st.session_state.bulk_added_count = len(added)
     
-    if success_count:
-        st.success(f"Successfully added {success_count} payments!")
-        # Remove successful payments
-        indices_to_remove = [i for i, _ in valid_payments]
-        for i in sorted(indices_to_remove, reverse=True):
-            st.session_state.bulk_payments.pop(i)
-        
-        if not st.session_state.bulk_payments:
-            add_payment_card()
-        
-        st.rerun()
+    for i in sorted(added, reverse=True):
+        card_id = st.session_state.bulk_payments.pop(i)['card_id']
+        st.session_state.bulk_validation_errors.pop(card_id, None)
     
-    if failed_payments:
-        for i, error in failed_payments:
-            st.error(f"Payment {i+1} failed: {error}")
+    if not st.session_state.bulk_payments:
+        add_payment_card()
+    
+    st.rerun()
 
 def show_bulk_payment_entry():
     """Main entry point for bulk payment entry."""
     st.title("📝 Bulk Payment Entry")
     init_bulk_entry_state()
     
+    # Outcome of the last submission
+    added_count = st.session_state.pop('bulk_added_count', None)
+    if added_count:
+        st.success(f"Successfully added {added_count} payments!")
+    if st.session_state.bulk_submit_errors:
+        st.error(f"{len(st.session_state.bulk_submit_errors)} payments could not be added; see the cards below.")
+    
     # Display all payment cards
     for i in range(len(st.session_state.bulk_payments)):
         show_payment_card(i)
@@ -95,6 +95,7 @@ from utils.utils import (
     format_phone_number_db,
     validate_phone_number
 )
+from utils.perf_hud import perf_section
 
 # ============================================================================
 # Contact Form State Management
@@ -368,6 +369,7 @@ def render_contact_card(contact, contact_type: str):
 # Main Display Function
 # ============================================================================
 
+@perf_section('display_contacts_section')
 def display_contacts_section(client_id: int):
     """Main entry point for the contacts section."""
     # Initialize state
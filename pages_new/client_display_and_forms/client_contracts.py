@@ -81,7 +81,7 @@ from utils.utils import (
     save_contract,
     format_currency_ui,
     format_currency_db,
-    get_database_connection
+    get_read_connection
 )
 
 
@@ -328,7 +328,7 @@ def display_contracts_section(client_id: int):
 
 def get_contract_details(contract_id: int):
     """Get detailed contract information"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -343,7 +343,7 @@ def get_contract_details(contract_id: int):
 
 def get_all_client_contracts(client_id: int):
     """Get all contracts for a client"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
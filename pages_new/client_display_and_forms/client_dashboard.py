@@ -12,7 +12,6 @@ maintaining the legacy layout and UX patterns but with modern state management.
 
 import streamlit as st
 from typing import Optional, Tuple
-import time
 
 from utils.utils import get_clients
 from .client_metrics import show_client_metrics
@@ -20,6 +19,7 @@ from .client_contacts import display_contacts_section
 from .client_contracts import display_contracts_section
 from .client_payments import display_payments_section
 from utils.utils import get_client_details
+from utils.instrumentation import query_scope
 
 
 def init_dashboard_state():
@@ -97,8 +97,8 @@ def get_selected_client() -> Optional[Tuple]:
         st.session_state.previous_client = selected_name
     return next((client for client in clients if client[1] == selected_name), None)
 
+@query_scope('display_client_dashboard')
 def display_client_dashboard():
-    start_time = time.time()
     init_dashboard_state()
     st.markdown("""
         <style>
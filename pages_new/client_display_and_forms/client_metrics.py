@@ -6,13 +6,12 @@ from utils.client_data import (
     get_client_details_optimized
 )
 from streamlit_extras.metric_cards import style_metric_cards
-from utils.database import get_database_connection
+from utils.perf_hud import perf_section
 
+@perf_section('show_client_metrics')
 def show_client_metrics(client_id: int) -> None:
     """Display the client metrics section of the dashboard using summary tables."""
-    from utils.utils import ensure_summaries_initialized
     from utils.client_data import get_consolidated_client_data
-    ensure_summaries_initialized()
 
     # Get consolidated data (optimized version)
     data = get_consolidated_client_data(client_id)
@@ -1,6 +1,6 @@
 from datetime import datetime
 import streamlit as st
-from utils.utils import format_currency_ui, get_database_connection
+from utils.utils import format_currency_ui, get_read_connection
 
 
 
@@ -165,7 +165,7 @@ def get_quarter_month_range(quarter, year):
 
 def get_unique_payment_methods():
     """Get unique payment methods from the database."""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -235,7 +235,7 @@ def display_contract_info(contract: tuple) -> bool:
 
 def get_client_payments(client_id: int, limit: int = None):
     """Get payments for a client"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         query = """
@@ -270,7 +270,7 @@ def get_client_payments(client_id: int, limit: int = None):
 
 def get_payment_details(payment_id: int):
     """Get detailed payment information"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -53,9 +53,9 @@ CREATE TABLE "payments" (
    - All required fields must be validated before submission
 
 2. Payment History Display:
-   - Table columns must maintain specific proportions [1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1, 1]
-   - Notes show as: 🟢 (with note) or ◯ (without note), when clicked, the note expands to show the full note under the payment spanning half of the row or so
-   - Actions show as: ✏️ (edit) and 🗑️ (delete)
+   - History is one st.dataframe grid, formatted column-wise by create_payment_frame()
+   - Notes show in full in their own column
+   - Selecting a row shows an action bar with ✏️ Edit and 🗑️ Delete
    - Period display format:
      * Monthly: "MMM YYYY" or "MMM - MMM YYYY" for ranges
      * Quarterly: "QN YYYY" or "QN YYYY - QN YYYY" for ranges
@@ -99,7 +99,7 @@ From utils.py:
 - format_currency_ui: Formats currency for display
 - format_currency_db: Formats currency for database storage
 - validate_payment_data: Validates payment form data
-- get_payment_history: Retrieves filtered payment history
+- get_paginated_payment_history: Retrieves one page of filtered payment history
 - update_payment_note: Updates payment notes
 
 From client_payment_utils.py:
@@ -138,11 +138,11 @@ Testing Checklist:
 """
 
 import streamlit as st
+import pandas as pd
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple
-from utils.utils import ensure_summaries_initialized
 from utils.utils import (
-    get_payment_history,
+    get_paginated_payment_history,
     get_active_contract,
     format_currency_ui,
     format_currency_db,
@@ -163,7 +163,8 @@ from .client_payment_utils import (
     get_current_period,
     format_period_display
 )
-from utils.database import get_database_connection
+from utils.payment_ledger import LEDGER_COLUMNS
+from utils.perf_hud import perf_section
 
 ### THE ONLY REQUIRED FIELDS ARE: Payment Date, Payment Amount
 
@@ -181,6 +182,9 @@ def init_payment_state():
         st.session_state.delete_payment_id = None
     if 'show_delete_confirm' not in st.session_state:
         st.session_state.show_delete_confirm = False
+    if 'payment_grid_version' not in st.session_state:
+        # Part of the grid key; bumped to clear the grid's row selection
+        st.session_state.payment_grid_version = 0
     if 'payment_filter' not in st.session_state:
         st.session_state.payment_filter = {
             'time_filter': 'All Time',
@@ -502,17 +506,10 @@ def show_payment_history(client_id: int):
         if selected_filter == "Custom":
             col1, col2, _ = st.columns([1, 1, 2])
             with col1:
-                # Use summary table for years
-                conn = get_database_connection()
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT DISTINCT year 
-                    FROM quarterly_summaries 
-                    WHERE client_id = ? 
-                    ORDER BY year DESC
-                """, (client_id,))
-                available_years = [row[0] for row in cursor.fetchall()]
-                conn.close()
+                # Years come from the payments themselves, so they show even without current summaries
+                available_years = list(dict.fromkeys(
+                    year for year, _ in get_payment_year_quarters(client_id) if year is not None
+                ))
                 
                 year = st.selectbox(
                     "Select Year",
@@ -562,26 +559,98 @@ def show_payment_history(client_id: int):
         if quarter != "All Quarters":
             quarters = [int(quarter[1])]
     
-    # Get payments with summary data
-    raw_payments = get_payment_history(client_id, years=years, quarters=quarters)
+    # Page tokens of the pages before the current one; reset when the
+    # client or filters change
+    page_key = (client_id, tuple(years or ()), tuple(quarters or ()))
+    if st.session_state.get('payment_page_key') != page_key:
+        st.session_state.payment_page_key = page_key
+        st.session_state.payment_page_tokens = [None]
+    page_tokens = st.session_state.payment_page_tokens
+    
+    # Get one page of payments with summary data
+    raw_payments, next_token = get_paginated_payment_history(
+        client_id, page_token=page_tokens[-1], years=years, quarters=quarters
+    )
     if not raw_payments:
+        if len(page_tokens) > 1:
+            # This page's payments were deleted; step back to the page before it
+            page_tokens.pop()
+            st.rerun()
         st.info("No payment history available for this client.")
         return
     
-    formatted_payments = format_payment_data(raw_payments)
-    display_payment_table(formatted_payments)
+    display_payment_grid(
+        create_payment_frame(raw_payments),
+        key=f"payment_grid_{client_id}_{len(page_tokens)}_{st.session_state.payment_grid_version}"
+    )
     
-def delete_payment_confirm(payment_id):
-    """Set up confirmation dialog for payment deletion"""
+    if len(page_tokens) > 1 or next_token:
+        prev_col, page_col, next_col = st.columns([1, 4, 1])
+        with prev_col:
+            st.button(
+                "← Newer",
+                key="payment_page_prev",
+                disabled=len(page_tokens) == 1,
+                on_click=page_tokens.pop
+            )
+        with page_col:
+            st.markdown(f"<div style='text-align: center'>Page {len(page_tokens)}</div>", unsafe_allow_html=True)
+        with next_col:
+            st.button(
+                "Older →",
+                key="payment_page_next",
+                disabled=next_token is None,
+                on_click=page_tokens.append,
+                args=(next_token,)
+            )
+    
+def set_payment_to_edit(payment_id: int):
+    """Open the payment form with a payment's data loaded for editing."""
+    st.session_state.show_payment_form = True
+    st.session_state.editing_payment_id = payment_id
+    # Load payment data for editing
+    payment_data = get_payment_by_id(payment_id)
+    if payment_data:
+        # Convert quarters to months if monthly schedule
+        schedule = payment_data[9].lower() if payment_data[9] else ""
+        if schedule == "monthly":
+            # Convert quarters back to months
+            start_period = (payment_data[1] - 1) * 3 + 1
+            end_period = (payment_data[3] - 1) * 3 + 3
+        else:
+            # Keep as quarters
+            start_period = payment_data[1]
+            end_period = payment_data[3]
+
+        # Only treat as multi-period if start and end are actually different
+        is_multi_period = (payment_data[1] != payment_data[3] or payment_data[2] != payment_data[4])
+
+        st.session_state.payment_form_data = {
+            'received_date': payment_data[0],
+            'applied_start_period': start_period,
+            'applied_start_year': payment_data[2],
+            'applied_end_period': end_period,
+            'applied_end_year': payment_data[4],
+            'total_assets': payment_data[5],
+            'actual_fee': payment_data[6],
+            'method': payment_data[7],
+            'notes': payment_data[8],
+            'payment_schedule': payment_data[9],
+            'is_multi_period': is_multi_period  # Add this to control checkbox state
+        }
+
+def delete_payment_confirm(payment_id: int):
+    """Ask for confirmation before deleting a payment (replaces any other pending confirmation)."""
     st.session_state.delete_payment_id = payment_id
     st.session_state.show_delete_confirm = True
-    st.rerun()  # Force rerun to show confirmation immediately
 
 def handle_delete_confirmed(payment_id):
     """Handle the actual deletion after confirmation"""
     with st.spinner("Deleting payment..."):
         if delete_payment(payment_id):
             st.toast("Payment deleted successfully!", icon="✅")
+            # A fresh grid key drops the selection, which would otherwise move to the next row
+            st.session_state.payment_grid_version += 1
         else:
             st.error("Failed to delete payment")
     # Clear states after operation
@@ -595,164 +664,135 @@ def handle_delete_cancelled():
     st.session_state.show_delete_confirm = False
     st.rerun()
 
-def display_payment_table(payments: list):
-    """Display the formatted payment history table."""
-    # Add CSS for table styling
-    st.markdown("""
-        <style>
-        div.payment-table div[data-testid="column"] > div > div > div > div {
-            padding: 0;
-            margin: 0;
-            line-height: 0.8;
-        }
-        
-        div.payment-table p {
-            margin: 0;
-            padding: 0;
-            line-height: 1;
-        }
-        
-        div.payment-table div[data-testid="stHorizontalBlock"] {
-            margin-bottom: 0.1rem;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+PAYMENT_GRID_COLUMNS = {
+    'Provider': st.column_config.TextColumn('Provider'),
+    'Period': st.column_config.TextColumn('Period'),
+    'Frequency': st.column_config.TextColumn('Frequency'),
+    'Method': st.column_config.TextColumn('Method'),
+    'Received': st.column_config.TextColumn('Received'),
+    'Total Assets': st.column_config.NumberColumn('Total Assets', format='dollar'),
+    'Expected Fee': st.column_config.NumberColumn('Expected Fee', format='dollar'),
+    'Actual Fee': st.column_config.NumberColumn('Actual Fee', format='dollar'),
+    'Discrepancy': st.column_config.NumberColumn('Discrepancy', format='dollar'),
+    'Notes': st.column_config.TextColumn('Notes', width='large'),
+}
+
+_MONTH_ABBR = pd.Series(['', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                         'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
+
+def create_payment_frame(payments: list) -> pd.DataFrame:
+    """Build the payment grid from ledger rows, formatting whole columns at once."""
+    df = pd.DataFrame(payments, columns=LEDGER_COLUMNS)
+    frame = pd.DataFrame(index=df.index)
+    frame['Provider'] = df['provider_name'].fillna('N/A')
     
-    st.markdown('<div class="payment-table">', unsafe_allow_html=True)
+    # Period: months for monthly schedules, quarters otherwise
+    start_year = df['applied_start_year'].astype('Int64').astype(str)
+    end_year = df['applied_end_year'].astype('Int64').astype(str)
+    start_quarter = df['applied_start_quarter'].astype('Int64')
+    end_quarter = df['applied_end_quarter'].astype('Int64')
+    same_year = df['applied_start_year'] == df['applied_end_year']
     
-    # Table headers
-    cols = st.columns([1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1, 1])
-    headers = [
-        "Provider", "Period", "Frequency", "Method", "Received",
-        "Total Assets", "Expected Fee", "Actual Fee", "Discrepancy",
-        "Notes", "Actions"
-    ]
+    start_month = _MONTH_ABBR.reindex(((start_quarter - 1) * 3 + 1).fillna(0).astype(int)).fillna('').to_numpy()
+    end_month = _MONTH_ABBR.reindex(((end_quarter - 1) * 3 + 3).fillna(0).astype(int)).fillna('').to_numpy()
+    monthly_period = (start_month + ' ' + start_year + ' - ' + end_month + ' ' + end_year).where(
+        ~same_year, start_month + ' - ' + end_month + ' ' + start_year
+    )
     
-    for col, header in zip(cols, headers):
-        with col:
-            st.markdown(f"<p style='font-weight: bold'>{header}</p>", unsafe_allow_html=True)
+    quarterly_period = 'Q' + start_quarter.astype(str) + ' ' + start_year
+    quarterly_period = quarterly_period.where(
+        (start_quarter == end_quarter).fillna(False) & same_year,
+        quarterly_period + ' - Q' + end_quarter.astype(str) + ' ' + end_year
+    )
     
-    st.markdown("<hr style='margin: 0.1rem 0; border-color: #eee;'>", unsafe_allow_html=True)
+    schedule = df['payment_schedule'].str.lower()
+    frame['Period'] = monthly_period.where(schedule == 'monthly', quarterly_period)
+    frame['Frequency'] = df['payment_schedule'].str.title().fillna('N/A')
+    frame['Method'] = df['method'].fillna('N/A')
     
-    # Display data rows
-    for payment in payments:
-        with st.container():
-            cols = st.columns([1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1, 1])
-            
-            # Display payment data
-            for i, (col, key) in enumerate(zip(cols[:-2], [
-                "Provider", "Period", "Frequency", "Method", "Received",
-                "Total Assets", "Expected Fee", "Actual Fee", "Discrepancy"
-            ])):
-                with col:
-                    st.markdown(f"<p>{payment[key]}</p>", unsafe_allow_html=True)
-            
-            # Notes column
-            with cols[-2]:
-                if payment['Notes']:
-                    st.markdown(f"<p title='{payment['Notes']}'>🟢</p>", unsafe_allow_html=True)
-                else:
-                    st.markdown("<p>◯</p>", unsafe_allow_html=True)
-            
-            # Actions column
-            with cols[-1]:
-                action_cols = st.columns([1, 1])
-                with action_cols[0]:
-                    def set_payment_to_edit(payment_id):
-                        st.session_state.show_payment_form = True
-                        st.session_state.editing_payment_id = payment_id
-                        # Load payment data for editing
-                        payment_data = get_payment_by_id(payment_id)
-                        if payment_data:
-                            # Convert quarters to months if monthly schedule
-                            schedule = payment_data[9].lower() if payment_data[9] else ""
-                            if schedule == "monthly":
-                                # Convert quarters back to months
-                                start_period = (payment_data[1] - 1) * 3 + 1
-                                end_period = (payment_data[3] - 1) * 3 + 3
-                            else:
-                                # Keep as quarters
-                                start_period = payment_data[1]
-                                end_period = payment_data[3]
-
-                            # Only treat as multi-period if start and end are actually different
-                            is_multi_period = (payment_data[1] != payment_data[3] or payment_data[2] != payment_data[4])
-
-                            st.session_state.payment_form_data = {
-                                'received_date': payment_data[0],
-                                'applied_start_period': start_period,
-                                'applied_start_year': payment_data[2],
-                                'applied_end_period': end_period,
-                                'applied_end_year': payment_data[4],
-                                'total_assets': payment_data[5],
-                                'actual_fee': payment_data[6],
-                                'method': payment_data[7],
-                                'notes': payment_data[8],
-                                'payment_schedule': payment_data[9],
-                                'is_multi_period': is_multi_period  # Add this to control checkbox state
-                            }
-
-                    st.button(
-                        "✏️",
-                        key=f"edit_payment_{payment['payment_id']}_{datetime.now().strftime('%Y%m%d')}",
-                        help="Edit payment",
-                        on_click=set_payment_to_edit,
-                        args=(payment['payment_id'],)
-                    )
-                
-                with action_cols[1]:
-                    def delete_payment_confirm(payment_id):
-                        # Clear any other delete confirmations first
-                        if st.session_state.delete_payment_id is not None and st.session_state.delete_payment_id != payment_id:
-                            st.session_state.show_delete_confirm = False
-                        # Set new delete confirmation
-                        st.session_state.delete_payment_id = payment_id
-                        st.session_state.show_delete_confirm = True
-
-                    st.button(
-                        "🗑️",
-                        key=f"delete_payment_{payment['payment_id']}_{datetime.now().strftime('%Y%m%d')}",
-                        help="Delete payment",
-                        on_click=delete_payment_confirm,
-                        args=(payment['payment_id'],)
-                    )
-            
-            # Show delete confirmation if active
-            if st.session_state.show_delete_confirm and st.session_state.delete_payment_id == payment['payment_id']:
-                # Use a modal-like container for confirmation
-                with st.container():
-                    st.markdown("---")  # Visual separator
-                    confirm_cols = st.columns([6, 2, 2])
-                    with confirm_cols[0]:
-                        st.warning(f"Delete this payment for {payment['Period']}?")
-                    with confirm_cols[1]:
-                        if st.button(
-                            "Yes, Delete",
-                            key=f"confirm_delete_payment_{payment['payment_id']}_{datetime.now().strftime('%Y%m%d')}",
-                            type="primary",
-                            use_container_width=True
-                        ):
-                            handle_delete_confirmed(payment['payment_id'])
-                    with confirm_cols[2]:
-                        if st.button(
-                            "Cancel",
-                            key=f"cancel_delete_payment_{payment['payment_id']}_{datetime.now().strftime('%Y%m%d')}",
-                            use_container_width=True
-                        ):
-                            handle_delete_cancelled()
-                    st.markdown("---")  # Visual separator
+    # Dates that fail to parse are shown as stored
+    received = pd.to_datetime(df['received_date'], format='%Y-%m-%d', errors='coerce')
+    frame['Received'] = received.dt.strftime('%b %d, %Y').fillna(df['received_date']).fillna('N/A')
     
-    st.markdown('</div>', unsafe_allow_html=True)
+    frame['Total Assets'] = pd.to_numeric(df['total_assets'], errors='coerce')
+    frame['Expected Fee'] = pd.to_numeric(df['expected_fee'], errors='coerce')
+    frame['Actual Fee'] = pd.to_numeric(df['actual_fee'], errors='coerce')
+    frame['Discrepancy'] = frame['Actual Fee'] - frame['Expected Fee']
+    frame['Notes'] = df['notes'].fillna('')
+    frame['payment_id'] = df['payment_id']
+    return frame
+
+def display_payment_grid(payments: pd.DataFrame, key: str = "payment_grid"):
+    """Display the payment history grid with an edit/delete bar for the selected payment."""
+    event = st.dataframe(
+        payments[list(PAYMENT_GRID_COLUMNS)],
+        column_config=PAYMENT_GRID_COLUMNS,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=key
+    )
+    
+    rows = [position for position in event.selection.rows if position < len(payments)]
+    if not rows:
+        st.caption("Select a payment to edit or delete it.")
+        return
+    
+    payment = payments.iloc[rows[0]]
+    payment_id = int(payment['payment_id'])
+    
+    # Action bar for the selected payment
+    info_col, edit_col, delete_col = st.columns([6, 1, 1])
+    with info_col:
+        st.markdown(f"**{payment['Period']}** · received {payment['Received']}")
+    with edit_col:
+        st.button(
+            "✏️ Edit",
+            key=f"edit_payment_{payment_id}",
+            on_click=set_payment_to_edit,
+            args=(payment_id,),
+            use_container_width=True
+        )
+    with delete_col:
+        st.button(
+            "🗑️ Delete",
+            key=f"delete_payment_{payment_id}",
+            on_click=delete_payment_confirm,
+            args=(payment_id,),
+            use_container_width=True
+        )
+    
+    # Show delete confirmation if active
+    if st.session_state.show_delete_confirm and st.session_state.delete_payment_id == payment_id:
+        confirm_cols = st.columns([6, 2, 2])
+        with confirm_cols[0]:
+            st.warning(f"Delete this payment for {payment['Period']}?")
+        with confirm_cols[1]:
+            if st.button(
+                "Yes, Delete",
+                key=f"confirm_delete_payment_{payment_id}",
+                type="primary",
+                use_container_width=True
+            ):
+                handle_delete_confirmed(payment_id)
+        with confirm_cols[2]:
+            if st.button(
+                "Cancel",
+                key=f"cancel_delete_payment_{payment_id}",
+                use_container_width=True
+            ):
+                handle_delete_cancelled()
 
 # ============================================================================
 # Main Display Function
 # ============================================================================
 
+@perf_section('display_payments_section')
 def display_payments_section(client_id: int):
     """Main entry point for the payments section."""
-    # Initialize state and ensure summaries are ready
+    # Initialize state (summaries are initialized once at app startup)
     init_payment_state()
-    ensure_summaries_initialized()
     
     # Rest of the function remains the same
     contract = get_active_contract(client_id)
@@ -770,83 +810,6 @@ def display_payments_section(client_id: int):
     else:
         show_payment_history(client_id)
 
-def format_payment_data(payments: list) -> list:
-    """Format payment data for display using summary data when available."""
-    table_data = []
-    
-    for payment in payments:
-        provider_name = payment[0] or "N/A"
-        
-        def format_currency(value):
-            try:
-                if value is None or value == "":
-                    return "N/A"
-                return f"${float(value):,.2f}"
-            except (ValueError, TypeError):
-                return "N/A"
-        
-        frequency = payment[5].title() if payment[5] else "N/A"
-        
-        if frequency.lower() == "monthly":
-            start_month = ((payment[1] - 1) * 3) + 1
-            end_month = ((payment[3] - 1) * 3) + 3
-            
-            if payment[2] == payment[4] and start_month == end_month:
-                period = f"{datetime.strptime(f'2000-{start_month}-1', '%Y-%m-%d').strftime('%b')} {payment[2]}"
-            else:
-                start_date = datetime.strptime(f'2000-{start_month}-1', '%Y-%m-%d')
-                end_date = datetime.strptime(f'2000-{end_month}-1', '%Y-%m-%d')
-                if payment[2] == payment[4]:
-                    period = f"{start_date.strftime('%b')} - {end_date.strftime('%b')} {payment[2]}"
-                else:
-                    period = f"{start_date.strftime('%b')} {payment[2]} - {end_date.strftime('%b')} {payment[4]}"
-        else:
-            if payment[1] == payment[3] and payment[2] == payment[4]:
-                period = f"Q{payment[1]} {payment[2]}"
-            else:
-                period = f"Q{payment[1]} {payment[2]} - Q{payment[3]} {payment[4]}"
-        
-        received_date = "N/A"
-        if payment[6]:
-            try:
-                date_obj = datetime.strptime(payment[6], '%Y-%m-%d')
-                received_date = date_obj.strftime('%b %d, %Y')
-            except:
-                received_date = payment[6]
-        
-        total_assets = format_currency(payment[7])
-        expected_fee = format_currency(payment[8])
-        actual_fee = format_currency(payment[9])
-        
-        try:
-            if payment[8] is not None and payment[9] is not None and payment[8] != "" and payment[9] != "":
-                discrepancy = float(payment[9]) - float(payment[8])
-                discrepancy_str = f"${discrepancy:,.2f}" if discrepancy >= 0 else f"-${abs(discrepancy):,.2f}"
-            else:
-                discrepancy_str = "N/A"
-        except (ValueError, TypeError):
-            discrepancy_str = "N/A"
-        
-        notes = payment[10] or ""
-        payment_id = payment[11]
-        method = payment[12] or "N/A"
-        
-        table_data.append({
-            "Provider": provider_name,
-            "Period": period,
-            "Frequency": frequency,
-            "Method": method,
-            "Received": received_date,
-            "Total Assets": total_assets,
-            "Expected Fee": expected_fee,
-            "Actual Fee": actual_fee,
-            "Discrepancy": discrepancy_str,
-            "Notes": notes,
-            "payment_id": payment_id
-        })
-    
-    return table_data
-    
 if __name__ == "__main__":
     st.set_page_config(page_title="Client Payments", layout="wide")
     # For testing
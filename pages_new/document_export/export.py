@@ -23,7 +23,7 @@ from utils.utils import (
     format_currency_ui,
 )
 from pages_new.main_summary.summary_data import (
-    get_summary_year_data,
+    get_summary_year_frame,
     get_available_years
 )
 
@@ -121,24 +121,20 @@ def format_excel_workbook(writer: pd.ExcelWriter, df: pd.DataFrame, sheet_name:
 def create_quarterly_summary_df(year_data: Dict[str, Any]) -> pd.DataFrame:
     """Create DataFrame for quarterly summary export."""
     try:
-        rows = []
-        for client_id, quarterly in year_data['quarterly_totals'].items():
-            metrics = year_data['client_metrics'][client_id]
-            row = {
-                'Client': quarterly['name'],
-                'Provider': quarterly.get('provider', 'N/A'),
-                'Participants': metrics.get('avg_participants', 'N/A'),                
-                'Contract #': quarterly.get('contract_number', 'N/A'),
-                'Fee Type': quarterly.get('fee_type', 'N/A').title(),
-                'Rate': quarterly.get('rate', 0),
-                'Q1': quarterly.get('Q1', 0),
-                'Q2': quarterly.get('Q2', 0),
-                'Q3': quarterly.get('Q3', 0),
-                'Q4': quarterly.get('Q4', 0),
-                'Total': metrics['total_fees'],
-            }
-            rows.append(row)
-        return pd.DataFrame(rows)
+        clients = year_data['clients']
+        return pd.DataFrame({
+            'Client': clients['name'],
+            'Provider': clients['provider'],
+            'Participants': clients['avg_participants'],
+            'Contract #': clients['contract_number'],
+            'Fee Type': clients['fee_type'].str.title(),
+            'Rate': clients['rate'],
+            'Q1': clients['Q1'],
+            'Q2': clients['Q2'],
+            'Q3': clients['Q3'],
+            'Q4': clients['Q4'],
+            'Total': clients['total_fees'],
+        }).reset_index(drop=True)
     except Exception as e:
         st.error(f"Error creating quarterly summary: {str(e)}")
         return pd.DataFrame()
@@ -223,7 +219,7 @@ def show_export_section():
             if generate_clicked:
                 try:
                     with st.spinner("Generating report..."):
-                        year_data = get_summary_year_data(year)
+                        year_data = get_summary_year_frame(year)
                         df = create_quarterly_summary_df(year_data)
                         
                         if df.empty:
@@ -7,9 +7,12 @@ Sidebar component for accurate payment tracking in arrears.
 import streamlit as st
 from datetime import datetime
 from utils.utils import (
-    get_database_connection,
+    get_read_connection,
+    read_connection,
     format_currency_ui,
 )
+from utils.perf_hud import perf_section
+from utils.writer import get_write_version
 
 def calculate_expected_fee(fee_type: str, flat_rate: float, percent_rate: float, total_assets: float) -> float:
     """Calculate expected fee based on fee type and rates."""
@@ -52,30 +55,59 @@ def display_payment_row(item: dict, status_type: str):
         }.get(status_type, '#666')
         st.markdown(f"<p style='color: {color}; text-align: right;'>{amount}</p>", unsafe_allow_html=True)
 
+# Per-client payment count, amount received and assets of the first payment
+# (by received date) for one quarter. Parameters: year, quarter.
+PERIOD_TOTALS_CTE = """
+    WITH period_payments AS (
+        SELECT 
+            client_id,
+            actual_fee,
+            total_assets,
+            ROW_NUMBER() OVER (
+                PARTITION BY client_id 
+                ORDER BY received_date, payment_id
+            ) AS payment_number
+        FROM payments
+        WHERE applied_start_year = ?
+        AND applied_start_quarter = ?
+    ),
+    period_totals AS (
+        SELECT 
+            client_id,
+            COUNT(*) AS payment_count,
+            COALESCE(SUM(actual_fee), 0) AS received,
+            MAX(CASE WHEN payment_number = 1 THEN total_assets END) AS first_assets
+        FROM period_payments
+        GROUP BY client_id
+    )
+"""
+
 def get_period_payments(quarter: int, year: int, view_type: str = 'client') -> dict:
     """Get accurate payment data for tracking period."""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         
         if view_type == 'client':
-            # Get all active clients with their contracts
-            cursor.execute("""
+            # One pass over the quarter's payments: per active contract, the
+            # client's payment count, amount received and first payment's assets
+            cursor.execute(PERIOD_TOTALS_CTE + """
                 SELECT 
                     c.client_id,
                     c.display_name,
-                    con.contract_id,
                     con.payment_schedule,
                     con.fee_type,
                     con.percent_rate,
-                    con.flat_rate
+                    con.flat_rate,
+                    COALESCE(pt.payment_count, 0),
+                    COALESCE(pt.received, 0),
+                    pt.first_assets
                 FROM clients c
                 JOIN contracts con ON c.client_id = con.client_id
+                LEFT JOIN period_totals pt ON pt.client_id = c.client_id
                 WHERE con.active = 'TRUE'
                 ORDER BY c.display_name
-            """)
-            
-            clients = cursor.fetchall()
+            """, (year, quarter))
             
             # Track payment status
             complete = []
@@ -84,46 +116,30 @@ def get_period_payments(quarter: int, year: int, view_type: str = 'client') -> d
             total_due = 0
             total_received = 0
             
-            for client in clients:
-                # Get payments for the period
-                cursor.execute("""
-                    SELECT 
-                        received_date,
-                        actual_fee,
-                        total_assets
-                    FROM payments
-                    WHERE client_id = ?
-                    AND applied_start_quarter = ?
-                    AND applied_start_year = ?
-                    ORDER BY received_date
-                """, (client[0], quarter, year))
-                
-                payments = cursor.fetchall()
-                
+            for client_id, name, schedule, fee_type, percent_rate, flat_rate, payment_count, received, first_assets in cursor.fetchall():
                 # Calculate expected fee
                 expected = calculate_expected_fee(
-                    client[4],  # fee_type
-                    client[6],  # flat_rate
-                    client[5],  # percent_rate
-                    payments[0][2] if payments and payments[0][2] else None  # total_assets
+                    fee_type,
+                    flat_rate,
+                    percent_rate,
+                    first_assets or None
                 )
                 
-                received = sum(p[1] for p in payments if p[1]) if payments else 0
-                
                 if expected:
                     total_due += expected
                 total_received += received
                 
                 status = {
-                    'name': client[1],
-                    'schedule': client[3],
+                    'client_id': client_id,
+                    'name': name,
+                    'schedule': schedule,
                     'expected': expected,
                     'received': received,
-                    'payment_count': len(payments)
+                    'payment_count': payment_count
                 }
                 
                 # Determine status
-                payment_status = get_payment_status(client[3], len(payments), expected, received)
+                payment_status = get_payment_status(schedule, payment_count, expected, received)
                 if payment_status == 'complete':
                     complete.append(status)
                 elif payment_status == 'partial':
@@ -132,23 +148,41 @@ def get_period_payments(quarter: int, year: int, view_type: str = 'client') -> d
                     outstanding.append(status)
         
         else:  # Provider view
-            # Get all active contracts grouped by provider
-            cursor.execute("""
+            # Roll active contracts up to their provider in the same pass.
+            # Expected fees follow calculate_expected_fee(); a provider's
+            # schedule is that of its first contract.
+            cursor.execute(PERIOD_TOTALS_CTE + """,
+                provider_contracts AS (
+                    SELECT 
+                        con.provider_name,
+                        con.payment_schedule,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY con.provider_name 
+                            ORDER BY con.contract_id
+                        ) AS contract_rank,
+                        CASE 
+                            WHEN con.fee_type = 'flat' THEN con.flat_rate
+                            WHEN con.fee_type = 'percentage' AND pt.first_assets 
+                            THEN con.percent_rate * pt.first_assets
+                        END AS expected,
+                        COALESCE(pt.payment_count, 0) AS payment_count,
+                        COALESCE(pt.received, 0) AS received
+                    FROM contracts con
+                    LEFT JOIN period_totals pt ON pt.client_id = con.client_id
+                    WHERE con.active = 'TRUE'
+                    AND con.provider_name IS NOT NULL
+                )
                 SELECT 
-                    con.provider_name,
-                    con.payment_schedule,
-                    con.fee_type,
-                    con.percent_rate,
-                    con.flat_rate,
-                    con.contract_id,
-                    con.client_id
-                FROM contracts con
-                WHERE con.active = 'TRUE'
-                AND con.provider_name IS NOT NULL
-                ORDER BY con.provider_name
-            """)
-            
-            contracts = cursor.fetchall()
+                    provider_name,
+                    MAX(CASE WHEN contract_rank = 1 THEN payment_schedule END),
+                    COALESCE(SUM(expected), 0),
+                    SUM(received),
+                    SUM(payment_count),
+                    COUNT(*)
+                FROM provider_contracts
+                GROUP BY provider_name
+                ORDER BY provider_name
+            """, (year, quarter))
             
             # Track payment status
             complete = []
@@ -157,51 +191,9 @@ def get_period_payments(quarter: int, year: int, view_type: str = 'client') -> d
             total_due = 0
             total_received = 0
             
-            # Group contracts by provider
-            provider_contracts = {}
-            for contract in contracts:
-                provider = contract[0]
-                if provider not in provider_contracts:
-                    provider_contracts[provider] = []
-                provider_contracts[provider].append(contract)
-            
-            for provider, provider_contracts_list in provider_contracts.items():
-                provider_expected = 0
-                provider_received = 0
-                provider_payments = 0
-                payment_schedule = provider_contracts_list[0][1]  # Use first contract's schedule
-                
-                for contract in provider_contracts_list:
-                    cursor.execute("""
-                        SELECT 
-                            received_date,
-                            actual_fee,
-                            total_assets
-                        FROM payments
-                        WHERE client_id = ?
-                        AND applied_start_quarter = ?
-                        AND applied_start_year = ?
-                        ORDER BY received_date
-                    """, (contract[6], quarter, year))
-                    
-                    payments = cursor.fetchall()
-                    
-                    # Calculate expected fee
-                    expected = calculate_expected_fee(
-                        contract[2],  # fee_type
-                        contract[4],  # flat_rate
-                        contract[3],  # percent_rate
-                        payments[0][2] if payments and payments[0][2] else None  # total_assets
-                    )
-                    
-                    received = sum(p[1] for p in payments if p[1]) if payments else 0
-                    
-                    if expected:
-                        provider_expected += expected
-                        total_due += expected
-                    provider_received += received
-                    total_received += received
-                    provider_payments += len(payments)
+            for provider, payment_schedule, provider_expected, provider_received, provider_payments, contract_count in cursor.fetchall():
+                total_due += provider_expected
+                total_received += provider_received
                 
                 status = {
                     'name': provider,
@@ -217,7 +209,7 @@ def get_period_payments(quarter: int, year: int, view_type: str = 'client') -> d
                     provider_payments,
                     provider_expected,
                     provider_received,
-                    len(provider_contracts_list)
+                    contract_count
                 )
                 if payment_status == 'complete':
                     complete.append(status)
@@ -236,6 +228,28 @@ def get_period_payments(quarter: int, year: int, view_type: str = 'client') -> d
     finally:
         conn.close()
 
+def get_collection_status(quarter: int, year: int) -> dict:
+    """
+    Collection status per client for a quarter, as {client_id: (status, entry)}.
+    
+    Kept in session state and reused until the quarter changes or a write
+    commits, so any number of lookups in a rerun cost one get_period_payments().
+    If a client appears more than once, the first entry in complete, partial,
+    outstanding order wins.
+    """
+    key = (quarter, year, get_write_version())
+    cached = st.session_state.get('_collection_status')
+    if cached is None or cached['key'] != key:
+        data = get_period_payments(quarter, year)
+        by_client = {}
+        for status in ('complete', 'partial', 'outstanding'):
+            for entry in data[status]:
+                by_client.setdefault(entry['client_id'], (status, entry))
+        cached = {'key': key, 'by_client': by_client}
+        st.session_state['_collection_status'] = cached
+    return cached['by_client']
+
+@perf_section('show_quarter_tracker')
 def show_quarter_tracker():
     """Display compact payment tracking sidebar."""
     # Initialize view preference in session state if not exists
@@ -250,110 +264,116 @@ def show_quarter_tracker():
     default_quarter = 4 if current_quarter == 1 else current_quarter - 1
     default_year = current_year - 1 if current_quarter == 1 else current_year
     
+    # The panel is a fragment: changing its view, year or quarter reruns
+    # only the panel, not the summary page behind it
     with st.sidebar:
-        st.markdown("### Collections Dashboard")
+        render_tracker_panel(default_quarter, default_year)
+
+@st.fragment
+def render_tracker_panel(default_quarter: int, default_year: int):
+    """Render the sidebar collections panel for the selected period."""
+    st.markdown("### Collections Dashboard")
+    
+    # Single view selector with radio buttons
+    view_type = st.radio(
+        "View By",
+        options=['client', 'provider'],
+        format_func=lambda x: x.capitalize(),
+        horizontal=True,
+        label_visibility="collapsed",
+        key='tracker_view'  # This automatically handles state
+    )
+    
+    st.divider()
+    
+    # Period selection
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        # Get year range from database
+        with read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MIN(applied_start_year), MAX(applied_start_year) FROM payments")
+            min_year, max_year = cursor.fetchone()
         
-        # Single view selector with radio buttons
-        view_type = st.radio(
-            "View By",
-            options=['client', 'provider'],
-            format_func=lambda x: x.capitalize(),
-            horizontal=True,
-            label_visibility="collapsed",
-            key='tracker_view'  # This automatically handles state
+        selected_year = st.selectbox(
+            "Year",
+            options=range(min_year, max_year + 2),
+            index=list(range(min_year, max_year + 2)).index(default_year)
         )
+    
+    with col2:
+        selected_quarter = st.selectbox(
+            "Quarter",
+            options=[1, 2, 3, 4],
+            index=[1, 2, 3, 4].index(default_quarter)
+        )
+    
+    try:
+        data = get_period_payments(selected_quarter, selected_year, view_type)
         
-        st.divider()
+        # Calculate meaningful metrics
+        total_entities = len(data['outstanding']) + len(data['partial']) + len(data['complete'])
+        entities_paid = len(data['complete']) + len(data['partial'])
+        metric_label = "Clients Paid" if view_type == 'client' else "Providers Paid"
         
-        # Period selection
-        col1, col2 = st.columns([1, 1])
+        # Key metrics
+        col1, col2 = st.columns(2)
         with col1:
-            # Get year range from database
-            conn = get_database_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT MIN(applied_start_year), MAX(applied_start_year) FROM payments")
-            min_year, max_year = cursor.fetchone()
-            conn.close()
-            
-            selected_year = st.selectbox(
-                "Year",
-                options=range(min_year, max_year + 2),
-                index=list(range(min_year, max_year + 2)).index(default_year)
+            st.metric(
+                metric_label,
+                f"{entities_paid}/{total_entities}",
+                help=f"{'Clients' if view_type == 'client' else 'Providers'} who have made full or partial payments this quarter"
             )
-        
         with col2:
-            selected_quarter = st.selectbox(
-                "Quarter",
-                options=[1, 2, 3, 4],
-                index=[1, 2, 3, 4].index(default_quarter)
+            st.metric(
+                "Collected",
+                format_currency_ui(data['total_received']),
+                help="Total amount collected this quarter"
             )
         
-        try:
-            data = get_period_payments(selected_quarter, selected_year, view_type)
-            
-            # Calculate meaningful metrics
-            total_entities = len(data['outstanding']) + len(data['partial']) + len(data['complete'])
-            entities_paid = len(data['complete']) + len(data['partial'])
-            metric_label = "Clients Paid" if view_type == 'client' else "Providers Paid"
-            
-            # Key metrics
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric(
-                    metric_label,
-                    f"{entities_paid}/{total_entities}",
-                    help=f"{'Clients' if view_type == 'client' else 'Providers'} who have made full or partial payments this quarter"
-                )
-            with col2:
-                st.metric(
-                    "Collected",
-                    format_currency_ui(data['total_received']),
-                    help="Total amount collected this quarter"
-                )
-            
-            st.divider()
-            
-            # Custom CSS for compact display
-            st.markdown("""
-                <style>
-                    div[data-testid="stVerticalBlock"] div[data-testid="stHorizontalBlock"] {
-                        padding: 0.25rem 0;
-                        border-bottom: 1px solid rgba(49, 51, 63, 0.2);
-                    }
-                    div[data-testid="column"] > div > div > p {
-                        margin: 0;
-                        padding: 0;
-                    }
-                </style>
-            """, unsafe_allow_html=True)
-            
-            # Tabbed sections
-            tab1, tab2, tab3 = st.tabs(["Outstanding", "Partial", "Complete"])
-            
-            with tab1:
-                if data['outstanding']:
-                    for item in data['outstanding']:
-                        display_payment_row(item, 'outstanding')
-                else:
-                    st.caption("No outstanding payments")
-            
-            with tab2:
-                if data['partial']:
-                    for item in data['partial']:
-                        display_payment_row(item, 'partial')
-                else:
-                    st.caption("No partial payments")
-            
-            with tab3:
-                if data['complete']:
-                    for item in data['complete']:
-                        display_payment_row(item, 'complete')
-                else:
-                    st.caption("No completed payments")
-                    
-        except Exception as e:
-            st.error(f"Error loading payment data: {str(e)}")
-            st.error("Please try refreshing the page. If the error persists, contact support.")
+        st.divider()
+        
+        # Custom CSS for compact display
+        st.markdown("""
+            <style>
+                div[data-testid="stVerticalBlock"] div[data-testid="stHorizontalBlock"] {
+                    padding: 0.25rem 0;
+                    border-bottom: 1px solid rgba(49, 51, 63, 0.2);
+                }
+                div[data-testid="column"] > div > div > p {
+                    margin: 0;
+                    padding: 0;
+                }
+            </style>
+        """, unsafe_allow_html=True)
+        
+        # Tabbed sections
+        tab1, tab2, tab3 = st.tabs(["Outstanding", "Partial", "Complete"])
+        
+        with tab1:
+            if data['outstanding']:
+                for item in data['outstanding']:
+                    display_payment_row(item, 'outstanding')
+            else:
+                st.caption("No outstanding payments")
+        
+        with tab2:
+            if data['partial']:
+                for item in data['partial']:
+                    display_payment_row(item, 'partial')
+            else:
+                st.caption("No partial payments")
+        
+        with tab3:
+            if data['complete']:
+                for item in data['complete']:
+                    display_payment_row(item, 'complete')
+            else:
+                st.caption("No completed payments")
+                
+    except Exception as e:
+        st.error(f"Error loading payment data: {str(e)}")
+        st.error("Please try refreshing the page. If the error persists, contact support.")
 
 if __name__ == "__main__":
     show_quarter_tracker()
\ No newline at end of file
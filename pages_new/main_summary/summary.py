@@ -3,8 +3,9 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 from datetime import datetime
-from .summary_data import get_summary_year_data, get_available_years
-from .quarter_tracker import show_quarter_tracker, get_period_payments
+from .summary_data import get_summary_year_frame, get_available_years
+from .quarter_tracker import show_quarter_tracker, get_collection_status
+from utils.perf_hud import perf_section
 from .summary_utils import (
     calculate_current_quarter, get_default_year,
     format_currency, format_growth, calculate_trend_direction,
@@ -17,15 +18,15 @@ import numpy as np
 def render_metrics_section(summary_data: dict) -> None:
     """Render the top metrics section with enhanced measurements."""
     # Calculate all metrics first
+    clients = summary_data['clients']
+    
     # Client stats
-    total_clients = len(summary_data['quarterly_totals'])
+    total_clients = len(clients)
     active_clients = summary_data['overall_metrics']['active_clients']
     
     # Participant stats
-    clients_with_participants = sum(1 for client_id in summary_data['client_metrics'] 
-                                  if summary_data['client_metrics'][client_id].get('avg_participants', 0) > 0)
-    total_participants = sum(metrics.get('avg_participants', 0) 
-                           for metrics in summary_data['client_metrics'].values())
+    clients_with_participants = int((clients['avg_participants'] > 0).sum())
+    total_participants = clients['avg_participants'].sum()
     avg_participants = total_participants / clients_with_participants if clients_with_participants > 0 else 0
     
     # Revenue stats
@@ -34,32 +35,22 @@ def render_metrics_section(summary_data: dict) -> None:
     avg_revenue_per_client = total_revenue / active_clients if active_clients > 0 else 0
     
     # AUM stats
-    clients_with_aum = sum(1 for client_id in summary_data['client_metrics'] 
-                          if summary_data['client_metrics'][client_id].get('avg_aum', 0) > 0)
-    total_aum = sum(metrics.get('avg_aum', 0) 
-                   for metrics in summary_data['client_metrics'].values())
+    clients_with_aum = int((clients['avg_aum'] > 0).sum())
+    total_aum = clients['avg_aum'].sum()
     avg_aum_per_client = total_aum / clients_with_aum if clients_with_aum > 0 else 0
     
     # Fee structure stats
     fee_types = {
-        'percentage': 0,
-        'flat': 0
+        'percentage': int((clients['fee_type'] == 'percentage').sum()),
+        'flat': int((clients['fee_type'] == 'flat').sum())
     }
-    for client_id, quarterly in summary_data['quarterly_totals'].items():
-        fee_type = quarterly.get('fee_type', 'N/A')
-        if fee_type == 'percentage':
-            fee_types['percentage'] += 1
-        elif fee_type == 'flat':
-            fee_types['flat'] += 1
             
-    # Largest plan stats
-    max_aum_client = max(summary_data['client_metrics'].items(), 
-                        key=lambda x: x[1].get('avg_aum', 0))
-    max_participants_client = max(summary_data['client_metrics'].items(), 
-                                key=lambda x: x[1].get('avg_participants', 0))
+    # Largest plan stats (first client wins ties)
+    max_aum_client = clients.loc[clients['avg_aum'].astype(float).idxmax()]
+    max_participants_client = clients.loc[clients['avg_participants'].astype(float).idxmax()]
     
-    largest_aum_name = summary_data['quarterly_totals'][max_aum_client[0]]['name']
-    largest_participants_name = summary_data['quarterly_totals'][max_participants_client[0]]['name']
+    largest_aum_name = max_aum_client['name']
+    largest_participants_name = max_participants_client['name']
     
     # Create 2 rows with 5 columns each
     for row in range(2):
@@ -128,14 +119,14 @@ def render_metrics_section(summary_data: dict) -> None:
             with cols[3]:
                 st.metric(
                     "Largest Plan (AUM)",
-                    format_currency(max_aum_client[1].get('avg_aum', 0)),
+                    format_currency(max_aum_client['avg_aum']),
                     largest_aum_name,
                     help="Plan with the highest Assets Under Management"
                 )
             with cols[4]:
                 st.metric(
                     "Largest Plan (Participants)",
-                    f"{max_participants_client[1].get('avg_participants', 0):,.0f}",
+                    f"{max_participants_client['avg_participants']:,.0f}",
                     largest_participants_name,
                     help="Plan with the most participants"
                 )
@@ -152,27 +143,18 @@ def render_metrics_section(summary_data: dict) -> None:
 
 def render_charts(summary_data: dict) -> None:
     """Render the charts section with focused, actionable visualizations."""
+    clients = summary_data['clients']
+    
     # Create three columns for charts
     chart_col1, chart_col2, chart_col3 = st.columns(3)
     
     with chart_col1:
         # Group clients by provider and calculate total revenue
-        provider_data = []
-        for client_id, quarterly in summary_data['quarterly_totals'].items():
-            provider = quarterly.get('provider', 'Unspecified')
-            revenue = summary_data['client_metrics'][client_id]['total_fees']
-            provider_data.append({
-                'Provider': provider,
-                'Revenue': revenue,
-                'Client': quarterly['name']
-            })
-        
-        if provider_data:
-            provider_df = pd.DataFrame(provider_data)
-            provider_summary = provider_df.groupby('Provider').agg({
-                'Revenue': 'sum',
-                'Client': 'count'
-            }).reset_index()
+        if not clients.empty:
+            provider_summary = clients.groupby('provider').agg(
+                Revenue=('total_fees', 'sum'),
+                Client=('name', 'count')
+            ).reset_index().rename(columns={'provider': 'Provider'})
             provider_summary = provider_summary.sort_values('Revenue', ascending=True)
             
             # Create horizontal bar chart
@@ -198,42 +180,31 @@ def render_charts(summary_data: dict) -> None:
         quarter_data = []
         quarters = ['Q1', 'Q2', 'Q3', 'Q4']
         
-        # First pass: collect all quarterly revenues
-        all_quarterly_revenues = []
-        for client_id, quarterly in summary_data['quarterly_totals'].items():
-            for q in quarters:
-                if quarterly.get(q, 0) > 0:
-                    all_quarterly_revenues.append(quarterly[q])
+        # All positive quarterly revenues across the client/quarter matrix
+        matrix = clients[quarters].astype(float)
+        all_quarterly_revenues = matrix.values[matrix.values > 0]
         
         # Calculate quartiles for meaningful categorization
-        if all_quarterly_revenues:
+        if all_quarterly_revenues.size:
             q75 = np.percentile(all_quarterly_revenues, 75)
             q25 = np.percentile(all_quarterly_revenues, 25)
             
             for q in quarters:
-                quarter_payments = []
-                for client_id, quarterly in summary_data['quarterly_totals'].items():
-                    amount = quarterly.get(q, 0)
-                    if amount > 0:
-                        size_category = "Large" if amount >= q75 else "Small" if amount <= q25 else "Medium"
-                        quarter_payments.append({
-                            'Quarter': q,
-                            'Amount': amount,
-                            'Size': size_category
-                        })
-                
-                if quarter_payments:
+                amounts = matrix[q][matrix[q] > 0]
+                if not amounts.empty:
                     # Calculate statistics for each quarter
-                    total = sum(p['Amount'] for p in quarter_payments)
-                    count = len(quarter_payments)
+                    large = amounts >= q75
+                    small = ~large & (amounts <= q25)
+                    total = amounts.sum()
+                    count = len(amounts)
                     quarter_data.append({
                         'Quarter': q,
                         'Total Revenue': total,
                         'Payment Count': count,
-                        'Average Payment': total / count if count > 0 else 0,
-                        'Large Payments': sum(1 for p in quarter_payments if p['Size'] == 'Large'),
-                        'Medium Payments': sum(1 for p in quarter_payments if p['Size'] == 'Medium'),
-                        'Small Payments': sum(1 for p in quarter_payments if p['Size'] == 'Small')
+                        'Average Payment': total / count,
+                        'Large Payments': int(large.sum()),
+                        'Medium Payments': int((~large & ~small).sum()),
+                        'Small Payments': int(small.sum())
                     })
         
         if quarter_data:
@@ -278,20 +249,16 @@ def render_charts(summary_data: dict) -> None:
     
     with chart_col3:
         # Create AUM vs Participants analysis
-        client_metrics = []
-        for client_id, metrics in summary_data['client_metrics'].items():
-            quarterly = summary_data['quarterly_totals'][client_id]
-            if metrics.get('avg_aum', 0) > 0 and metrics.get('avg_participants', 0) > 0:
-                client_metrics.append({
-                    'Client': quarterly['name'],
-                    'AUM': metrics['avg_aum'],
-                    'Participants': metrics['avg_participants'],
-                    'Revenue': metrics['total_fees'],
-                    'Fee Type': quarterly['fee_type'].title()
-                })
+        reporting = clients[(clients['avg_aum'] > 0) & (clients['avg_participants'] > 0)]
         
-        if client_metrics:
-            metrics_df = pd.DataFrame(client_metrics)
+        if not reporting.empty:
+            metrics_df = pd.DataFrame({
+                'Client': reporting['name'],
+                'AUM': reporting['avg_aum'],
+                'Participants': reporting['avg_participants'],
+                'Revenue': reporting['total_fees'],
+                'Fee Type': reporting['fee_type'].str.title()
+            })
             
             # Create scatter plot
             scatter_chart = alt.Chart(metrics_df).mark_circle().encode(
@@ -320,28 +287,25 @@ def render_charts(summary_data: dict) -> None:
 
 def create_client_dataframe(summary_data: dict) -> pd.DataFrame:
     """Create a DataFrame for the client performance table."""
-    rows = []
-    for client_id, quarterly in summary_data['quarterly_totals'].items():
-        metrics = summary_data['client_metrics'][client_id]
-        row = {
-            'Client': quarterly['name'],
-            'Q1': quarterly.get('Q1', 0),
-            'Q2': quarterly.get('Q2', 0),
-            'Q3': quarterly.get('Q3', 0),
-            'Q4': quarterly.get('Q4', 0),
-            'Total': metrics['total_fees'],
-            'YoY Change': metrics.get('yoy_growth', 0),
-            # Store additional data for expansion
-            '_provider': quarterly.get('provider', 'N/A'),
-            '_contract_number': quarterly.get('contract_number', 'N/A'),
-            '_schedule': quarterly.get('schedule', 'N/A'),
-            '_rate': quarterly.get('rate', 0),
-            '_fee_type': quarterly.get('fee_type', 'N/A'),
-            '_participants': metrics.get('avg_participants', 'N/A'),
-            '_aum': metrics.get('avg_aum', 0)
-        }
-        rows.append(row)
-    return pd.DataFrame(rows)
+    clients = summary_data['clients']
+    return pd.DataFrame({
+        'Client': clients['name'],
+        '_client_id': clients.index,
+        'Q1': clients['Q1'],
+        'Q2': clients['Q2'],
+        'Q3': clients['Q3'],
+        'Q4': clients['Q4'],
+        'Total': clients['total_fees'],
+        'YoY Change': clients['yoy_growth'],
+        # Store additional data for expansion
+        '_provider': clients['provider'],
+        '_contract_number': clients['contract_number'],
+        '_schedule': clients['schedule'],
+        '_rate': clients['rate'].astype(object).where(clients['rate'].notna(), None),
+        '_fee_type': clients['fee_type'],
+        '_participants': clients['avg_participants'],
+        '_aum': clients['avg_aum']
+    }).reset_index(drop=True)
 
 def create_revenue_sparkline(q1, q2, q3, q4):
     """Create a compact revenue sparkline."""
@@ -386,6 +350,172 @@ def create_revenue_sparkline(q1, q2, q3, q4):
     
     return fig
 
+# Currency formatting for the client grid; blank cells mean no fee that quarter
+CLIENT_GRID_COLUMNS = {
+    'Client': st.column_config.TextColumn('Client', width='medium'),
+    **{q: st.column_config.NumberColumn(q, format='dollar') for q in ['Q1', 'Q2', 'Q3', 'Q4']},
+    'Total': st.column_config.NumberColumn('Total', format='dollar'),
+}
+
+def create_client_grid(df: pd.DataFrame) -> pd.DataFrame:
+    """Select the visible grid columns, blanking quarters without fees."""
+    grid = df[list(CLIENT_GRID_COLUMNS)].copy()
+    for q in ['Q1', 'Q2', 'Q3', 'Q4']:
+        grid[q] = grid[q].where(grid[q] > 0)
+    return grid
+
+def render_client_details(row: pd.Series, selected_year: int):
+    """Render the expanded metrics for one client as two rows of four columns."""
+    # First row
+    col1, col2, col3, col4 = st.columns(4)
+    
+    # Get current quarter payment status (computed once, then looked up by client)
+    current_quarter, current_year = calculate_current_quarter()
+    client_status, client_payment = get_collection_status(current_quarter, current_year).get(
+        row['_client_id'], (None, None)
+    )
+    
+    # 1. Quarter Status
+    with col1:
+        status_icon = "✅" if client_status == 'complete' else "⚠️" if client_status == 'partial' else "❌"
+        status_text = client_status.title() if client_status else "Unknown"
+        st.metric(
+            f"Q{current_quarter} {current_year} Status",
+            f"{status_icon} {status_text}",
+            "Current Quarter",
+            help="Payment status for current quarter"
+        )
+    
+    # 2. Payment Progress
+    with col2:
+        if client_payment:
+            schedule = client_payment['schedule']
+            expected_count = 3 if schedule == 'monthly' else 1
+            progress = f"{client_payment['payment_count']}/{expected_count}"
+            st.metric(
+                "Payment Progress",
+                progress,
+                schedule.title(),
+                help="Number of payments received vs expected for the quarter"
+            )
+        else:
+            st.metric(
+                "Payment Progress",
+                "N/A",
+                "No schedule data",
+                help="Number of payments received vs expected for the quarter"
+            )
+    
+    # 3. Provider
+    with col3:
+        st.metric(
+            "Provider",
+            row['_provider'],
+            f"Contract #{row['_contract_number']}",
+            help="Service provider"
+        )
+    
+    # 4. Participants
+    with col4:
+        participants = row['_participants'] if row['_participants'] and row['_participants'] != 'N/A' else 'N/A'
+        st.metric(
+            "Participants",
+            str(participants),
+            "Active Plan",
+            help="Number of plan participants"
+        )
+
+    # Second row
+    st.markdown("<div style='margin: 0.5rem 0;'></div>", unsafe_allow_html=True)
+    col1, col2, col3, col4 = st.columns(4)
+    
+    # 5. Rate
+    with col1:
+        rate_value = 'N/A'
+        rate_type = None
+        if row['_rate'] is not None:
+            if row['_fee_type'] == 'percentage':
+                rate_value = f"{row['_rate']*100:.3f}%"
+                rate_type = "Percentage Rate"
+            elif row['_fee_type'] == 'flat':
+                rate_value = format_currency(row['_rate'])
+                rate_type = "Flat Rate"
+        
+        st.metric(
+            "Rate",
+            rate_value,
+            rate_type or "Not Set",
+            help="Contract rate"
+        )
+    
+    # 6. Payment Schedule
+    with col2:
+        schedule = row['_schedule'].title() if row['_schedule'] else 'N/A'
+        st.metric(
+            "Payment Schedule",
+            schedule,
+            "Payment Frequency",
+            help="Payment frequency"
+        )
+    
+    # 7. Last Payment
+    with col3:
+        # Find last payment
+        last_payment = None
+        last_payment_date = None
+        for q in ['Q4', 'Q3', 'Q2', 'Q1']:
+            if row[q] > 0:
+                last_payment = row[q]
+                last_payment_date = f"{q} {selected_year}"
+                break
+        
+        st.metric(
+            "Last Payment",
+            format_currency(last_payment) if last_payment else 'No payments',
+            last_payment_date or "No payment history",
+            help="Most recent payment received"
+        )
+    
+    # 8. Last Recorded AUM
+    with col4:
+        aum_display = format_currency(row['_aum']) if row['_aum'] and row['_aum'] != 'N/A' else 'N/A'
+        # Calculate quarter of last AUM update
+        last_aum_quarter = None
+        for q in ['Q4', 'Q3', 'Q2', 'Q1']:
+            if row[q] > 0 and row['_aum'] and row['_aum'] != 'N/A':
+                last_aum_quarter = f"{q} {selected_year}"
+                break
+        
+        st.metric(
+            "Last Recorded AUM",
+            aum_display,
+            last_aum_quarter or "No AUM history",
+            help="Most recent Assets Under Management"
+        )
+
+@st.fragment
+def render_client_grid(df: pd.DataFrame, selected_year: int):
+    """Render the client grid; selecting rows expands their details below.
+    
+    Runs as a fragment, so selecting a row reruns only the grid and the
+    details, not the metrics and charts above it.
+    """
+    event = st.dataframe(
+        create_client_grid(df),
+        column_config=CLIENT_GRID_COLUMNS,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key=f"client_grid_{selected_year}"
+    )
+    
+    for position in event.selection.rows:
+        row = df.iloc[position]
+        st.markdown(f"**{row['Client']}**")
+        render_client_details(row, selected_year)
+
+@perf_section('show_main_summary')
 def show_main_summary():
     """Display the main summary page."""
     try:
@@ -394,9 +524,6 @@ def show_main_summary():
         st.sidebar.error("Error loading payment tracker. Please try refreshing the page.")
         st.sidebar.exception(e)
         
-    if 'expanded_rows' not in st.session_state:
-        st.session_state.expanded_rows = set()
-        
     st.markdown("""
         <style>
         .section-spacer {
@@ -415,19 +542,6 @@ def show_main_summary():
             color: rgb(0, 176, 255);
             border: 1px solid rgba(0, 176, 255, 0.2);
         }
-        .table-container {
-            width: 100%;
-            max-width: 1000px;  
-            margin: 0 auto;
-        }
-        .table-header {
-            margin-top: 0.5rem;  
-            padding: 0.5rem 0;
-        }
-        .table-header div[data-testid="column"] {
-            border: none;
-            padding-bottom: 0.25rem;
-        }
         div.stButton > button {
             width: 100%;
             text-align: left !important;
@@ -435,18 +549,6 @@ def show_main_summary():
             padding: 0.5rem;
             font-size: 0.9rem;
         }
-        div.stButton > button:disabled {
-            width: 100%;
-            text-align: right !important;
-            justify-content: flex-end !important;
-            padding: 0.5rem;
-            font-size: 0.9rem;
-            font-family: monospace;
-            background: none !important;
-            border: none !important;
-            color: white !important;
-            cursor: default !important;
-        }
         div[data-testid="column"] {
             border-right: 1px solid rgba(38, 39, 48, 0.3);
             padding: 0.5rem 0.25rem;
@@ -462,9 +564,6 @@ def show_main_summary():
             padding: 0 !important;
             border-color: rgba(38, 39, 48, 0.3);
         }
-        .table-rows {
-            margin-top: 0.5rem;
-        }
         div[data-testid="column"] > div[data-testid="stMarkdown"] {
             display: flex;
             align-items: center;
@@ -501,7 +600,7 @@ def show_main_summary():
         )
 
     # Get and render data
-    summary_data = get_summary_year_data(selected_year)
+    summary_data = get_summary_year_frame(selected_year)
     
     # Key Metrics section
     render_metrics_section(summary_data)
@@ -513,185 +612,8 @@ def show_main_summary():
     
     st.markdown("<div class='section-spacer'></div>", unsafe_allow_html=True)
     
-    # Table container
-    st.markdown('<div class="table-container">', unsafe_allow_html=True)
-    
-    # Headers first
-    header_cols = st.columns([2, 1, 1, 1, 1, 1.2])
-    header_cols[0].markdown('<div style="text-align: left;">Client</div>', unsafe_allow_html=True)
-    header_cols[1].markdown('<div style="text-align: right;">Q1</div>', unsafe_allow_html=True)
-    header_cols[2].markdown('<div style="text-align: right;">Q2</div>', unsafe_allow_html=True)
-    header_cols[3].markdown('<div style="text-align: right;">Q3</div>', unsafe_allow_html=True)
-    header_cols[4].markdown('<div style="text-align: right;">Q4</div>', unsafe_allow_html=True)
-    header_cols[5].markdown('<div style="text-align: right;">Total</div>', unsafe_allow_html=True)
-    
-    # Divider immediately after headers
-    st.markdown("<hr/>", unsafe_allow_html=True)
-    
-    # Create DataFrame with proper structure
+    # Client grid: the browser virtualizes the rows, so one widget serves
+    # any number of clients
     df = create_client_dataframe(summary_data)
-    df = df.sort_values('Total', ascending=False)
-    
-    # Table rows with proper spacing
-    st.markdown('<div class="table-rows">', unsafe_allow_html=True)
-    for _, row in df.iterrows():
-        cols = st.columns([2, 1, 1, 1, 1, 1.2])
-        
-        with cols[0]:
-            if st.button(
-                f"{'▼' if row['Client'] in st.session_state.expanded_rows else '▶'} {row['Client']}", 
-                key=f"btn_{row['Client']}"
-            ):
-                if row['Client'] in st.session_state.expanded_rows:
-                    st.session_state.expanded_rows.remove(row['Client'])
-                else:
-                    st.session_state.expanded_rows.add(row['Client'])
-                st.rerun()
-        
-        cols[1].button(format_currency(row["Q1"]) if row["Q1"] > 0 else "-", key=f"q1_{row['Client']}", disabled=True)
-        cols[2].button(format_currency(row["Q2"]) if row["Q2"] > 0 else "-", key=f"q2_{row['Client']}", disabled=True)
-        cols[3].button(format_currency(row["Q3"]) if row["Q3"] > 0 else "-", key=f"q3_{row['Client']}", disabled=True)
-        cols[4].button(format_currency(row["Q4"]) if row["Q4"] > 0 else "-", key=f"q4_{row['Client']}", disabled=True)
-        cols[5].button(format_currency(row["Total"]), key=f"total_{row['Client']}", disabled=True)
-        
-        if row['Client'] in st.session_state.expanded_rows:
-            # Show expanded metrics in two rows of four columns each
-            # First row
-            col1, col2, col3, col4 = st.columns(4)
-            
-            # Get current quarter payment status
-            current_quarter, current_year = calculate_current_quarter()
-            payment_data = get_period_payments(current_quarter, current_year)
-            
-            # Find client's payment status
-            client_status = None
-            client_payment = None
-            for status_list in ['complete', 'partial', 'outstanding']:
-                for entry in payment_data[status_list]:
-                    if entry['name'] == row['Client']:
-                        client_status = status_list
-                        client_payment = entry
-                        break
-                if client_status:
-                    break
-            
-            # 1. Quarter Status
-            with col1:
-                status_icon = "✅" if client_status == 'complete' else "⚠️" if client_status == 'partial' else "❌"
-                status_text = client_status.title() if client_status else "Unknown"
-                st.metric(
-                    f"Q{current_quarter} {current_year} Status",
-                    f"{status_icon} {status_text}",
-                    "Current Quarter",
-                    help="Payment status for current quarter"
-                )
-            
-            # 2. Payment Progress
-            with col2:
-                if client_payment:
-                    schedule = client_payment['schedule']
-                    expected_count = 3 if schedule == 'monthly' else 1
-                    progress = f"{client_payment['payment_count']}/{expected_count}"
-                    st.metric(
-                        "Payment Progress",
-                        progress,
-                        schedule.title(),
-                        help="Number of payments received vs expected for the quarter"
-                    )
-                else:
-                    st.metric(
-                        "Payment Progress",
-                        "N/A",
-                        "No schedule data",
-                        help="Number of payments received vs expected for the quarter"
-                    )
-            
-            # 3. Provider
-            with col3:
-                st.metric(
-                    "Provider",
-                    row['_provider'],
-                    f"Contract #{row['_contract_number']}",
-                    help="Service provider"
-                )
-            
-            # 4. Participants
-            with col4:
-                participants = row['_participants'] if row['_participants'] and row['_participants'] != 'N/A' else 'N/A'
-                st.metric(
-                    "Participants",
-                    str(participants),
-                    "Active Plan",
-                    help="Number of plan participants"
-                )
-
-            # Second row
-            st.markdown("<div style='margin: 0.5rem 0;'></div>", unsafe_allow_html=True)
-            col1, col2, col3, col4 = st.columns(4)
-            
-            # 5. Rate
-            with col1:
-                rate_value = 'N/A'
-                rate_type = None
-                if row['_rate'] is not None:
-                    if row['_fee_type'] == 'percentage':
-                        rate_value = f"{row['_rate']*100:.3f}%"
-                        rate_type = "Percentage Rate"
-                    elif row['_fee_type'] == 'flat':
-                        rate_value = format_currency(row['_rate'])
-                        rate_type = "Flat Rate"
-                
-                st.metric(
-                    "Rate",
-                    rate_value,
-                    rate_type or "Not Set",
-                    help="Contract rate"
-                )
-            
-            # 6. Payment Schedule
-            with col2:
-                schedule = row['_schedule'].title() if row['_schedule'] else 'N/A'
-                st.metric(
-                    "Payment Schedule",
-                    schedule,
-                    "Payment Frequency",
-                    help="Payment frequency"
-                )
-            
-            # 7. Last Payment
-            with col3:
-                # Find last payment
-                last_payment = None
-                last_payment_date = None
-                for q in ['Q4', 'Q3', 'Q2', 'Q1']:
-                    if row[q] > 0:
-                        last_payment = row[q]
-                        last_payment_date = f"{q} {selected_year}"
-                        break
-                
-                st.metric(
-                    "Last Payment",
-                    format_currency(last_payment) if last_payment else 'No payments',
-                    last_payment_date or "No payment history",
-                    help="Most recent payment received"
-                )
-            
-            # 8. Last Recorded AUM
-            with col4:
-                aum_display = format_currency(row['_aum']) if row['_aum'] and row['_aum'] != 'N/A' else 'N/A'
-                # Calculate quarter of last AUM update
-                last_aum_quarter = None
-                for q in ['Q4', 'Q3', 'Q2', 'Q1']:
-                    if row[q] > 0 and row['_aum'] and row['_aum'] != 'N/A':
-                        last_aum_quarter = f"{q} {selected_year}"
-                        break
-                
-                st.metric(
-                    "Last Recorded AUM",
-                    aum_display,
-                    last_aum_quarter or "No AUM history",
-                    help="Most recent Assets Under Management"
-                )
-    
-    st.markdown('</div>', unsafe_allow_html=True)  # Close table-rows
-    st.markdown('</div>', unsafe_allow_html=True)  # Close table-container
\ No newline at end of file
+    df = df.sort_values('Total', ascending=False).reset_index(drop=True)
+    render_client_grid(df, selected_year)
@@ -3,146 +3,103 @@ from typing import Dict, List, Optional, Tuple, Any, Union
 import streamlit as st
 from datetime import datetime
 import pandas as pd
-from utils.database import get_database_connection
+from utils.database import get_read_connection
+from utils.cache import cached
 
 class SummaryDataError(Exception):
     """Custom exception for summary data processing errors."""
     pass
 
-def get_summary_year_data(year: int) -> Dict[str, Any]:
-    """Get consolidated payment data for a specific year using summary tables."""
-    from utils.utils import ensure_summaries_initialized
-    ensure_summaries_initialized()
+# Per-client columns of the summary frame, in display order
+SUMMARY_FRAME_COLUMNS = [
+    'name', 'Q1', 'Q2', 'Q3', 'Q4', 'total_fees', 'avg_aum', 'avg_participants',
+    'payment_count', 'yoy_growth', 'provider', 'contract_number', 'schedule',
+    'fee_type', 'rate'
+]
+
+@cached(lambda year: [('year', year), 'clients'])
+def get_summary_year_frame(year: int) -> Dict[str, Any]:
+    """
+    Get a year's summary data as one DataFrame, built with vectorized pandas operations.
     
-    conn = get_database_connection()
+    Returns:
+        Dict with:
+        - 'clients': DataFrame indexed by client_id (ordered by client name)
+          with SUMMARY_FRAME_COLUMNS: the Q1-Q4 fee matrix, total fees,
+          average AUM, participants, YoY growth and contract details
+        - 'overall_metrics': totals across all clients
+    """
+    conn = get_read_connection()
     try:
-        cursor = conn.cursor()
-        
-        # Get quarterly summary data
-        cursor.execute("""
-            WITH QuarterlyData AS (
-                SELECT 
-                    c.client_id,
-                    c.display_name,
-                    qs.quarter,
-                    qs.total_payments as total_fees,
-                    qs.total_assets as avg_aum,
-                    con.num_people as participant_count,
-                    con.provider_name,
-                    con.contract_number,
-                    con.payment_schedule,
-                    con.fee_type,
-                    CASE 
-                        WHEN con.fee_type = 'percentage' THEN con.percent_rate
-                        ELSE con.flat_rate
-                    END as rate,
-                    qs.payment_count
-                FROM clients c
-                JOIN quarterly_summaries qs ON c.client_id = qs.client_id
-                LEFT JOIN contracts con ON 
-                    c.client_id = con.client_id AND 
-                    con.active = 'TRUE'
-                WHERE qs.year = ?
-                ORDER BY c.display_name, qs.quarter
-            )
+        quarterly = pd.read_sql_query("""
             SELECT 
-                client_id,
-                display_name,
-                quarter,
-                total_fees,
-                avg_aum,
-                participant_count,
-                provider_name,
-                contract_number,
-                payment_schedule,
-                fee_type,
-                rate,
-                payment_count
-            FROM QuarterlyData
-        """, (year,))
-        
-        quarterly_data = cursor.fetchall()
+                c.client_id,
+                c.display_name,
+                qs.quarter,
+                qs.total_payments as total_fees,
+                qs.total_assets as avg_aum,
+                con.num_people as participant_count,
+                con.provider_name,
+                con.contract_number,
+                con.payment_schedule,
+                con.fee_type,
+                CASE 
+                    WHEN con.fee_type = 'percentage' THEN con.percent_rate
+                    ELSE con.flat_rate
+                END as rate,
+                qs.payment_count
+            FROM clients c
+            JOIN quarterly_summaries qs ON c.client_id = qs.client_id
+            LEFT JOIN contracts con ON 
+                c.client_id = con.client_id AND 
+                con.active = 'TRUE'
+            WHERE qs.year = ?
+            ORDER BY c.display_name, qs.quarter
+        """, conn, params=(year,))
         
-        # Get yearly summary data
-        cursor.execute("""
+        yearly = pd.read_sql_query("""
             SELECT 
-                ys.client_id,
-                ys.total_payments as prev_year_total,
-                ys.payment_count,
-                ys.yoy_growth
-            FROM yearly_summaries ys
-            WHERE ys.year = ?
-        """, (year,))
-        
-        yearly_data = {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
-        
-        # Process data into required format
-        quarterly_totals: Dict[int, Dict[str, Any]] = {}
-        client_metrics: Dict[int, Dict[str, Any]] = {}
+                client_id,
+                total_payments,
+                payment_count,
+                yoy_growth
+            FROM yearly_summaries
+            WHERE year = ?
+        """, conn, params=(year,), index_col='client_id')
         
-        for row in quarterly_data:
-            (client_id, name, quarter, fees, aum, participants,
-             provider, contract_num, schedule, fee_type, rate, payment_count) = row
+        if quarterly.empty:
+            clients = pd.DataFrame(columns=SUMMARY_FRAME_COLUMNS, index=pd.Index([], name='client_id'))
+        else:
+            # Zero and missing fees/AUM don't count as a quarter's fee or an AUM sample
+            fees = quarterly['total_fees'].where(quarterly['total_fees'].fillna(0) != 0)
+            aum = quarterly['avg_aum'].where(quarterly['avg_aum'].fillna(0) != 0)
+            by_client = quarterly.assign(fees=fees, aum=aum).groupby('client_id', sort=False)
             
-            # Initialize client data if needed
-            if client_id not in quarterly_totals:
-                quarterly_totals[client_id] = {
-                    'name': name,
-                    'Q1': 0.0, 'Q2': 0.0, 'Q3': 0.0, 'Q4': 0.0,
-                    'provider': provider,
-                    'contract_number': contract_num,
-                    'schedule': schedule,
-                    'fee_type': fee_type,
-                    'rate': rate
-                }
-                client_metrics[client_id] = {
-                    'total_fees': 0.0,
-                    'avg_aum': 0.0,
-                    'aum_samples': 0,
-                    'avg_participants': participants or 0,
-                    'payment_count': 0
-                }
+            # Contract details come from each client's first row
+            clients = quarterly.drop_duplicates('client_id').set_index('client_id').rename(columns={
+                'display_name': 'name',
+                'participant_count': 'avg_participants',
+                'provider_name': 'provider',
+                'payment_schedule': 'schedule',
+            })
             
-            # Update quarterly totals
-            if quarter and fees:
-                quarterly_totals[client_id][f'Q{quarter}'] = fees
-                client_metrics[client_id]['total_fees'] = (
-                    client_metrics[client_id]['total_fees'] + fees
-                )
+            quarter_matrix = quarterly.assign(fees=fees).pivot_table(
+                index='client_id', columns='quarter', values='fees', aggfunc='last', dropna=False
+            ).reindex(index=clients.index, columns=[1, 2, 3, 4]).fillna(0.0)
+            for quarter in range(1, 5):
+                clients[f'Q{quarter}'] = quarter_matrix[quarter]
             
-            # Update AUM with proper averaging
-            if aum:
-                current_avg = client_metrics[client_id]['avg_aum']
-                current_count = client_metrics[client_id]['aum_samples']
-                new_count = current_count + 1
-                new_avg = ((current_avg * current_count) + aum) / new_count
-                client_metrics[client_id]['avg_aum'] = new_avg
-                client_metrics[client_id]['aum_samples'] = new_count
-            
-            client_metrics[client_id]['payment_count'] += payment_count or 0
-            
-            # Add YoY metrics if available
-            if client_id in yearly_data:
-                total, count, yoy = yearly_data[client_id]
-                client_metrics[client_id]['yoy_growth'] = yoy
-            else:
-                client_metrics[client_id]['yoy_growth'] = None
+            clients['total_fees'] = by_client['fees'].sum()
+            clients['avg_aum'] = by_client['aum'].mean().fillna(0.0)
+            clients['avg_participants'] = clients['avg_participants'].fillna(0)
+            clients['payment_count'] = by_client['payment_count'].sum()
+            clients['yoy_growth'] = yearly['yoy_growth'].reindex(clients.index)
+            clients = clients[SUMMARY_FRAME_COLUMNS]
         
         # Calculate overall metrics
-        active_clients = len([
-            cid for cid, metrics in client_metrics.items()
-            if metrics['payment_count'] > 0
-        ])
-        
-        total_fees = sum(
-            metrics['total_fees']
-            for metrics in client_metrics.values()
-        )
-        
-        prev_year_total = sum(
-            total for total, count, _ in yearly_data.values()
-            if count > 0
-        )
+        active_clients = int((clients['payment_count'] > 0).sum())
+        total_fees = float(clients['total_fees'].sum())
+        prev_year_total = float(yearly.loc[yearly['payment_count'].fillna(0) > 0, 'total_payments'].sum())
         
         overall_metrics = {
             'total_fees': total_fees,
@@ -157,8 +114,7 @@ def get_summary_year_data(year: int) -> Dict[str, Any]:
         }
         
         return {
-            'quarterly_totals': quarterly_totals,
-            'client_metrics': client_metrics,
+            'clients': clients,
             'overall_metrics': overall_metrics
         }
         
@@ -167,10 +123,37 @@ def get_summary_year_data(year: int) -> Dict[str, Any]:
     finally:
         conn.close()
 
+def get_summary_year_data(year: int) -> Dict[str, Any]:
+    """Get consolidated payment data for a year as nested dicts (see get_summary_year_frame)."""
+    frame = get_summary_year_frame(year)
+    clients = frame['clients'].astype(object).where(frame['clients'].notna(), None)
+    
+    quarterly_totals: Dict[int, Dict[str, Any]] = {}
+    client_metrics: Dict[int, Dict[str, Any]] = {}
+    for client_id, row in clients.to_dict('index').items():
+        quarterly_totals[client_id] = {
+            key: row[key] for key in (
+                'name', 'Q1', 'Q2', 'Q3', 'Q4', 'provider',
+                'contract_number', 'schedule', 'fee_type', 'rate'
+            )
+        }
+        client_metrics[client_id] = {
+            key: row[key] for key in (
+                'total_fees', 'avg_aum', 'avg_participants', 'payment_count', 'yoy_growth'
+            )
+        }
+    
+    return {
+        'quarterly_totals': quarterly_totals,
+        'client_metrics': client_metrics,
+        'overall_metrics': frame['overall_metrics']
+    }
+
 
+@cached(lambda: ['payments'])
 def get_available_years() -> List[int]:
     """Get list of years with payment data from summary tables."""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -6,7 +6,7 @@ from utils.utils import (
    delete_client,
    get_clients,
    get_client_details,
-   get_database_connection,
+   get_read_connection,
    validate_shared_path,
    normalize_shared_path,
    reconstruct_full_path
@@ -16,7 +16,7 @@ import os
 import time
 
 def get_full_client_details(client_id: int):
-   conn = get_database_connection()
+   conn = get_read_connection()
    try:
        cursor = conn.cursor()
        cursor.execute("""
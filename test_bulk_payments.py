@@ -0,0 +1,91 @@
+import pytest
+
+pytest.importorskip('streamlit')
+
+from conftest import assert_same_summaries, snapshot  # noqa: E402
+from utils import database, summaries, utils, writer  # noqa: E402
+
+
+@pytest.fixture
+def bulk_db(maintenance_mode):
+    """A scratch database with current summaries maintained by the application."""
+    summaries.set_maintenance_mode('application')
+    summaries.populate_all_summaries()
+
+
+def _clients_with_contracts(count):
+    with database.read_connection() as conn:
+        rows = conn.execute("""
+            SELECT DISTINCT client_id FROM contracts
+            WHERE active = 'TRUE' AND valid_to IS NULL ORDER BY client_id LIMIT ?
+        """, (count,)).fetchall()
+    return [row[0] for row in rows]
+
+
+def _payment(period, year, fee='$250.00', date='2022-07-15'):
+    return {
+        'received_date': date,
+        'applied_start_period': period,
+        'applied_start_year': year,
+        'applied_end_period': period,
+        'applied_end_year': year,
+        'total_assets': '$400,000.00',
+        'actual_fee': fee,
+        'method': 'Check',
+        'notes': 'bulk',
+    }
+
+
+def test_results_follow_input_order(bulk_db):
+    first, second = _clients_with_contracts(2)
+    batch = [
+        (first, _payment(2, 2021, '$100.00')),
+        (999999, _payment(2, 2021)),                      # No contract
+        (second, _payment(1, 2022, '$200.00')),
+        (first, _payment(1, 2099)),                       # Future period
+        (first, _payment(3, 2021, '$300.00')),
+        (second, _payment(2, 2022, fee='')),              # Missing amount
+        (second, _payment(1, 2022, '$400.00')),
+    ]
+    commits = writer.get_writer_stats()['commits']
+    results = utils.add_payments_bulk(batch)
+
+    assert writer.get_writer_stats()['commits'] == commits + 1
+    assert len(results) == len(batch)
+    assert [error is None for _, error in results] == [True, False, True, False, True, False, True]
+    assert "No active contract" in results[1][1]
+    assert "arrears" in results[3][1]
+    assert "payment amount" in results[5][1]
+
+    payment_ids = [payment_id for payment_id, _ in results if payment_id]
+    assert payment_ids == sorted(payment_ids)
+    with database.read_connection() as conn:
+        added = [
+            conn.execute("SELECT client_id, actual_fee FROM payments WHERE payment_id = ?", (payment_id,)).fetchone()
+            for payment_id in payment_ids
+        ]
+    assert added == [(first, 100.0), (second, 200.0), (first, 300.0), (second, 400.0)]
+
+
+def test_summaries_match_a_full_rebuild(bulk_db):
+    clients = _clients_with_contracts(3)
+    batch = [
+        (client_id, _payment(quarter, year, f"${100 + n}.00"))
+        for n, (client_id, quarter, year) in enumerate(
+            (client_id, quarter, year)
+            for client_id in clients for year in (2021, 2022) for quarter in (1, 2, 2)
+        )
+    ]
+    results = utils.add_payments_bulk(batch)
+    assert all(payment_id for payment_id, _ in results)
+    maintained = snapshot()
+
+    summaries.populate_all_summaries()
+    assert_same_summaries(snapshot(), maintained)
+
+
+def test_rejected_batch_writes_nothing(bulk_db):
+    commits = writer.get_writer_stats()['commits']
+    results = utils.add_payments_bulk([(999999, _payment(1, 2021)), (999998, _payment(2, 2021))])
+    assert results == [(None, "No active contract found")] * 2
+    assert writer.get_writer_stats()['commits'] == commits
@@ -0,0 +1,73 @@
+import pytest
+
+from utils import cache, database, events, writer
+
+
+@pytest.fixture
+def scratch(scratch_writer):
+    """Collect the PaymentChanged events delivered during the test."""
+    received = []
+    events.subscribe(received.append, events.PaymentChanged)
+    yield received
+    events._subscribers.remove((events.PaymentChanged, received.append))
+
+@cache.cached(lambda year: [('year', year)])
+def payment_total(year):
+    with database.read_connection() as conn:
+        return conn.execute(
+            "SELECT COALESCE(SUM(actual_fee), 0) FROM payments WHERE applied_start_year = ?", (year,)
+        ).fetchone()[0]
+
+
+def _add_payment(conn, year, fee, fail=False):
+    client_id, contract_id = conn.execute(
+        "SELECT client_id, contract_id FROM contracts WHERE active = 'TRUE' ORDER BY client_id LIMIT 1"
+    ).fetchone()
+    cursor = conn.execute("""
+        INSERT INTO payments (
+            client_id, contract_id, received_date,
+            applied_start_quarter, applied_start_year, applied_end_quarter, applied_end_year,
+            actual_fee
+        ) VALUES (?, ?, '2024-01-15', 1, ?, 1, ?, ?)
+    """, (client_id, contract_id, year, year, fee))
+    events.publish(events.PaymentChanged(events.ADDED, cursor.lastrowid, client_id, ((year, 1),)))
+    if fail:
+        raise RuntimeError("boom")
+    return cursor.lastrowid
+
+
+def _latest_year():
+    with database.read_connection() as conn:
+        return conn.execute("SELECT MAX(applied_start_year) FROM payments").fetchone()[0]
+
+
+def test_events_are_delivered_after_commit(scratch):
+    year = _latest_year()
+    since = events.get_events_since()[-1].seq if events.get_events_since() else 0
+
+    payment_id = writer.run_write(_add_payment, year, 100.0)
+
+    assert len(scratch) == 1
+    event = scratch[0]
+    assert (event.entity, event.action, event.entity_id) == ('payment', 'added', payment_id)
+    assert event.years == [year]
+    assert events.get_events_since(since) == [event]
+
+
+def test_rolled_back_jobs_publish_nothing(scratch):
+    with pytest.raises(RuntimeError):
+        writer.run_write(_add_payment, _latest_year(), 100.0, fail=True)
+    assert scratch == []
+
+
+def test_events_invalidate_only_their_years(scratch):
+    year = _latest_year()
+    before = payment_total(year)
+    other = payment_total(year + 5)
+
+    writer.run_write(_add_payment, year, 100.0)
+
+    assert payment_total(year) == pytest.approx(before + 100.0)
+    assert payment_total(year + 5) == other
+    stats = cache.get_cache_stats()['functions'][f"{__name__}.payment_total"]
+    assert (stats['hits'], stats['misses']) == (1, 3)
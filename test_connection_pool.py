@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+
+import pytest
+
+from utils import database
+
+
+def test_sequential_checkouts_reuse_warm_connection(scratch_db):
+    first = database.get_database_connection()
+    first.execute("SELECT COUNT(*) FROM clients").fetchone()
+    first.close()
+
+    second = database.get_database_connection()
+    second.close()
+
+    assert first is second
+    stats = database.get_connection_stats()['write']
+    assert stats['connects'] == 1
+    assert stats['checkouts'] == 2
+    assert stats['reuses'] == 1
+
+
+def test_nested_checkout_gets_its_own_connection(scratch_db):
+    with database.database_connection() as outer:
+        with database.database_connection() as inner:
+            assert inner is not outer
+    assert database.get_connection_stats()['write']['overflow'] == 1
+
+    with database.database_connection() as again:
+        assert again is outer
+
+
+def test_uncommitted_work_is_rolled_back_on_return(scratch_db):
+    conn = database.get_database_connection()
+    count = conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+    conn.execute("DELETE FROM contacts")
+    conn.close()
+
+    with database.database_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0] == count
+
+
+def test_each_thread_gets_its_own_connection(scratch_db):
+    seen = []
+
+    def worker():
+        with database.database_connection() as conn:
+            seen.append(conn)
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert seen[0] is not seen[1]
+    stats = database.get_connection_stats()['write']
+    assert stats['checkouts'] == 2
+    assert stats['held_time_total'] >= 0
+
+
+def test_connection_profile_is_applied(scratch_db):
+    with database.database_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_configure_connection_profile_overrides_and_validates(scratch_db):
+    profile = database.configure_connection_profile(busy_timeout=250, temp_store='file')
+    assert profile['busy_timeout'] == 250
+    assert profile['temp_store'] == 'FILE'
+    with database.database_connection() as conn:
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 250
+
+    with pytest.raises(ValueError):
+        database.configure_connection_profile(synchronous='SOMETIMES')
+    with pytest.raises(ValueError):
+        database.configure_connection_profile(page_size=4096)
+
+
+def test_read_connection_cannot_write(scratch_db):
+    with database.read_connection() as conn:
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0] > 0
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM contacts")
+    stats = database.get_connection_stats()
+    assert stats['read']['checkouts'] == 1
+    assert stats['write']['checkouts'] == 0
+
+
+def test_write_connection_commits_and_readers_see_it(scratch_db):
+    with database.read_connection() as conn:
+        before = conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    with database.write_connection() as conn:
+        assert conn.in_transaction
+        conn.execute("DELETE FROM contacts WHERE contact_id = (SELECT MIN(contact_id) FROM contacts)")
+
+    with database.read_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0] == before - 1
+    assert database.get_connection_stats()['write']['write_locks'] == 1
+
+
+def test_write_lock_timeout_is_counted(scratch_db):
+    database.configure_connection_profile(busy_timeout=50)
+    holder = database.get_write_connection()
+    errors = []
+
+    def contender():
+        try:
+            database.get_write_connection()
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=contender)
+    t.start()
+    t.join()
+    holder.close()
+
+    assert len(errors) == 1
+    assert database.get_connection_stats()['write']['lock_timeouts'] == 1
@@ -0,0 +1,103 @@
+import sqlite3
+
+import pytest
+
+from utils import database, payment_ledger
+
+
+@pytest.fixture
+def indexed_db(scratch_db):
+    """A scratch database with the app indexes."""
+    with database.write_connection() as conn:
+        database.ensure_indexes(conn.cursor())
+    return scratch_db
+
+def _busiest_client():
+    with database.read_connection() as conn:
+        return conn.execute(
+            "SELECT client_id FROM payments GROUP BY client_id ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()[0]
+
+
+def _walk_pages(client_id, limit, **filters):
+    pages, token = [], None
+    while True:
+        rows, token = payment_ledger.get_payment_ledger_page(client_id, page_token=token, limit=limit, **filters)
+        assert len(rows) <= limit
+        pages.extend(tuple(row) for row in rows)
+        if token is None:
+            return pages
+
+
+@pytest.mark.parametrize('limit', [1, 7, 25])
+def test_pages_cover_full_ledger_in_order(indexed_db, limit):
+    client_id = _busiest_client()
+    assert _walk_pages(client_id, limit) == [tuple(row) for row in payment_ledger.get_payment_ledger(client_id)]
+
+
+def test_pages_handle_ties_and_missing_dates(indexed_db):
+    client_id = _busiest_client()
+    conn = sqlite3.connect(indexed_db)
+    contract_id, year, quarter, date = conn.execute("""
+        SELECT contract_id, applied_start_year, applied_start_quarter, received_date
+        FROM payments WHERE client_id = ? LIMIT 1
+    """, (client_id,)).fetchone()
+    for received_date in [date] * 4 + [None] * 3:
+        conn.execute("""
+            INSERT INTO payments (client_id, contract_id, received_date, applied_start_quarter,
+                                  applied_start_year, applied_end_quarter, applied_end_year, actual_fee)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+        """, (client_id, contract_id, received_date, quarter, year, quarter, year))
+    conn.commit()
+    conn.close()
+
+    full = [tuple(row) for row in payment_ledger.get_payment_ledger(client_id)]
+    assert [row[6] for row in full[-3:]] == [None] * 3
+    for limit in (1, 2, 5):
+        assert _walk_pages(client_id, limit) == full
+
+
+def test_filters_use_fixed_statements(indexed_db):
+    client_id = _busiest_client()
+    full = payment_ledger.get_payment_ledger(client_id)
+    years = sorted(set(row[2] for row in full))
+
+    one = payment_ledger.get_payment_ledger(client_id, years=years[:1], quarters=[1, 2])
+    both = payment_ledger.get_payment_ledger(client_id, years=years[:2], quarters=[1, 2, 3, 4])
+    assert one == [row for row in full if row[2] == years[0] and row[1] in (1, 2)]
+    assert both == [row for row in full if row[2] in years[:2]]
+    assert _walk_pages(client_id, 3, years=years[:2]) == [tuple(row) for row in full if row[2] in years[:2]]
+    # Any number of years or quarters shares one statement per combination
+    assert payment_ledger.ledger_sql.cache_info().currsize <= 4 * len(payment_ledger.REGIONS)
+
+
+def test_payments_show_without_summaries(indexed_db):
+    client_id = _busiest_client()
+    before = payment_ledger.get_payment_ledger(client_id)
+    conn = sqlite3.connect(indexed_db)
+    conn.execute("DELETE FROM quarterly_summaries WHERE client_id = ?", (client_id,))
+    conn.commit()
+    conn.close()
+    assert payment_ledger.get_payment_ledger(client_id) == before
+
+
+@pytest.mark.parametrize('filter_years', [False, True])
+@pytest.mark.parametrize('filter_quarters', [False, True])
+@pytest.mark.parametrize('region', payment_ledger.REGIONS)
+def test_query_plans_use_indexes(indexed_db, filter_years, filter_quarters, region):
+    sql = payment_ledger.ledger_sql(filter_years, filter_quarters, region)
+    params = [1] * sql.count('?')
+    with database.read_connection() as conn:
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+    payments_steps = [step for step in plan if ' p ' in f" {step} "]
+    assert payments_steps and all(step.startswith('SEARCH p USING') for step in payments_steps), plan
+    assert any('c USING INTEGER PRIMARY KEY' in step for step in plan), plan
+    if not (filter_years or filter_quarters):
+        assert 'idx_payments_client_received' in payments_steps[0], plan
+        assert not any('TEMP B-TREE' in step for step in plan), plan
+
+
+def test_invalid_token_is_rejected(indexed_db):
+    with pytest.raises(ValueError):
+        payment_ledger.get_payment_ledger_page(1, page_token='not-a-token')
@@ -0,0 +1,103 @@
+import pytest
+
+from utils import cache, database, instrumentation, writer
+
+
+@cache.cached(lambda client_id: [('client', client_id)])
+def contact_count(client_id):
+    with database.read_connection() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM contacts WHERE client_id = ?", (client_id,)
+        ).fetchone()[0]
+
+
+def _add_contact(conn, client_id, declare=True):
+    conn.execute(
+        "INSERT INTO contacts (client_id, contact_type, contact_name) VALUES (?, 'Primary', 'cached')",
+        (client_id,)
+    )
+    if declare:
+        writer.invalidates(('client', client_id))
+
+
+def test_repeat_reads_hit_without_sql(scratch_writer):
+    first = contact_count(1)
+    with instrumentation.query_scope('rerun') as rerun:
+        assert contact_count(1) == first
+
+    assert rerun.queries == 0
+    assert (rerun.cache_hits, rerun.cache_misses) == (1, 0)
+    stats = cache.get_cache_stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert stats['functions'][f"{__name__}.contact_count"]['hit_rate'] == 0.5
+
+
+def test_declared_write_invalidates_only_its_tags(scratch_writer):
+    before_1, before_2 = contact_count(1), contact_count(2)
+    writer.run_write(_add_contact, 1)
+
+    with instrumentation.query_scope('rerun') as rerun:
+        assert contact_count(1) == before_1 + 1
+        assert contact_count(2) == before_2
+    assert (rerun.cache_hits, rerun.cache_misses) == (1, 1)
+
+
+def test_undeclared_write_invalidates_everything(scratch_writer):
+    contact_count(1)
+    contact_count(2)
+    writer.run_write(_add_contact, 1, declare=False)
+
+    with instrumentation.query_scope('rerun') as rerun:
+        contact_count(2)
+    assert rerun.cache_misses == 1
+
+
+def test_failed_write_keeps_entries(scratch_writer):
+    contact_count(1)
+
+    def failing(conn):
+        _add_contact(conn, 1)
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        writer.run_write(failing)
+    with instrumentation.query_scope('rerun') as rerun:
+        contact_count(1)
+    assert rerun.cache_hits == 1
+
+
+def test_entries_are_bounded_by_lru(scratch_writer, monkeypatch):
+    monkeypatch.setattr(cache, 'MAX_ENTRIES', 2)
+    contact_count(1)
+    contact_count(2)
+    contact_count(1)  # Client 1 is now the most recently used
+    contact_count(3)  # Evicts client 2
+
+    stats = cache.get_cache_stats()
+    assert stats['entries'] == 2
+    assert stats['evictions'] == 1
+    with instrumentation.query_scope('rerun') as rerun:
+        contact_count(1)
+        contact_count(2)
+    assert (rerun.cache_hits, rerun.cache_misses) == (1, 1)
+
+
+def test_request_memo_runs_once_per_rerun(scratch_writer):
+    calls = []
+
+    @cache.request_memo
+    def lookup(client_id):
+        calls.append(client_id)
+        return contact_count(client_id)
+
+    lookup(1)
+    lookup(1)
+    assert len(calls) == 2  # No scope: not memoized
+
+    with cache.request_scope():
+        first = lookup(1)
+        lookup(1)
+        assert len(calls) == 3
+        writer.run_write(_add_contact, 1)
+        assert lookup(1) == first + 1  # A commit empties the memo
+    assert len(calls) == 4
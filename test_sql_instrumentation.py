@@ -0,0 +1,63 @@
+import json
+import logging
+
+import pytest
+
+from utils import database, instrumentation
+
+
+@pytest.fixture
+def pool(scratch_db):
+    """Start with an empty query log."""
+    instrumentation.clear_query_log()
+    yield
+    instrumentation.clear_query_log()
+
+def load_clients():
+    with database.read_connection() as conn:
+        return conn.execute("SELECT client_id FROM clients").fetchall()
+
+
+def test_statements_record_rows_and_caller(pool):
+    clients = load_clients()
+
+    record = instrumentation.get_query_records()[-1]
+    assert record['sql'] == "SELECT client_id FROM clients"
+    assert record['rows'] == len(clients)
+    assert 'test_sql_instrumentation.load_clients:' in record['caller']
+    assert record['duration_ms'] > 0
+
+
+def test_scopes_nest_and_total(pool):
+    load_clients()  # Warm the pool so connection setup PRAGMAs are not counted
+    with instrumentation.query_scope('rerun') as rerun:
+        with instrumentation.query_scope('section') as section:
+            clients = load_clients()
+        load_clients()
+
+    assert section.queries == 1
+    assert section.rows == len(clients)
+    assert rerun.queries == 2
+    assert rerun.sql_time >= section.sql_time
+    assert rerun.as_dict()['wall_ms'] >= rerun.as_dict()['sql_ms']
+
+
+def test_slow_queries_are_logged(pool, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, 'SLOW_QUERY_MS', 0)
+    with caplog.at_level(logging.WARNING, logger='sql.slow'):
+        load_clients()
+    assert any('load_clients' in message for message in caplog.messages)
+    assert instrumentation.get_query_stats()['slow_queries'] >= 1
+
+
+def test_export_writes_json_lines(pool, tmp_path):
+    load_clients()
+    load_clients()
+    out = tmp_path / 'queries.jsonl'
+
+    written = instrumentation.export_query_log(str(out))
+
+    lines = [json.loads(line) for line in out.read_text().splitlines()]
+    assert written == len(lines) >= 2
+    assert {'sql', 'duration_ms', 'rows', 'caller', 'scope'} <= set(lines[0])
+    assert instrumentation.get_query_records() == []
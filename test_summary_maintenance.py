@@ -0,0 +1,276 @@
+import pytest
+
+from conftest import assert_same_summaries, snapshot
+from utils import database, summaries, writer
+from utils.instrumentation import clear_query_log, get_query_records
+from utils.triggers import check_triggers_exist, create_summary_triggers, drop_all_triggers, initialize_triggers
+
+
+@pytest.fixture
+def summary_db(maintenance_mode):
+    """A scratch database whose payments can be updated."""
+    # The versioning trigger on payments references a column that does not
+    # exist, so UPDATEs fail regardless of summary maintenance; drop it here.
+    with database.write_connection() as conn:
+        conn.execute("DROP TRIGGER IF EXISTS version_payments")
+
+
+def insert_payment(conn, client_id, year, quarter, fee, assets=500000, expected=300):
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO payments (client_id, contract_id, received_date,
+                              applied_start_quarter, applied_start_year,
+                              applied_end_quarter, applied_end_year,
+                              total_assets, expected_fee, actual_fee)
+        SELECT client_id, contract_id, ?, ?, ?, ?, ?, ?, ?, ?
+        FROM contracts WHERE client_id = ? AND active = 'TRUE'
+    """, (f"{year}-{quarter * 3:02d}-28", quarter, year, quarter, year, assets, expected, fee, client_id))
+    payment_id = cursor.lastrowid
+    summaries.maintain_summaries(cursor, after=summaries.get_payment_contribution(cursor, payment_id))
+    return payment_id
+
+
+def move_payment(conn, payment_id, quarter, fee):
+    cursor = conn.cursor()
+    before = summaries.get_payment_contribution(cursor, payment_id)
+    cursor.execute(
+        "UPDATE payments SET applied_start_quarter = ?, applied_end_quarter = ?, actual_fee = ? WHERE payment_id = ?",
+        (quarter, quarter, fee, payment_id)
+    )
+    summaries.maintain_summaries(cursor, before=before, after=summaries.get_payment_contribution(cursor, payment_id))
+
+
+def delete_payment(conn, payment_id):
+    cursor = conn.cursor()
+    before = summaries.get_payment_contribution(cursor, payment_id)
+    cursor.execute("DELETE FROM payments WHERE payment_id = ?", (payment_id,))
+    summaries.maintain_summaries(cursor, before=before)
+
+
+def apply_writes():
+    first = writer.run_write(insert_payment, 1, 2035, 1, 100.0)
+    second = writer.run_write(insert_payment, 1, 2035, 2, 200.0)
+    writer.run_write(insert_payment, 1, 2035, 2, 120.0, None, 900)
+    writer.run_write(insert_payment, 1, 2036, 1, 300.0)
+    writer.run_write(insert_payment, 2, 2035, 1, 50.0)
+    writer.run_write(move_payment, second, 3, 250.0)
+    # Changes to an earlier year must also refresh the growth of the year after
+    writer.run_write(delete_payment, first)
+    # An existing (real) quarter: only its delta is applied
+    with database.read_connection() as conn:
+        payment_id, = conn.execute(
+            "SELECT payment_id FROM payments WHERE client_id = 1 AND actual_fee IS NOT NULL ORDER BY payment_id LIMIT 1"
+        ).fetchone()
+    writer.run_write(move_payment, payment_id, 4, 75.0)
+    writer.run_write(delete_payment, payment_id)
+
+
+def run_mode(mode):
+    summaries.populate_all_summaries()
+    summaries.set_maintenance_mode(mode)
+    apply_writes()
+    summaries.flush_deferred_summaries()
+    return snapshot()
+
+
+def test_only_trigger_mode_installs_triggers(summary_db):
+    summaries.set_maintenance_mode('trigger')
+    assert len(check_triggers_exist()) == 3
+    summaries.set_maintenance_mode('application')
+    assert check_triggers_exist() == []
+    with database.read_connection() as conn:
+        versioning = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'version_%'"
+        ).fetchone()[0]
+    assert versioning == 2  # Non-summary triggers are left alone
+
+
+def test_trigger_helpers_switch_the_maintenance_mode(summary_db):
+    summaries.populate_all_summaries()
+    summaries.set_maintenance_mode('application')
+
+    assert initialize_triggers()
+    assert summaries.get_maintenance_mode() == 'trigger'
+    assert len(check_triggers_exist()) == 3
+    # Only the triggers maintain the summaries now, so nothing is counted twice
+    writer.run_write(insert_payment, 1, 2035, 1, 100.0)
+
+    assert drop_all_triggers()
+    assert summaries.get_maintenance_mode() == 'application'
+    assert check_triggers_exist() == []
+    writer.run_write(insert_payment, 1, 2035, 1, 50.0)
+
+    assert create_summary_triggers()
+    assert summaries.get_maintenance_mode() == 'trigger'
+    maintained = snapshot()
+    summaries.set_maintenance_mode('application')
+    summaries.populate_all_summaries()
+    assert_same_summaries(snapshot(), maintained)
+
+
+@pytest.mark.parametrize('mode', summaries.MAINTENANCE_MODES)
+def test_each_mode_matches_a_full_rebuild(summary_db, mode):
+    maintained = run_mode(mode)
+    assert any(row[1] == 2036 for row in maintained['yearly_summaries'])
+
+    summaries.set_maintenance_mode('application')
+    summaries.populate_all_summaries()
+    assert_same_summaries(snapshot(), maintained)
+
+
+def test_application_mode_applies_deltas_without_reaggregating(summary_db):
+    summaries.populate_all_summaries()
+    summaries.set_maintenance_mode('application')
+    writer.run_write(insert_payment, 1, 2035, 1, 100.0)
+
+    clear_query_log()
+    writer.run_write(insert_payment, 1, 2035, 1, 60.0, 300000)
+    statements = [r['sql'] for r in get_query_records()]
+    assert not any('AVG(total_assets)' in sql for sql in statements)
+
+    with database.read_connection() as conn:
+        quarter = conn.execute("""
+            SELECT total_payments, total_assets, payment_count, fee_count
+            FROM quarterly_summaries WHERE client_id = 1 AND year = 2035 AND quarter = 1
+        """).fetchone()
+    assert quarter == pytest.approx((160.0, 400000.0, 2, 2))
+
+
+def test_deferred_mode_marks_periods_until_flushed(summary_db):
+    summaries.set_maintenance_mode('deferred')
+
+    def write_and_inspect(conn):
+        # Runs on the writer, so the idle flush cannot happen in between
+        insert_payment(conn, 1, 2040, 1, 10.0)
+        dirty = conn.execute("SELECT COUNT(*) FROM summary_dirty_periods").fetchone()[0]
+        summarized = conn.execute("SELECT COUNT(*) FROM quarterly_summaries WHERE year = 2040").fetchone()[0]
+        return dirty, summarized
+
+    assert writer.run_write(write_and_inspect) == (1, 0)
+    summaries.flush_deferred_summaries()
+    with database.read_connection() as conn:
+        summarized = conn.execute("SELECT COUNT(*) FROM quarterly_summaries WHERE year = 2040").fetchone()[0]
+        dirty = conn.execute("SELECT COUNT(*) FROM summary_dirty_periods").fetchone()[0]
+    assert (summarized, dirty) == (1, 0)
+
+
+def insert_payments_bulk(conn, payments):
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT INTO payments (client_id, contract_id, received_date,
+                              applied_start_quarter, applied_start_year,
+                              applied_end_quarter, applied_end_year,
+                              total_assets, expected_fee, actual_fee)
+        SELECT client_id, contract_id, ?, ?, ?, ?, ?, 500000, 300, ?
+        FROM contracts WHERE client_id = ? AND active = 'TRUE'
+    """, [(f"{year}-{quarter * 3:02d}-28", quarter, year, quarter, year, fee, client_id)
+          for client_id, year, quarter, fee in payments])
+    summaries.maintain_summaries_for_periods(cursor, [payment[:3] for payment in payments])
+
+
+BULK_PAYMENTS = [
+    (client_id, year, quarter, 10.0 * n)
+    for n, (client_id, year, quarter) in enumerate(
+        [(1, 2035, 1), (1, 2035, 1), (1, 2035, 2), (1, 2036, 1), (2, 2035, 1), (2, 2035, 1)] * 5
+    )
+]
+
+
+@pytest.mark.parametrize('mode', summaries.MAINTENANCE_MODES)
+def test_bulk_insert_matches_a_full_rebuild(summary_db, mode):
+    summaries.populate_all_summaries()
+    summaries.set_maintenance_mode(mode)
+    writer.run_write(insert_payments_bulk, BULK_PAYMENTS)
+    summaries.flush_deferred_summaries()
+    maintained = snapshot()
+
+    summaries.set_maintenance_mode('application')
+    summaries.populate_all_summaries()
+    assert_same_summaries(snapshot(), maintained)
+
+
+def test_bulk_insert_recomputes_each_period_once(summary_db):
+    summaries.populate_all_summaries()
+    summaries.set_maintenance_mode('application')
+
+    clear_query_log()
+    commits = writer.get_writer_stats()['commits']
+    writer.run_write(insert_payments_bulk, BULK_PAYMENTS)
+    assert writer.get_writer_stats()['commits'] == commits + 1
+    statements = [r['sql'] for r in get_query_records()]
+    periods = set(payment[:3] for payment in BULK_PAYMENTS)
+    assert sum('AVG(total_assets)' in sql and 'FROM payments' in sql for sql in statements) == len(periods)
+
+
+@pytest.mark.parametrize('mode', summaries.MAINTENANCE_MODES)
+def test_deleting_a_client_removes_its_summaries(summary_db, mode):
+    utils = pytest.importorskip('utils.utils')
+    summaries.populate_all_summaries()
+    summaries.set_maintenance_mode(mode)
+    with database.read_connection() as conn:
+        client_id, = conn.execute(
+            "SELECT client_id FROM quarterly_summaries GROUP BY client_id ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()
+
+    assert utils.delete_client(client_id)
+    summaries.flush_deferred_summaries()
+    with database.read_connection() as conn:
+        for table in ('quarterly_summaries', 'yearly_summaries', 'client_metrics'):
+            assert conn.execute(f"SELECT COUNT(*) FROM {table} WHERE client_id = ?", (client_id,)).fetchone() == (0,)
+
+    maintained = snapshot()
+    summaries.set_maintenance_mode('application')
+    summaries.populate_all_summaries()
+    assert_same_summaries(snapshot(), maintained)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        summaries.set_maintenance_mode('sometimes')
+
+
+def test_initialization_runs_once_per_fingerprint(summary_db):
+    with database.write_connection() as conn:
+        conn.execute("DELETE FROM quarterly_summaries")
+    assert summaries.initialize_summaries()
+    with database.read_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM quarterly_summaries").fetchone()[0] > 0
+        assert conn.execute("SELECT value FROM app_metadata WHERE key = 'summary_fingerprint'").fetchone()
+
+    # Same process: nothing is queried at all
+    clear_query_log()
+    assert summaries.initialize_summaries()
+    assert get_query_records() == []
+
+    # New process, unchanged schema: a fingerprint check and no writes
+    summaries._initialized.clear()
+    summaries._maintenance_mode = None
+    commits = writer.get_writer_stats()['commits']
+    assert summaries.initialize_summaries()
+    assert writer.get_writer_stats()['commits'] == commits
+    assert summaries.get_maintenance_mode() == 'application'
+
+    # A schema change invalidates the stored fingerprint
+    with database.write_connection() as conn:
+        conn.execute("CREATE INDEX idx_test_payments_method ON payments(method)")
+    summaries._initialized.clear()
+    assert summaries.initialize_summaries()
+    assert writer.get_writer_stats()['commits'] > commits
+
+
+@pytest.mark.parametrize('mode', summaries.MAINTENANCE_MODES)
+def test_verification_never_changes_the_database(summary_db, mode):
+    def state():
+        with database.read_connection() as conn:
+            return (
+                conn.execute("SELECT * FROM payments ORDER BY payment_id").fetchall(),
+                conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall(),
+                conn.execute("SELECT * FROM sqlite_sequence ORDER BY name").fetchall(),
+                snapshot(),
+            )
+
+    summaries.set_maintenance_mode('application')
+    before = state()
+    results = summaries.verify_summary_maintenance(mode)
+    assert results == {'quarterly': True, 'yearly': True, 'client_metrics': True, 'delete': True}
+    assert state() == before
@@ -0,0 +1,32 @@
+import pytest
+
+from conftest import assert_same_summaries, snapshot
+from utils import database, summaries
+
+
+def test_set_based_rebuild_matches_per_period_rebuild(scratch_writer):
+    assert summaries.populate_all_summaries('rows')
+    by_period = snapshot()
+
+    assert summaries.populate_all_summaries('set')
+    set_based = snapshot()
+
+    assert by_period['quarterly_summaries']
+    assert_same_summaries(by_period, set_based)
+
+
+def test_rebuild_replaces_stale_rows(scratch_writer):
+    assert summaries.populate_all_summaries()
+    expected = snapshot()
+
+    with database.write_connection() as conn:
+        conn.execute("UPDATE quarterly_summaries SET total_payments = -1")
+        conn.execute("DELETE FROM client_metrics")
+
+    assert summaries.populate_all_summaries()
+    assert_same_summaries(expected, snapshot())
+
+
+def test_unknown_rebuild_mode_is_rejected():
+    with pytest.raises(ValueError):
+        summaries.populate_all_summaries('fast')
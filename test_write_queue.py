@@ -0,0 +1,133 @@
+import threading
+
+import pytest
+
+from utils import database, writer
+from utils.summaries import update_summaries_in_transaction
+
+
+@pytest.fixture
+def queue(scratch_writer):
+    """The fresh writer of the scratch database."""
+    return writer.get_writer()
+
+def _insert_contact(conn, name):
+    cursor = conn.execute(
+        "INSERT INTO contacts (client_id, contact_type, contact_name) VALUES (1, 'Primary', ?)",
+        (name,)
+    )
+    return cursor.lastrowid
+
+
+def _count_contacts(name_prefix):
+    with database.read_connection() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM contacts WHERE contact_name LIKE ?", (name_prefix + '%',)
+        ).fetchone()[0]
+
+
+def test_concurrent_submissions_all_commit(queue):
+    results = []
+
+    def submitter(n):
+        for i in range(20):
+            results.append(writer.run_write(_insert_contact, f"queued-{n}-{i}"))
+
+    threads = [threading.Thread(target=submitter, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(results)) == 80
+    assert _count_contacts('queued-') == 80
+    stats = writer.get_writer_stats()
+    assert stats['completed'] == 80
+    assert stats['failed'] == 0
+    assert stats['queue_depth'] == 0
+    assert stats['batches'] <= 80
+
+
+def test_failing_job_does_not_undo_its_batch(queue):
+    def fail(conn):
+        _insert_contact(conn, 'queued-failed')
+        raise ValueError("bad input")
+
+    gate = threading.Event()
+    blocker = writer.submit_write(lambda conn: gate.wait(5))
+    ok_before = writer.submit_write(_insert_contact, 'queued-before')
+    bad = writer.submit_write(fail)
+    ok_after = writer.submit_write(_insert_contact, 'queued-after')
+    gate.set()
+
+    assert blocker.result(5)
+    assert ok_before.result(5) and ok_after.result(5)
+    with pytest.raises(ValueError):
+        bad.result(5)
+    assert _count_contacts('queued-') == 2
+    assert writer.get_writer_stats()['max_batch_size'] >= 3
+
+
+def test_payment_and_summaries_commit_together(queue):
+    def add_payment(conn):
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO payments (client_id, contract_id, received_date,
+                                  applied_start_quarter, applied_start_year,
+                                  applied_end_quarter, applied_end_year, actual_fee)
+            SELECT client_id, contract_id, '2031-01-15', 4, 2030, 4, 2030, 1234.5
+            FROM contracts WHERE client_id = 1 AND active = 'TRUE'
+        """)
+        update_summaries_in_transaction(cursor, 1, 2030, 4)
+
+    writer.run_write(add_payment)
+
+    with database.read_connection() as conn:
+        total = conn.execute("""
+            SELECT total_payments FROM quarterly_summaries
+            WHERE client_id = 1 AND year = 2030 AND quarter = 4
+        """).fetchone()
+    assert total == (1234.5,)
+
+
+
+def test_write_version_changes_only_on_commit(queue):
+    version = writer.get_write_version()
+    with pytest.raises(ZeroDivisionError):
+        writer.run_write(lambda conn: 1 / 0)
+    assert writer.get_write_version() == version
+
+    writer.run_write(_insert_contact, 'versioned')
+    assert writer.get_write_version() > version
+
+
+def test_timed_out_write_is_cancelled_and_never_commits(queue, monkeypatch):
+    monkeypatch.setattr(writer, 'DEFAULT_WRITE_TIMEOUT', 0.1)
+    started, gate = threading.Event(), threading.Event()
+
+    def block(conn):
+        started.set()
+        return gate.wait(5)
+
+    blocker = writer.submit_write(block)
+    assert started.wait(5)
+    with pytest.raises(TimeoutError):
+        writer.run_write(_insert_contact, 'queued-timed-out')
+    gate.set()
+    assert blocker.result(5)
+    writer.run_write(_insert_contact, 'queued-after-timeout')
+
+    assert _count_contacts('queued-timed-out') == 0
+    assert _count_contacts('queued-after-timeout') == 1
+    assert writer.get_writer_stats()['cancelled'] == 1
+
+
+def test_started_write_is_waited_for_past_the_timeout(queue, monkeypatch):
+    monkeypatch.setattr(writer, 'DEFAULT_WRITE_TIMEOUT', 0.1)
+
+    def slow_insert(conn):
+        threading.Event().wait(0.3)
+        return _insert_contact(conn, 'queued-slow')
+
+    assert writer.run_write(slow_insert)
+    assert _count_contacts('queued-slow') == 1
@@ -0,0 +1,225 @@
+"""
+Read Cache Module
+=================
+
+Process-wide LRU cache for read functions, invalidated by committed writes.
+
+A cached function declares tags for each call, such as ('client', 7) or
+('year', 2024). An entry remembers the version of each of its tags when it
+was filled and is only served while those versions are unchanged. The
+change events of utils/events.py bump the tags of the client and years they
+name, so a payment for one client in one year leaves every other client and
+year cached. Write jobs that publish no event declare their tags directly
+with utils.writer.invalidates(); a committed job that declared nothing bumps
+the global version and invalidates everything.
+
+Entries are keyed by the database path as well as the arguments, so
+pointing the pool at another file never serves the old file's data. Tag
+versions are read before the function runs, so a write that commits
+while a read is in flight leaves that entry stale rather than wrong.
+
+Writes that bypass the background writer (legacy summary helpers, trigger
+installation) are not seen; call invalidate() after them.
+
+Cached values are shared between sessions and must be treated as read-only.
+
+On top of the shared cache, request_memo() functions remember their results
+for the rest of one rerun: inside request_scope() (opened by app.py around
+each rerun) a repeated call is a dictionary lookup on the session's thread,
+with no locking or tag checks. A commit during the rerun empties the memo.
+Outside a scope, such as a fragment rerun, the memo is bypassed.
+
+Configuration (environment variables):
+- READ_CACHE: set to 0 to turn caching off
+- READ_CACHE_MAX_ENTRIES: entries kept before the least recently used is
+  evicted (default 256)
+
+Tags used by the app:
+- 'clients': the client list and anything listing clients with their contracts
+- 'payments': cross-client payment lookups (years with data, payment methods)
+- ('client', client_id): one client's data
+- ('year', year): one year's summaries
+
+Key Components:
+- cached(): decorator caching a read function under the tags it declares
+- invalidate(): bump tags, or everything, by hand
+- request_scope() / request_memo(): per-rerun memo for hot read functions
+- get_cache_stats(): hits, misses and evictions per function
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+from .database import get_pool
+from .events import ChangeEvent, ClientChanged, ContractChanged, subscribe
+from .instrumentation import record_cache_lookup
+from .writer import add_commit_listener, get_write_version
+
+ENABLED = os.environ.get('READ_CACHE', '1') != '0'
+MAX_ENTRIES = int(os.environ.get('READ_CACHE_MAX_ENTRIES', 256))
+
+_lock = threading.Lock()
+_entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+_tag_versions: Dict[Hashable, int] = {}
+_global_version = 0
+_stats: Dict[str, Dict[str, int]] = {}
+_evictions = 0
+
+# Streamlit runs each session's rerun on its own thread
+_request = threading.local()
+
+
+def invalidate(tags: Optional[Iterable[Hashable]] = None) -> None:
+    """Invalidate cached entries carrying any of the tags, or every entry when tags is None."""
+    global _global_version
+    with _lock:
+        if tags is None:
+            _global_version += 1
+            _entries.clear()
+            return
+        for tag in tags:
+            _tag_versions[tag] = _tag_versions.get(tag, 0) + 1
+
+
+def clear_cache() -> None:
+    """Drop every entry and reset the statistics."""
+    global _evictions
+    invalidate()
+    with _lock:
+        _stats.clear()
+        _evictions = 0
+
+
+def _versions(tags: tuple) -> tuple:
+    return (_global_version,) + tuple(_tag_versions.get(tag, 0) for tag in tags)
+
+
+def _count(name: str, hit: bool) -> None:
+    counts = _stats.setdefault(name, {'hits': 0, 'misses': 0})
+    counts['hits' if hit else 'misses'] += 1
+
+
+def cached(tags: Callable[..., Iterable[Hashable]]) -> Callable:
+    """Cache a read function by its arguments under the tags tags(*args, **kwargs) returns.
+
+    Example:
+        @cached(lambda client_id: [('client', client_id)])
+        def get_client_details(client_id): ...
+    """
+    def decorator(fn: Callable) -> Callable:
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs) -> Any:
+            global _evictions
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            key = (get_pool('read').database_path, name, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return fn(*args, **kwargs)  # Unhashable arguments are never cached
+
+            entry_tags = tuple(tags(*args, **kwargs))
+            with _lock:
+                versions = _versions(entry_tags)
+                entry = _entries.get(key)
+                hit = entry is not None and entry[0] == versions
+                if hit:
+                    _entries.move_to_end(key)
+                _count(name, hit)
+            record_cache_lookup(hit)
+            if hit:
+                return entry[1]
+
+            value = fn(*args, **kwargs)
+            with _lock:
+                _entries[key] = (versions, value)
+                _entries.move_to_end(key)
+                while len(_entries) > MAX_ENTRIES:
+                    _entries.popitem(last=False)
+                    _evictions += 1
+            return value
+
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def request_scope():
+    """Memoize request_memo() functions for the duration of the block (one rerun)."""
+    outer = getattr(_request, 'memo', None)
+    _request.memo = {}
+    try:
+        yield
+    finally:
+        _request.memo = outer
+
+
+def request_memo(fn: Callable) -> Callable:
+    """Remember fn's result per argument tuple for the rest of the current request_scope()."""
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs) -> Any:
+        memo = getattr(_request, 'memo', None)
+        if memo is None:
+            return fn(*args, **kwargs)
+        key = (name, args, tuple(sorted(kwargs.items())))
+        version = get_write_version()
+        entry = memo.get(key)
+        if entry is not None and entry[0] == version:
+            record_cache_lookup(True)
+            return entry[1]
+        value = fn(*args, **kwargs)
+        memo[key] = (version, value)
+        return value
+
+    return wrapper
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Return overall and per-function hit rates, entry count and evictions."""
+    with _lock:
+        functions = {name: dict(counts) for name, counts in _stats.items()}
+        entries = len(_entries)
+        evictions = _evictions
+    for counts in functions.values():
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = counts['hits'] / lookups if lookups else 0.0
+    hits = sum(counts['hits'] for counts in functions.values())
+    misses = sum(counts['misses'] for counts in functions.values())
+    return {
+        'entries': entries,
+        'max_entries': MAX_ENTRIES,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'evictions': evictions,
+        'functions': functions,
+    }
+
+
+def _event_tags(event: ChangeEvent) -> List[Hashable]:
+    """Return the tags a change event invalidates."""
+    tags: List[Hashable] = []
+    if event.client_id is not None:
+        tags.append(('client', event.client_id))
+    if event.periods:
+        # A year's summary also carries the following year's YoY growth
+        tags.append('payments')
+        for year in event.years:
+            tags += [('year', year), ('year', year + 1)]
+    if isinstance(event, (ContractChanged, ClientChanged)):
+        # Year summaries list every client's name and contract details
+        tags.append('clients')
+    return tags
+
+
+# Committed writes invalidate the tags their jobs declared or their events name
+add_commit_listener(invalidate)
+subscribe(lambda event: invalidate(_event_tags(event)))
@@ -4,18 +4,20 @@
 Performance optimization module for client data.
 This module provides consolidated database queries to replace multiple separate calls.
 The original functions in utils.py remain unchanged for safety and backward compatibility.
+Within one rerun the consolidated query runs at most once per client; the
+*_optimized wrappers read the memoized result (see request_memo in utils/cache.py).
 """
 
 import streamlit as st
-from .database import get_database_connection
+from .database import get_read_connection
+from .cache import cached, request_memo
 from typing import Dict, Any
 
+@request_memo
+@cached(lambda client_id: [('client', client_id)])
 def get_consolidated_client_data(client_id: int) -> Dict[str, Any]:
     """Get consolidated client data using summary tables."""
-    from .utils import ensure_summaries_initialized
-    ensure_summaries_initialized()  # Ensure summaries are ready
-    
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         
@@ -1,24 +1,476 @@
+"""
+Database Module
+==============
+
+Connection management for the 401K Payment Tracker's SQLite database.
+
+Every data function opens a connection, runs a handful of small queries and
+closes it again. Opening a SQLite connection means a file open plus schema
+parsing, which dominates those queries, so connections are pooled: each
+thread keeps one warm connection that is checked out and returned instead of
+being torn down.
+
+Every new connection is tuned with a connection profile (WAL journaling,
+busy timeout, mmap/cache sizing) so readers on one page never block a
+bookkeeper saving payments on another.
+
+Reads and writes use separate pools. The read pool opens the file with
+mode=ro and query_only, so page loads can never take a write lock. The
+write pool is the single path for mutations; its connections take the
+write lock up front (BEGIN IMMEDIATE) and record how long they waited for
+it, which makes lock contention visible in get_connection_stats().
+
+Key Components:
+- ConnectionPool: per-thread warm connections with checkout/return accounting
+- PooledConnection: sqlite3 connection whose close() returns it to the pool
+- Connection profile: PRAGMAs applied centrally at connect time
+- SQL instrumentation: every statement is timed (see utils/instrumentation.py)
+- get_read_connection() / read_connection(): read-only path for page data
+- get_write_connection() / write_connection(): writer path for mutations
+- get_database_connection(): writer-pool checkout for summary and trigger maintenance
+- ensure_indexes(): create indexes the application's queries rely on
+"""
+
 import sqlite3
 import os
+import time
 import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+from urllib.request import pathname2url
+
+from .instrumentation import InstrumentedCursor
 
 logger = logging.getLogger(__name__)
 
-def get_database_connection():
-    """Create and return a database connection to the local database."""
-    try:
-        # Use a simple relative path from the project root
-        database_path = 'DATABASE/401kDATABASE.db'
-        
-        if not os.path.exists(database_path):
+# Use a simple relative path from the project root
+DATABASE_PATH = 'DATABASE/401kDATABASE.db'
+
+# PRAGMAs applied to every new connection. Each value can be overridden with a
+# DB_<NAME> environment variable (e.g. DB_BUSY_TIMEOUT=10000) or at runtime
+# with configure_connection_profile().
+DEFAULT_CONNECTION_PROFILE = {
+    'journal_mode': 'WAL',      # Readers and the writer no longer block each other
+    'synchronous': 'NORMAL',    # Durable at checkpoints; safe with WAL
+    'busy_timeout': 5000,       # ms to wait on a lock before "database is locked"
+    'mmap_size': 268435456,     # 256 MB of memory-mapped reads
+    'cache_size': -16000,       # Negative means KiB, so 16 MB page cache
+    'temp_store': 'MEMORY',     # Sorts and temp tables stay off disk
+}
+
+# Allowed values for the text PRAGMAs; the rest must be integers
+_PROFILE_CHOICES = {
+    'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA'},
+    'temp_store': {'DEFAULT', 'FILE', 'MEMORY'},
+}
+
+# Indexes added on top of the original schema, created at startup by
+# ensure_indexes() (via utils.summaries.initialize_summaries)
+APP_INDEXES = {
+    # Whole-quarter lookups across all clients (collections dashboard)
+    'idx_payments_period': "payments(applied_start_year, applied_start_quarter, client_id)",
+    # Keyset pagination of a client's payment history (get_paginated_payment_history)
+    'idx_payments_client_received': "payments(client_id, received_date, payment_id)",
+}
+
+
+def _validate_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize profile values and reject anything that is not a known PRAGMA."""
+    validated = {}
+    for name, value in profile.items():
+        if name not in DEFAULT_CONNECTION_PROFILE:
+            raise ValueError(f"Unknown connection profile setting: {name}")
+        if name in _PROFILE_CHOICES:
+            value = str(value).upper()
+            if value not in _PROFILE_CHOICES[name]:
+                raise ValueError(
+                    f"Invalid {name} '{value}'. Expected one of: "
+                    f"{', '.join(sorted(_PROFILE_CHOICES[name]))}"
+                )
+        else:
+            value = int(value)
+        validated[name] = value
+    return validated
+
+
+def _profile_from_environment() -> Dict[str, Any]:
+    """Build the connection profile from defaults plus DB_* overrides."""
+    profile = dict(DEFAULT_CONNECTION_PROFILE)
+    for name in DEFAULT_CONNECTION_PROFILE:
+        env_value = os.environ.get(f"DB_{name.upper()}")
+        if env_value:
+            profile[name] = env_value
+    return _validate_profile(profile)
+
+
+def apply_connection_profile(conn: sqlite3.Connection, profile: Dict[str, Any]) -> None:
+    """Apply a connection profile's PRAGMAs to an open connection."""
+    for name, value in profile.items():
+        result = conn.execute(f"PRAGMA {name} = {value}").fetchone()
+        if name == 'journal_mode' and result and str(result[0]).upper() != value:
+            logger.warning(f"Requested journal_mode {value} but database is using {result[0]}")
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection that hands itself back to its pool on close().
+
+    Cursors are InstrumentedCursors, including the ones conn.execute()
+    creates, so every statement is timed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = None
+        self._checked_out_at = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.release(self)
+        else:
+            super().close()
+
+    def _close_physical(self) -> None:
+        """Really close the underlying sqlite3 connection."""
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """Keeps one warm connection per thread and tracks how it is used.
+
+    A checkout hands out the calling thread's warm connection. If that
+    connection is already checked out (a data function calling another data
+    function), a temporary overflow connection is opened instead so nested
+    callers keep their own transactions, exactly as before pooling. Returning
+    a connection rolls back anything left uncommitted, matching what close()
+    used to do.
+
+    A read_only pool opens its connections with mode=ro and query_only=ON.
+    """
+
+    def __init__(self, database_path: str = DATABASE_PATH, profile: Optional[Dict[str, Any]] = None,
+                 read_only: bool = False):
+        self.database_path = database_path
+        self.profile = _validate_profile(profile) if profile is not None else _profile_from_environment()
+        self.read_only = read_only
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = weakref.WeakSet()
+        self._stats = {
+            'checkouts': 0,
+            'reuses': 0,
+            'connects': 0,
+            'overflow': 0,
+            'held_time_total': 0.0,
+            'held_time_max': 0.0,
+            'write_locks': 0,
+            'lock_wait_total': 0.0,
+            'lock_wait_max': 0.0,
+            'lock_timeouts': 0,
+        }
+
+    def _connect(self) -> PooledConnection:
+        if not os.path.exists(self.database_path):
             raise FileNotFoundError(
                 "Database file not found. Please ensure:\n"
                 "1. The DATABASE folder exists in the project root\n"
-                f"2. The database file exists at: {database_path}"
+                f"2. The database file exists at: {self.database_path}"
             )
+        timeout = self.profile.get('busy_timeout', 5000) / 1000
+        if self.read_only:
+            uri = f"file:{pathname2url(os.path.abspath(self.database_path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=timeout, factory=PooledConnection)
+        else:
+            conn = sqlite3.connect(self.database_path, timeout=timeout, factory=PooledConnection)
+        try:
+            if self.read_only:
+                # The journal mode is a property of the file; the writer sets it
+                profile = {k: v for k, v in self.profile.items() if k != 'journal_mode'}
+                apply_connection_profile(conn, profile)
+                conn.execute("PRAGMA query_only = ON")
+            else:
+                apply_connection_profile(conn, self.profile)
+        except sqlite3.Error:
+            conn._close_physical()
+            raise
+        conn._pool = self
+        with self._lock:
+            self._stats['connects'] += 1
+            self._connections.add(conn)
+        return conn
+
+    def checkout(self) -> PooledConnection:
+        """Check out the calling thread's warm connection."""
+        conn = getattr(self._local, 'conn', None)
+        in_use = getattr(self._local, 'in_use', False)
+
+        if conn is not None and not in_use:
+            self._local.in_use = True
+            with self._lock:
+                self._stats['reuses'] += 1
+        elif conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.in_use = True
+        else:
+            # Nested checkout on this thread: give the caller its own connection
+            conn = self._connect()
+            with self._lock:
+                self._stats['overflow'] += 1
+
+        conn._checked_out_at = time.perf_counter()
+        with self._lock:
+            self._stats['checkouts'] += 1
+        return conn
+
+    def release(self, conn: PooledConnection) -> None:
+        """Return a connection to the pool (or close it if it was overflow)."""
+        if conn._checked_out_at is None:
+            return  # Already returned; close() called twice
+
+        held = time.perf_counter() - conn._checked_out_at
+        conn._checked_out_at = None
+        with self._lock:
+            self._stats['held_time_total'] += held
+            self._stats['held_time_max'] = max(self._stats['held_time_max'], held)
+
+        if conn is getattr(self._local, 'conn', None):
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error as e:
+                logger.warning(f"Discarding pooled connection after failed rollback: {str(e)}")
+                self._discard(conn)
+                self._local.conn = None
+            self._local.in_use = False
+        else:
+            self._discard(conn)
+
+    def begin_write(self, conn: PooledConnection) -> None:
+        """Take the database write lock on conn, recording how long it took.
+
+        Raises sqlite3.OperationalError if the lock is not granted within the
+        busy timeout; that is counted as a lock timeout.
+        """
+        if self.read_only:
+            raise sqlite3.OperationalError("Cannot write through a read-only connection")
+        if conn.in_transaction:
+            return
+        start = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            with self._lock:
+                self._stats['lock_timeouts'] += 1
+            raise
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._stats['write_locks'] += 1
+            self._stats['lock_wait_total'] += waited
+            self._stats['lock_wait_max'] = max(self._stats['lock_wait_max'], waited)
+
+    def _discard(self, conn: PooledConnection) -> None:
+        with self._lock:
+            self._connections.discard(conn)
+        conn._close_physical()
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a checked-out connection."""
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return checkout counts, connection hold times and write-lock waits."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open_connections'] = len(self._connections)
+        stats['avg_held_time'] = (
+            stats['held_time_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        )
+        stats['avg_lock_wait'] = (
+            stats['lock_wait_total'] / stats['write_locks'] if stats['write_locks'] else 0.0
+        )
+        return stats
 
-        return sqlite3.connect(database_path)
-        
+    def close_all(self) -> None:
+        """Close every connection this pool has opened."""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn._close_physical()
+            except sqlite3.ProgrammingError:
+                # Connections owned by other threads can only be closed there;
+                # they are released when that thread's local storage goes away.
+                pass
+        self._local = threading.local()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pool_lock = threading.Lock()
+_profile: Optional[Dict[str, Any]] = None
+
+
+def _create_pools(profile: Optional[Dict[str, Any]]) -> None:
+    writer = ConnectionPool(DATABASE_PATH, profile)
+    _pools['write'] = writer
+    _pools['read'] = ConnectionPool(DATABASE_PATH, writer.profile, read_only=True)
+
+
+def get_pool(mode: str = 'write') -> ConnectionPool:
+    """Return the process-wide 'read' or 'write' pool, creating them on first use."""
+    if mode not in ('read', 'write'):
+        raise ValueError(f"Unknown connection mode: {mode}")
+    if not _pools:
+        with _pool_lock:
+            if not _pools:
+                _create_pools(_profile)
+    return _pools[mode]
+
+
+def reset_pool(database_path: Optional[str] = None, profile: Optional[Dict[str, Any]] = None) -> ConnectionPool:
+    """Close all pooled connections and start new read and write pools.
+
+    Args:
+        database_path: Optional path to point the new pools at
+        profile: Optional connection profile; defaults to the current one
+
+    Returns:
+        ConnectionPool: The new write pool
+    """
+    global DATABASE_PATH, _profile
+    with _pool_lock:
+        if profile is None and _pools:
+            profile = _pools['write'].profile
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+        if database_path is not None:
+            DATABASE_PATH = database_path
+        _create_pools(profile)
+        _profile = _pools['write'].profile
+    return _pools['write']
+
+
+def configure_connection_profile(**overrides) -> Dict[str, Any]:
+    """Override connection profile settings for all new connections.
+
+    Existing pooled connections are closed so every connection picks up
+    the new settings.
+
+    Returns:
+        dict: The profile now in effect
+    """
+    profile = dict(get_pool().profile)
+    profile.update(_validate_profile(overrides))
+    return reset_pool(profile=profile).profile
+
+
+def get_connection_profile() -> Dict[str, Any]:
+    """Return the connection profile applied to new connections."""
+    return dict(get_pool().profile)
+
+
+def ensure_indexes(cursor: sqlite3.Cursor) -> None:
+    """Create any missing APP_INDEXES using the caller's transaction."""
+    for name, definition in APP_INDEXES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+
+def get_database_connection():
+    """Check out a pooled connection from the write pool.
+
+    Callers keep the existing pattern of calling conn.close() when done;
+    that returns the connection to the pool instead of closing it. Page
+    reads should use get_read_connection() and mutations
+    get_write_connection() instead.
+    """
+    try:
+        return get_pool('write').checkout()
     except Exception as e:
         logger.error(f"Error connecting to database: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+
+@contextmanager
+def database_connection():
+    """Context manager that checks out a pooled connection and returns it."""
+    conn = get_database_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def get_read_connection():
+    """Check out a read-only connection; conn.close() returns it to the pool."""
+    try:
+        return get_pool('read').checkout()
+    except Exception as e:
+        logger.error(f"Error connecting to database: {str(e)}")
+        raise
+
+
+@contextmanager
+def read_connection():
+    """Context manager yielding a read-only pooled connection."""
+    conn = get_read_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def get_write_connection():
+    """Check out a writer connection that already holds the write lock.
+
+    The caller commits as usual; closing without a commit rolls back.
+    """
+    pool = get_pool('write')
+    conn = get_database_connection()
+    try:
+        pool.begin_write(conn)
+    except sqlite3.Error as e:
+        logger.error(f"Error acquiring database write lock: {str(e)}")
+        conn.close()
+        raise
+    return conn
+
+
+@contextmanager
+def write_connection():
+    """Context manager for a unit of write work.
+
+    Commits when the block finishes cleanly and rolls back if it raises.
+    """
+    conn = get_write_connection()
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_connection_stats() -> Dict[str, Dict[str, Any]]:
+    """Return checkout, hold-time and lock-wait statistics for both pools."""
+    return {mode: get_pool(mode).stats() for mode in ('read', 'write')}
@@ -0,0 +1,133 @@
+"""
+Events Module
+=============
+
+Typed change events published by the write paths in utils.py.
+
+Each mutation of a payment, contract, contact or client publishes one event
+naming the entity, the action, the client and the (year, quarter) periods it
+affected. Events published inside a background write job are delivered only
+after that job commits and are dropped if it rolls back, so subscribers never
+see changes that did not happen. Subscribers run on the writer thread and
+must be quick; exceptions they raise are logged and ignored.
+
+Subscribers:
+- utils/cache.py invalidates the cached reads for the event's client and years
+- Sessions can poll get_events_since() with the last sequence number they saw
+  to find out what changed since their previous rerun
+
+Key Components:
+- PaymentChanged, ContractChanged, ContactChanged, ClientChanged: event types
+- publish(): send an event (after commit when inside a write job)
+- subscribe(): receive events of a type and its subclasses
+- get_events_since(): recent events, for polling
+"""
+
+import itertools
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Callable, List, Optional, Tuple, Type
+
+from .writer import after_commit, invalidates
+
+logger = logging.getLogger(__name__)
+
+# Recent events kept for get_events_since()
+MAX_RECENT_EVENTS = 1000
+
+ADDED = 'added'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """Something changed for a client.
+
+    Attributes:
+        action: ADDED, UPDATED or DELETED
+        entity_id: ID of the changed row (payment_id, contract_id, ...)
+        client_id: Client the change belongs to
+        periods: (year, quarter) periods whose figures changed; empty when
+            the change is not tied to a period (contract terms, contacts)
+    """
+    action: str
+    entity_id: Optional[int]
+    client_id: Optional[int]
+    periods: Tuple[Tuple[int, int], ...] = ()
+    seq: int = field(default=0, compare=False)
+
+    entity = 'client'
+
+    @property
+    def years(self) -> List[int]:
+        """Distinct years among the affected periods."""
+        return sorted(set(year for year, _ in self.periods))
+
+
+@dataclass(frozen=True)
+class PaymentChanged(ChangeEvent):
+    entity = 'payment'
+
+
+@dataclass(frozen=True)
+class ContractChanged(ChangeEvent):
+    entity = 'contract'
+
+
+@dataclass(frozen=True)
+class ContactChanged(ChangeEvent):
+    entity = 'contact'
+
+
+@dataclass(frozen=True)
+class ClientChanged(ChangeEvent):
+    entity = 'client'
+
+
+_subscribers: List[Tuple[Type[ChangeEvent], Callable[[ChangeEvent], None]]] = []
+_recent = deque(maxlen=MAX_RECENT_EVENTS)
+_recent_lock = threading.Lock()
+_seq = itertools.count(1)
+
+
+def subscribe(callback: Callable[[ChangeEvent], None], event_type: Type[ChangeEvent] = ChangeEvent) -> None:
+    """Call callback(event) for every delivered event of event_type (or a subclass)."""
+    _subscribers.append((event_type, callback))
+
+
+def _deliver(event: ChangeEvent) -> None:
+    with _recent_lock:
+        event = replace(event, seq=next(_seq))
+        _recent.append(event)
+    for event_type, callback in list(_subscribers):
+        if isinstance(event, event_type):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Event subscriber failed for {event}: {str(e)}")
+
+
+def publish(event: ChangeEvent) -> None:
+    """Publish a change event.
+
+    Inside a write job the event is delivered once the job commits, and the
+    job counts as having declared its cache tags (subscribers invalidate
+    what the event names). Outside a write job it is delivered immediately,
+    so call it only after your own commit.
+    """
+    invalidates()
+    after_commit(lambda: _deliver(event))
+
+
+def get_events_since(seq: int = 0) -> List[ChangeEvent]:
+    """Return delivered events with a sequence number above seq, oldest first.
+
+    Only the last MAX_RECENT_EVENTS are kept; if the oldest returned event's
+    seq is more than seq + 1, some were missed and callers should refresh
+    everything.
+    """
+    with _recent_lock:
+        return [event for event in _recent if event.seq > seq]
@@ -0,0 +1,309 @@
+"""
+Instrumentation Module
+======================
+
+Per-statement SQL timing for every pooled connection.
+
+Each execute() on a pooled connection is timed, along with the rows it
+touched or returned and the application function that issued it. Statements
+slower than the slow-query threshold are logged. Query scopes collect totals
+for a block of code, such as one Streamlit rerun or one page section, and
+the buffered records can be exported as JSON lines for offline analysis.
+Scopes also count read-cache hits and misses (see utils/cache.py).
+
+Configuration (environment variables):
+- SQL_INSTRUMENTATION: set to 0 to turn recording off
+- SQL_SLOW_QUERY_MS: slow-query log threshold in milliseconds (default 100)
+- SQL_LOG_MAX_RECORDS: statements kept in memory for export (default 10000)
+- SQL_LOG_FILE: file that export_query_log() appends to by default
+
+Key Components:
+- InstrumentedCursor: cursor factory used by pooled connections
+- query_scope(): context manager/decorator collecting per-block totals
+- record_cache_lookup(): charge a read-cache hit or miss to the open scopes
+- get_query_stats(): totals and the most expensive callers
+- export_query_log(): write buffered records as JSON lines
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import ContextDecorator
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('sql.slow')
+
+ENABLED = os.environ.get('SQL_INSTRUMENTATION', '1') != '0'
+SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 100))
+MAX_RECORDS = int(os.environ.get('SQL_LOG_MAX_RECORDS', 10000))
+
+# Frames from these files are plumbing, not the code that issued the query
+_SKIP_FILES = {
+    os.path.normcase(os.path.abspath(__file__)),
+    os.path.normcase(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database.py')),
+    os.path.normcase(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'writer.py')),
+}
+
+_records = deque(maxlen=MAX_RECORDS)
+_records_lock = threading.Lock()
+_local = threading.local()
+
+
+def _find_caller() -> str:
+    """Return module.function:line of the first frame outside the DB plumbing."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.normcase(os.path.abspath(frame.f_code.co_filename))
+        if filename not in _SKIP_FILES and 'contextlib' not in filename:
+            module = frame.f_globals.get('__name__', '?')
+            return f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return '?'
+
+
+def _active_scopes() -> List['QueryScope']:
+    scopes = getattr(_local, 'scopes', None)
+    if scopes is None:
+        scopes = _local.scopes = []
+    return scopes
+
+
+def _charge_scopes(duration: float, rows: int, new_statement: bool) -> None:
+    for scope in _active_scopes():
+        scope.sql_time += duration
+        scope.rows += rows
+        if new_statement:
+            scope.queries += 1
+
+
+def record_cache_lookup(hit: bool) -> None:
+    """Count a read-cache lookup towards every open scope on this thread."""
+    for scope in _active_scopes():
+        if hit:
+            scope.cache_hits += 1
+        else:
+            scope.cache_misses += 1
+
+
+def _check_slow(record: Dict[str, Any]) -> None:
+    if not record['slow_logged'] and record['duration_ms'] >= SLOW_QUERY_MS:
+        record['slow_logged'] = True
+        slow_query_logger.warning(
+            f"Slow query ({record['duration_ms']:.1f} ms, {record['rows']} rows) "
+            f"from {record['caller']}: {record['sql']}"
+        )
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """sqlite3 cursor that records timing, row counts and caller per statement.
+
+    Time spent fetching results is added to the statement that produced them,
+    so SELECTs are charged for the rows they return, not just the first step.
+    """
+
+    _record: Optional[Dict[str, Any]] = None
+
+    def _run(self, method, sql, *args):
+        if not ENABLED:
+            return method(sql, *args)
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            duration = time.perf_counter() - start
+            rows = self.rowcount if self.rowcount > 0 else 0
+            scopes = _active_scopes()
+            record = {
+                'ts': datetime.now().isoformat(timespec='milliseconds'),
+                'sql': ' '.join(str(sql).split()),
+                'duration_ms': duration * 1000,
+                'rows': rows,
+                'caller': _find_caller(),
+                'scope': scopes[-1].name if scopes else None,
+                'thread': threading.current_thread().name,
+                'slow_logged': False,
+            }
+            self._record = record
+            with _records_lock:
+                _records.append(record)
+            _charge_scopes(duration, rows, new_statement=True)
+            _check_slow(record)
+
+    def _fetched(self, start: float, rows: int) -> None:
+        record = self._record
+        if record is None:
+            return
+        duration = time.perf_counter() - start
+        record['duration_ms'] += duration * 1000
+        record['rows'] += rows
+        _charge_scopes(duration, rows, new_statement=False)
+        _check_slow(record)
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._run(super().executescript, sql_script)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(size if size is not None else self.arraysize)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0)
+            raise
+        self._fetched(start, 1)
+        return row
+
+
+class QueryScope(ContextDecorator):
+    """Collects SQL totals for everything run on this thread inside the block.
+
+    Scopes nest: a statement counts towards every open scope, so a rerun
+    scope holds the totals of all its section scopes. After the block exits,
+    wall_time, queries, sql_time and rows hold the final figures.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._reset()
+
+    def _recreate_cm(self) -> 'QueryScope':
+        # Used as a decorator: give every call its own scope so concurrent
+        # sessions never share counters
+        return QueryScope(self.name)
+
+    def _reset(self) -> None:
+        self.queries = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.wall_time = 0.0
+        self._started = None
+
+    def __enter__(self) -> 'QueryScope':
+        self._reset()
+        self._started = time.perf_counter()
+        _active_scopes().append(self)
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.wall_time = time.perf_counter() - self._started
+        scopes = _active_scopes()
+        if self in scopes:
+            scopes.remove(self)
+        logger.debug(
+            f"{self.name}: {self.queries} queries, {self.sql_time * 1000:.1f} ms SQL, "
+            f"{self.cache_hits}/{self.cache_hits + self.cache_misses} cache hits, "
+            f"{self.wall_time * 1000:.1f} ms total"
+        )
+        return False
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the scope totals in milliseconds."""
+        return {
+            'name': self.name,
+            'queries': self.queries,
+            'sql_ms': self.sql_time * 1000,
+            'rows': self.rows,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'wall_ms': self.wall_time * 1000,
+        }
+
+
+def query_scope(name: str) -> QueryScope:
+    """Collect SQL totals for a block or function; see QueryScope."""
+    return QueryScope(name)
+
+
+def get_query_records() -> List[Dict[str, Any]]:
+    """Return a copy of the buffered statement records, oldest first."""
+    with _records_lock:
+        return [dict(r) for r in _records]
+
+
+def get_query_stats(top: int = 10) -> Dict[str, Any]:
+    """Return totals for the buffered statements and the most expensive callers.
+
+    Args:
+        top: Number of callers to include, ordered by total SQL time
+    """
+    by_caller: Dict[str, Dict[str, Any]] = {}
+    total_ms = 0.0
+    records = get_query_records()
+    for record in records:
+        total_ms += record['duration_ms']
+        entry = by_caller.setdefault(record['caller'], {
+            'caller': record['caller'], 'queries': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0
+        })
+        entry['queries'] += 1
+        entry['total_ms'] += record['duration_ms']
+        entry['max_ms'] = max(entry['max_ms'], record['duration_ms'])
+        entry['rows'] += record['rows']
+
+    return {
+        'queries': len(records),
+        'total_ms': total_ms,
+        'slow_queries': sum(1 for r in records if r['duration_ms'] >= SLOW_QUERY_MS),
+        'top_callers': sorted(by_caller.values(), key=lambda e: e['total_ms'], reverse=True)[:top],
+    }
+
+
+def export_query_log(path: Optional[str] = None, clear: bool = True) -> int:
+    """Append buffered statement records to a JSON lines file.
+
+    Args:
+        path: Output file; defaults to SQL_LOG_FILE
+        clear: Drop the exported records from the buffer
+
+    Returns:
+        int: Number of records written (0 when no path is configured)
+    """
+    path = path or os.environ.get('SQL_LOG_FILE')
+    if not path:
+        return 0
+    with _records_lock:
+        records = list(_records)
+        if clear:
+            _records.clear()
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            line = {k: v for k, v in record.items() if k != 'slow_logged'}
+            f.write(json.dumps(line) + '\n')
+    return len(records)
+
+
+def clear_query_log() -> None:
+    """Drop all buffered statement records."""
+    with _records_lock:
+        _records.clear()
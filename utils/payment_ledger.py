@@ -0,0 +1,176 @@
+"""
+Payment Ledger Module
+=====================
+
+Queries for a client's payment history, newest first.
+
+Every query is one of a small, fixed set of SQL strings. Year and quarter
+filters are passed as JSON arrays and expanded with json_each(), so the
+statement text does not change with the number of years or quarters
+selected and sqlite3's per-connection statement cache is hit on every call.
+Predicates only use indexed columns of payments; rows come from the
+payments table alone (plus the contract for provider and schedule), so a
+payment shows up whether or not its summaries are current.
+
+Paging is keyset-based on (received_date, payment_id) and served by
+idx_payments_client_received (see APP_INDEXES in database.py). Payments
+without a received date sort after all dated ones, as NULLs do in DESC
+order, and are paged as a second index range.
+
+Key Components:
+- LEDGER_COLUMNS: columns of every ledger row
+- get_payment_ledger(): the whole filtered history
+- get_payment_ledger_page(): one page plus an opaque next-page token
+- ledger_sql(): the statement used for a filter/paging combination
+"""
+
+import base64
+import json
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+from .database import get_read_connection
+
+LEDGER_COLUMNS = (
+    'provider_name', 'applied_start_quarter', 'applied_start_year',
+    'applied_end_quarter', 'applied_end_year', 'payment_schedule',
+    'received_date', 'total_assets', 'expected_fee', 'actual_fee',
+    'notes', 'payment_id', 'method',
+)
+
+# Positions of the sort key in a ledger row
+_RECEIVED_DATE = LEDGER_COLUMNS.index('received_date')
+_PAYMENT_ID = LEDGER_COLUMNS.index('payment_id')
+
+# Ledger regions: the whole history, or one side of the NULL received_date
+# split used by paging, optionally starting after a page token
+REGIONS = ('all', 'dated', 'dated_after', 'undated', 'undated_after')
+
+_REGION_SQL = {
+    'all': " ORDER BY p.received_date DESC, p.payment_id DESC",
+    'dated': " AND p.received_date IS NOT NULL"
+             " ORDER BY p.received_date DESC, p.payment_id DESC LIMIT ?",
+    'dated_after': " AND p.received_date IS NOT NULL AND (p.received_date, p.payment_id) < (?, ?)"
+                   " ORDER BY p.received_date DESC, p.payment_id DESC LIMIT ?",
+    'undated': " AND p.received_date IS NULL ORDER BY p.payment_id DESC LIMIT ?",
+    'undated_after': " AND p.received_date IS NULL AND p.payment_id < ?"
+                     " ORDER BY p.payment_id DESC LIMIT ?",
+}
+
+
+@lru_cache(maxsize=None)
+def ledger_sql(filter_years: bool, filter_quarters: bool, region: str = 'all') -> str:
+    """Return the ledger statement for a filter/region combination.
+
+    Parameters, in order: client_id, years JSON (if filter_years), quarters
+    JSON (if filter_quarters), then the region's own parameters.
+    """
+    sql = """
+        SELECT 
+            c.provider_name,
+            p.applied_start_quarter,
+            p.applied_start_year,
+            p.applied_end_quarter,
+            p.applied_end_year,
+            c.payment_schedule,
+            p.received_date,
+            p.total_assets,
+            p.expected_fee,
+            p.actual_fee,
+            p.notes,
+            p.payment_id,
+            p.method
+        FROM payments p
+        JOIN contracts c ON p.contract_id = c.contract_id
+        WHERE p.client_id = ?
+    """
+    if filter_years:
+        sql += " AND p.applied_start_year IN (SELECT value FROM json_each(?))"
+    if filter_quarters:
+        sql += " AND p.applied_start_quarter IN (SELECT value FROM json_each(?))"
+    return sql + _REGION_SQL[region]
+
+
+def _filter_params(client_id: int, years: Optional[Sequence[int]],
+                   quarters: Optional[Sequence[int]]) -> Tuple[bool, bool, List]:
+    params = [client_id]
+    if years:
+        params.append(json.dumps([int(year) for year in years]))
+    if quarters:
+        params.append(json.dumps([int(quarter) for quarter in quarters]))
+    return bool(years), bool(quarters), params
+
+
+def get_payment_ledger(client_id: int, years: Optional[Sequence[int]] = None,
+                       quarters: Optional[Sequence[int]] = None) -> List[tuple]:
+    """Return a client's payments, newest first, optionally filtered by applied start year/quarter."""
+    filter_years, filter_quarters, params = _filter_params(client_id, years, quarters)
+    conn = get_read_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(ledger_sql(filter_years, filter_quarters), params)
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def encode_page_token(received_date: Optional[str], payment_id: int) -> str:
+    """Encode a row's sort key as an opaque page token."""
+    return base64.urlsafe_b64encode(json.dumps([received_date, payment_id]).encode()).decode()
+
+
+def decode_page_token(page_token: str) -> Tuple[Optional[str], int]:
+    """Return the (received_date, payment_id) sort key of a page token."""
+    try:
+        received_date, payment_id = json.loads(base64.urlsafe_b64decode(page_token.encode()))
+        return received_date, int(payment_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid page token: {page_token!r}") from e
+
+
+def get_payment_ledger_page(client_id: int, page_token: Optional[str] = None, limit: int = 25,
+                            years: Optional[Sequence[int]] = None,
+                            quarters: Optional[Sequence[int]] = None) -> Tuple[List[tuple], Optional[str]]:
+    """
+    Return one page of a client's payments, newest first.
+
+    Args:
+        client_id: Client whose payments to list
+        page_token: Token returned with the previous page; None for the first page
+        limit: Maximum rows per page
+        years: Optional applied start years
+        quarters: Optional applied start quarters
+
+    Returns:
+        tuple: (rows, next_page_token); next_page_token is None on the last page
+    """
+    filter_years, filter_quarters, params = _filter_params(client_id, years, quarters)
+    after = decode_page_token(page_token) if page_token else None
+
+    conn = get_read_connection()
+    try:
+        cursor = conn.cursor()
+        rows = []
+        # Fetch one row beyond the page to know whether another page follows
+        if after is None:
+            cursor.execute(ledger_sql(filter_years, filter_quarters, 'dated'), params + [limit + 1])
+            rows = cursor.fetchall()
+        elif after[0] is not None:
+            cursor.execute(ledger_sql(filter_years, filter_quarters, 'dated_after'),
+                           params + list(after) + [limit + 1])
+            rows = cursor.fetchall()
+        if len(rows) <= limit:
+            if after is None or after[0] is not None:
+                cursor.execute(ledger_sql(filter_years, filter_quarters, 'undated'),
+                               params + [limit + 1 - len(rows)])
+            else:
+                cursor.execute(ledger_sql(filter_years, filter_quarters, 'undated_after'),
+                               params + [after[1], limit + 1 - len(rows)])
+            rows += cursor.fetchall()
+    finally:
+        conn.close()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_page_token(rows[-1][_RECEIVED_DATE], rows[-1][_PAYMENT_ID])
@@ -0,0 +1,128 @@
+"""
+Performance HUD Module
+======================
+
+Opt-in developer overlay showing where each Streamlit rerun spends its time.
+
+Enable it with the ?perf=1 query parameter or the PERF_HUD=1 environment
+variable. Page sections decorated with perf_section() report their wall time,
+SQL query count, SQL time and read-cache hits (from utils/instrumentation.py); render_hud()
+draws them in a fixed overlay at the end of the rerun. When the HUD is off,
+perf_section() costs a single flag check.
+
+Usage in app.py:
+    start_rerun()
+    with query_scope('rerun') as rerun:
+        ...
+    render_hud(rerun)
+"""
+
+import os
+import threading
+from contextlib import ContextDecorator
+from typing import Dict, Any, List, Optional
+
+import streamlit as st
+
+from .instrumentation import QueryScope
+
+# Sections issuing more queries than this are highlighted (likely N+1 loops)
+QUERY_WARNING_THRESHOLD = int(os.environ.get('PERF_HUD_QUERY_WARNING', 25))
+
+# Streamlit runs each session's script on its own thread
+_local = threading.local()
+
+
+def is_hud_enabled() -> bool:
+    """Check the PERF_HUD environment variable and the ?perf=1 query parameter."""
+    if os.environ.get('PERF_HUD', '').lower() in ('1', 'true', 'yes'):
+        return True
+    try:
+        return st.query_params.get('perf') == '1'
+    except Exception:
+        return False
+
+
+def start_rerun() -> bool:
+    """Reset the section timings for a new rerun.
+
+    Returns:
+        bool: Whether the HUD is enabled for this rerun
+    """
+    _local.enabled = is_hud_enabled()
+    _local.sections = []
+    _local.depth = 0
+    return _local.enabled
+
+
+class perf_section(ContextDecorator):
+    """Time a page section for the HUD; usable as a decorator or with-block."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._scope: Optional[QueryScope] = None
+
+    def _recreate_cm(self) -> 'perf_section':
+        return perf_section(self.name)
+
+    def __enter__(self) -> 'perf_section':
+        if getattr(_local, 'enabled', False):
+            # Record the section now so the HUD lists sections in start order
+            self._section = {'name': self.name, 'depth': _local.depth,
+                             'queries': 0, 'sql_ms': 0.0, 'rows': 0,
+                             'cache_hits': 0, 'cache_misses': 0, 'wall_ms': 0.0}
+            _local.sections.append(self._section)
+            _local.depth += 1
+            self._scope = QueryScope(self.name)
+            self._scope.__enter__()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        if self._scope is not None:
+            self._scope.__exit__(*exc)
+            _local.depth -= 1
+            self._section.update(self._scope.as_dict())
+            self._scope = None
+        return False
+
+
+def get_sections() -> List[Dict[str, Any]]:
+    """Return the sections timed so far in this rerun, in start order."""
+    return list(getattr(_local, 'sections', []))
+
+
+def _format_row(name: str, section: Dict[str, Any], depth: int = 0) -> str:
+    warn = section['queries'] > QUERY_WARNING_THRESHOLD
+    style = ' style="color:#ff6b6b;"' if warn else ''
+    indent = '&nbsp;&nbsp;' * depth
+    lookups = section['cache_hits'] + section['cache_misses']
+    cache = f"{section['cache_hits']}/{lookups}" if lookups else '-'
+    return (
+        f"<tr{style}><td>{indent}{name}</td>"
+        f"<td>{section['wall_ms']:.0f}</td>"
+        f"<td>{section['queries']}</td>"
+        f"<td>{section['sql_ms']:.1f}</td>"
+        f"<td>{cache}</td></tr>"
+    )
+
+
+def render_hud(rerun: QueryScope) -> None:
+    """Draw the overlay for this rerun if the HUD is enabled."""
+    if not getattr(_local, 'enabled', False):
+        return
+
+    rows = [_format_row('rerun', rerun.as_dict())]
+    for section in get_sections():
+        rows.append(_format_row(section['name'], section, section['depth'] + 1))
+
+    st.markdown(f"""
+        <div style="position: fixed; bottom: 1rem; left: 1rem; z-index: 10000;
+                    background: rgba(20, 20, 30, 0.88); color: #eee;
+                    font: 12px monospace; padding: 0.5rem 0.75rem;
+                    border-radius: 6px; pointer-events: none;">
+            <table style="border-collapse: collapse; color: inherit;">
+                <tr><th align="left">section</th><th>ms</th><th>queries</th><th>SQL ms</th><th>cache</th></tr>
+                {''.join(rows)}
+            </table>
+        </div>
+    """, unsafe_allow_html=True)
@@ -11,12 +11,667 @@ Key Components:
 - Client metrics updates
 - Bulk data population
 - Cache invalidation
+- Maintenance mode: exactly one of application code, SQLite triggers or
+  deferred background recomputation keeps the summaries current
+- Delta maintenance: in application mode a payment change adjusts the
+  running totals of its quarter and year by that payment's own contribution
+- Bulk maintenance: maintain_summaries_for_periods() recomputes each period
+  touched by a batch of inserts once instead of once per payment
+- One-time initialization: initialize_summaries() runs at startup and only
+  does real work when the schema fingerprint stored in app_metadata changes
+- Verification: verify_summary_maintenance() probes a maintenance mode inside
+  a SAVEPOINT that is always rolled back (see healthcheck.py)
 """
 
+import hashlib
+import os
 import sqlite3
+import threading
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from .database import get_database_connection
+from .database import get_database_connection, get_read_connection, get_pool, ensure_indexes
+from .writer import run_write, add_idle_hook, invalidates
+
+# How summary tables are kept current after a payment changes:
+#   'application' - the writing code updates them in the same transaction
+#   'trigger'     - SQLite triggers on payments update them
+#   'deferred'    - writes only mark the period dirty; the background writer
+#                   recomputes dirty periods as soon as its queue is idle
+MAINTENANCE_MODES = ('application', 'trigger', 'deferred')
+DEFAULT_MAINTENANCE_MODE = 'application'
+
+_maintenance_mode: Optional[str] = None  # Mode last applied to the database
+_dirty_pending = False
+
+# Running totals kept alongside the summary figures so a payment change can be
+# applied as a delta instead of re-aggregating the period
+_RUNNING_COLUMNS = {
+    'quarterly_summaries': (('fee_count', 'INTEGER'), ('assets_sum', 'REAL'), ('assets_count', 'INTEGER')),
+    'yearly_summaries': (('quarter_count', 'INTEGER'), ('assets_sum', 'REAL'), ('assets_count', 'INTEGER')),
+}
+
+_schema_ready = set()  # Database paths whose summary schema has been checked
+
+# Bump when the summary tables or their maintenance change in a way that
+# existing databases must be re-initialized for
+SUMMARY_SCHEMA_VERSION = 3
+_FINGERPRINT_KEY = 'summary_fingerprint'
+
+_initialized = set()  # Database paths initialized by this process
+_init_lock = threading.Lock()
+
+# Payment fields that feed the summaries, in the order maintain_summaries() expects
+PAYMENT_CONTRIBUTION_COLUMNS = (
+    "client_id, applied_start_year, applied_start_quarter, actual_fee, total_assets, expected_fee"
+)
+
+def _configured_maintenance_mode() -> str:
+    mode = os.environ.get('SUMMARY_MAINTENANCE_MODE', DEFAULT_MAINTENANCE_MODE).lower()
+    if mode not in MAINTENANCE_MODES:
+        raise ValueError(f"Unknown summary maintenance mode '{mode}'. Expected one of: {', '.join(MAINTENANCE_MODES)}")
+    return mode
+
+def get_maintenance_mode() -> str:
+    """Return the active maintenance mode (SUMMARY_MAINTENANCE_MODE until one is set)."""
+    return _maintenance_mode or _configured_maintenance_mode()
+
+def set_maintenance_mode(mode: Optional[str] = None) -> str:
+    """
+    Make exactly one summary maintenance mechanism active.
+    
+    Installs the summary triggers for 'trigger' mode and removes them otherwise.
+    Pending deferred work is flushed when switching away from 'deferred'.
+    
+    Args:
+        mode: One of MAINTENANCE_MODES; defaults to SUMMARY_MAINTENANCE_MODE
+    
+    Returns:
+        str: The mode now active
+    """
+    global _maintenance_mode, _dirty_pending
+    from .triggers import install_summary_triggers, remove_summary_triggers
+    
+    mode = (mode or _configured_maintenance_mode()).lower()
+    if mode not in MAINTENANCE_MODES:
+        raise ValueError(f"Unknown summary maintenance mode '{mode}'. Expected one of: {', '.join(MAINTENANCE_MODES)}")
+    
+    def apply(conn):
+        cursor = conn.cursor()
+        _ensure_summary_schema(cursor)
+        if mode == 'trigger':
+            install_summary_triggers(cursor)
+        else:
+            remove_summary_triggers(cursor)
+        if mode != 'deferred':
+            _flush_dirty_periods(cursor)
+    
+    run_write(apply)
+    _maintenance_mode = mode
+    # Pick up periods left dirty by an earlier run
+    _dirty_pending = mode == 'deferred'
+    return mode
+
+def ensure_maintenance_mode() -> str:
+    """Apply the configured maintenance mode once per process."""
+    if _maintenance_mode is None:
+        return set_maintenance_mode()
+    return _maintenance_mode
+
+def get_payment_contribution(cursor: sqlite3.Cursor, payment_id: int) -> Optional[Tuple]:
+    """Return a payment's PAYMENT_CONTRIBUTION_COLUMNS, or None if it does not exist."""
+    cursor.execute(f"SELECT {PAYMENT_CONTRIBUTION_COLUMNS} FROM payments WHERE payment_id = ?", (payment_id,))
+    return cursor.fetchone()
+
+def maintain_summaries(cursor: sqlite3.Cursor, before: Optional[Tuple] = None,
+                       after: Optional[Tuple] = None) -> None:
+    """
+    Keep summaries current after a payment change, according to the maintenance mode.
+    Runs inside the caller's write transaction, after the payment row was written.
+    
+    Args:
+        cursor: Cursor on the writer's transaction
+        before: The payment's contribution before the change (None for an insert)
+        after: The payment's contribution after the change (None for a delete)
+    """
+    _maintain_for_mode(cursor, get_maintenance_mode(), before, after)
+
+def _maintain_for_mode(cursor: sqlite3.Cursor, mode: str, before: Optional[Tuple], after: Optional[Tuple]) -> None:
+    global _dirty_pending
+    if mode == 'application':
+        apply_payment_delta(cursor, before, after)
+    elif mode == 'deferred':
+        for payment in (before, after):
+            if payment:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO summary_dirty_periods (client_id, year, quarter)
+                    VALUES (?, ?, ?)
+                """, payment[:3])
+                _dirty_pending = True
+    # 'trigger': SQLite already updated the summaries
+
+def apply_payment_delta(cursor: sqlite3.Cursor, before: Optional[Tuple], after: Optional[Tuple]) -> None:
+    """
+    Adjust quarterly and yearly summaries by one payment's change in contribution.
+    
+    Only the affected quarter and year rows are read and written, so the cost
+    does not grow with the client's history. Growth is recomputed for the
+    affected year and the year after it. A period without running totals yet
+    is aggregated once instead.
+    """
+    _require_summary_schema(cursor)
+    changes: Dict[Tuple, List[Tuple[int, Tuple]]] = {}
+    if before:
+        changes.setdefault(tuple(before[:3]), []).append((-1, before))
+    if after:
+        changes.setdefault(tuple(after[:3]), []).append((1, after))
+    
+    years = set()
+    for period, payments in changes.items():
+        old_quarter = _get_quarter_state(cursor, *period)
+        new_quarter = _apply_quarterly_delta(cursor, period, old_quarter, payments)
+        _apply_yearly_delta(cursor, period[0], period[1], old_quarter, new_quarter)
+        years.add(period[:2])
+    
+    for client_id, year in years:
+        _refresh_yoy_growth(cursor, client_id, year)
+    for client_id in set(client_id for client_id, _ in years):
+        if not _update_client_metrics(cursor, client_id):
+            raise Exception("Failed to update client metrics")
+
+def _get_quarter_state(cursor: sqlite3.Cursor, client_id: int, year: int, quarter: int) -> Optional[Dict[str, Any]]:
+    cursor.execute("""
+        SELECT total_payments, total_assets, payment_count, expected_total,
+               fee_count, assets_sum, assets_count
+        FROM quarterly_summaries
+        WHERE client_id = ? AND year = ? AND quarter = ?
+    """, (client_id, year, quarter))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    keys = ('total_payments', 'total_assets', 'payment_count', 'expected_total',
+            'fee_count', 'assets_sum', 'assets_count')
+    return dict(zip(keys, row))
+
+def _apply_quarterly_delta(cursor: sqlite3.Cursor, period: Tuple, state: Optional[Dict[str, Any]],
+                           payments: List[Tuple[int, Tuple]]) -> Optional[Dict[str, Any]]:
+    """Apply signed payment contributions to a quarter and return its new state."""
+    client_id, year, quarter = period
+    if state is None or state['fee_count'] is None:
+        # Nothing to adjust yet: aggregate this one quarter
+        if not _update_quarterly_summary(cursor, client_id, year, quarter):
+            raise Exception("Failed to update quarterly summary")
+        return _get_quarter_state(cursor, client_id, year, quarter)
+    
+    state = dict(state)
+    recompute_expected = False
+    for sign, (_, _, _, fee, assets, expected_fee) in payments:
+        state['payment_count'] += sign
+        if fee is not None:
+            state['total_payments'] = (state['total_payments'] or 0) + sign * fee
+            state['fee_count'] += sign
+        if assets is not None:
+            state['assets_sum'] = (state['assets_sum'] or 0) + sign * assets
+            state['assets_count'] += sign
+        if expected_fee is not None:
+            if sign > 0:
+                current = state['expected_total']
+                state['expected_total'] = expected_fee if current is None else max(current, expected_fee)
+            elif state['expected_total'] is not None and expected_fee >= state['expected_total']:
+                recompute_expected = True
+    
+    if not state['assets_count']:
+        state['assets_sum'] = None
+    if state['fee_count'] <= 0:
+        cursor.execute("""
+            DELETE FROM quarterly_summaries
+            WHERE client_id = ? AND year = ? AND quarter = ?
+        """, period)
+        return None
+    
+    if recompute_expected:
+        # The maximum may have been removed; look it up within this quarter only
+        cursor.execute("""
+            SELECT MAX(expected_fee) FROM payments
+            WHERE client_id = ? AND applied_start_year = ? AND applied_start_quarter = ?
+        """, period)
+        state['expected_total'] = cursor.fetchone()[0]
+    
+    state['total_assets'] = state['assets_sum'] / state['assets_count'] if state['assets_count'] else None
+    cursor.execute("""
+        UPDATE quarterly_summaries
+        SET total_payments = ?,
+            total_assets = ?,
+            payment_count = ?,
+            avg_payment = ?,
+            expected_total = ?,
+            fee_count = ?,
+            assets_sum = ?,
+            assets_count = ?,
+            last_updated = datetime('now')
+        WHERE client_id = ? AND year = ? AND quarter = ?
+    """, (
+        state['total_payments'],
+        state['total_assets'],
+        state['payment_count'],
+        state['total_payments'] / state['payment_count'],
+        state['expected_total'],
+        state['fee_count'],
+        state['assets_sum'],
+        state['assets_count'],
+        client_id, year, quarter
+    ))
+    return state
+
+def _apply_yearly_delta(cursor: sqlite3.Cursor, client_id: int, year: int,
+                        old_quarter: Optional[Dict[str, Any]], new_quarter: Optional[Dict[str, Any]]) -> None:
+    """Replace one quarter's old figures with its new ones in the yearly totals."""
+    cursor.execute("""
+        SELECT total_payments, payment_count, quarter_count, assets_sum, assets_count
+        FROM yearly_summaries
+        WHERE client_id = ? AND year = ?
+    """, (client_id, year))
+    row = cursor.fetchone()
+    if not row or row[2] is None:
+        # Nothing to adjust yet: aggregate this one year from its quarters
+        if not _update_yearly_summary(cursor, client_id, year):
+            raise Exception("Failed to update yearly summary")
+        return
+    
+    total, count, quarters, assets_sum, assets_count = row
+    for sign, quarter in ((-1, old_quarter), (1, new_quarter)):
+        if quarter is None:
+            continue
+        total += sign * quarter['total_payments']
+        count += sign * quarter['payment_count']
+        quarters += sign
+        if quarter['total_assets'] is not None:
+            assets_sum = (assets_sum or 0) + sign * quarter['total_assets']
+            assets_count += sign
+    
+    if not assets_count:
+        assets_sum = None
+    if quarters <= 0:
+        cursor.execute("DELETE FROM yearly_summaries WHERE client_id = ? AND year = ?", (client_id, year))
+        return
+    
+    cursor.execute("""
+        UPDATE yearly_summaries
+        SET total_payments = ?,
+            total_assets = ?,
+            payment_count = ?,
+            avg_payment = ?,
+            quarter_count = ?,
+            assets_sum = ?,
+            assets_count = ?,
+            last_updated = datetime('now')
+        WHERE client_id = ? AND year = ?
+    """, (
+        total,
+        assets_sum / assets_count if assets_count else None,
+        count,
+        total / count if count > 0 else 0,
+        quarters,
+        assets_sum,
+        assets_count,
+        client_id, year
+    ))
+
+def _refresh_yoy_growth(cursor: sqlite3.Cursor, client_id: int, year: int) -> None:
+    """Recompute growth for a year and the year after it, which compares against it."""
+    cursor.execute("""
+        UPDATE yearly_summaries
+        SET yoy_growth = (
+            SELECT CASE WHEN prev.total_payments > 0
+                        THEN CAST(yearly_summaries.total_payments - prev.total_payments AS REAL)
+                             / prev.total_payments * 100 END
+            FROM yearly_summaries prev
+            WHERE prev.client_id = yearly_summaries.client_id
+            AND prev.year = yearly_summaries.year - 1
+        )
+        WHERE client_id = ? AND year IN (?, ?)
+    """, (client_id, year, year + 1))
+
+def flush_deferred_summaries() -> bool:
+    """Recompute all dirty periods now instead of waiting for the writer to go idle."""
+    try:
+        run_write(_flush_dirty_job)
+        return True
+    except Exception as e:
+        print(f"Error flushing deferred summaries: {str(e)}")
+        return False
+
+def _ensure_dirty_table(cursor: sqlite3.Cursor) -> None:
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS summary_dirty_periods (
+            client_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            quarter INTEGER NOT NULL,
+            PRIMARY KEY (client_id, year, quarter)
+        ) WITHOUT ROWID
+    """)
+
+def _require_summary_schema(cursor: sqlite3.Cursor) -> None:
+    """Run _ensure_summary_schema once per database file for this process."""
+    path = get_pool('write').database_path
+    if path not in _schema_ready:
+        _ensure_summary_schema(cursor)
+
+def _ensure_summary_schema(cursor: sqlite3.Cursor) -> None:
+    """Create the dirty-period table, application indexes and any missing running-total columns."""
+    _ensure_dirty_table(cursor)
+    ensure_indexes(cursor)
+    added = False
+    for table, columns in _RUNNING_COLUMNS.items():
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = set(row[1] for row in cursor.fetchall())
+        for name, column_type in columns:
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+                added = True
+    
+    if added:
+        # Backfill the new columns from the data the summaries were built from
+        cursor.execute("""
+            UPDATE quarterly_summaries
+            SET (fee_count, assets_sum, assets_count) = (
+                SELECT COUNT(actual_fee), SUM(total_assets), COUNT(total_assets)
+                FROM payments
+                WHERE client_id = quarterly_summaries.client_id
+                AND applied_start_year = quarterly_summaries.year
+                AND applied_start_quarter = quarterly_summaries.quarter
+            )
+        """)
+        cursor.execute("""
+            UPDATE yearly_summaries
+            SET (quarter_count, assets_sum, assets_count) = (
+                SELECT COUNT(*), SUM(total_assets), COUNT(total_assets)
+                FROM quarterly_summaries
+                WHERE client_id = yearly_summaries.client_id
+                AND year = yearly_summaries.year
+            )
+        """)
+    _schema_ready.add(get_pool('write').database_path)
+
+def maintain_summaries_for_periods(cursor: sqlite3.Cursor, periods: List[Tuple[int, int, int]]) -> None:
+    """
+    Keep summaries current after many payments were inserted, according to the maintenance mode.
+    Each (client_id, year, quarter) period is recomputed (or marked dirty) once,
+    however many of the payments fell into it. Runs inside the caller's write transaction.
+    """
+    global _dirty_pending
+    periods = sorted(set(tuple(period) for period in periods))
+    if not periods:
+        return
+    mode = get_maintenance_mode()
+    if mode == 'application':
+        _require_summary_schema(cursor)
+        _recompute_periods(cursor, periods)
+    elif mode == 'deferred':
+        cursor.executemany("""
+            INSERT OR IGNORE INTO summary_dirty_periods (client_id, year, quarter)
+            VALUES (?, ?, ?)
+        """, periods)
+        _dirty_pending = True
+    # 'trigger': SQLite already updated the summaries
+
+def _recompute_periods(cursor: sqlite3.Cursor, periods: List[Tuple[int, int, int]]) -> None:
+    """Re-aggregate the given periods, then their years, growth and clients, each once."""
+    for client_id, year, quarter in periods:
+        if not _update_quarterly_summary(cursor, client_id, year, quarter):
+            raise Exception("Failed to update quarterly summary")
+    for client_id, year in sorted(set((client_id, year) for client_id, year, _ in periods)):
+        if not _update_yearly_summary(cursor, client_id, year):
+            raise Exception("Failed to update yearly summary")
+        _refresh_yoy_growth(cursor, client_id, year)
+    for client_id in sorted(set(client_id for client_id, _, _ in periods)):
+        if not _update_client_metrics(cursor, client_id):
+            raise Exception("Failed to update client metrics")
+        invalidates(('client', client_id))
+    for year in set(year for _, year, _ in periods):
+        invalidates(('year', year), ('year', year + 1))
+    invalidates('payments')
+
+def _flush_dirty_periods(cursor: sqlite3.Cursor) -> int:
+    """Recompute summaries for every dirty period and clear the list."""
+    cursor.execute("SELECT client_id, year, quarter FROM summary_dirty_periods ORDER BY client_id, year, quarter")
+    periods = cursor.fetchall()
+    if not periods:
+        return 0
+    
+    _recompute_periods(cursor, periods)
+    cursor.execute("DELETE FROM summary_dirty_periods")
+    return len(periods)
+
+def _flush_dirty_job(conn: sqlite3.Connection) -> int:
+    global _dirty_pending
+    _dirty_pending = False
+    cursor = conn.cursor()
+    _ensure_summary_schema(cursor)
+    return _flush_dirty_periods(cursor)
+
+def _ensure_metadata_table(cursor: sqlite3.Cursor) -> None:
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS app_metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TEXT
+        )
+    """)
+
+def _schema_fingerprint(cursor: sqlite3.Cursor, mode: str) -> str:
+    """Hash the database schema (tables, indexes, triggers) together with the maintenance mode."""
+    cursor.execute("""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE name != 'app_metadata' AND name NOT LIKE 'sqlite_%'
+        ORDER BY type, name
+    """)
+    digest = hashlib.sha256(f"{SUMMARY_SCHEMA_VERSION}|{mode}".encode())
+    for row in cursor.fetchall():
+        digest.update('|'.join(str(part) for part in row).encode())
+    return digest.hexdigest()
+
+def _stored_fingerprint(cursor: sqlite3.Cursor) -> Optional[str]:
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'app_metadata'")
+    if not cursor.fetchone():
+        return None
+    cursor.execute("SELECT value FROM app_metadata WHERE key = ?", (_FINGERPRINT_KEY,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def get_fingerprint_status() -> str:
+    """Return 'current', 'stale' or 'missing' for the stored schema fingerprint."""
+    conn = get_read_connection()
+    try:
+        cursor = conn.cursor()
+        stored = _stored_fingerprint(cursor)
+        if stored is None:
+            return 'missing'
+        return 'current' if stored == _schema_fingerprint(cursor, get_maintenance_mode()) else 'stale'
+    finally:
+        conn.close()
+
+def initialize_summaries(force: bool = False) -> bool:
+    """
+    Prepare the summary tables once per process.
+    
+    Compares a fingerprint of the schema and maintenance mode with the one
+    stored in app_metadata. Only when they differ (a new database, a schema
+    change or a different mode) is the maintenance mode applied, empty
+    summaries populated and the new fingerprint stored. Later calls in the
+    same process return immediately, so this belongs at startup rather
+    than in page code.
+    
+    Args:
+        force: Re-run the checks even if this process already initialized
+    
+    Returns:
+        bool: True if the summaries are ready
+    """
+    global _maintenance_mode, _dirty_pending
+    path = get_pool('write').database_path
+    if path in _initialized and not force:
+        return True
+    
+    with _init_lock:
+        if path in _initialized and not force:
+            return True
+        try:
+            mode = _configured_maintenance_mode()
+            conn = get_read_connection()
+            try:
+                cursor = conn.cursor()
+                up_to_date = _stored_fingerprint(cursor) == _schema_fingerprint(cursor, mode)
+            finally:
+                conn.close()
+            
+            if up_to_date and not force:
+                # The database already runs this mode with this schema
+                _maintenance_mode = mode
+                _dirty_pending = mode == 'deferred'
+                _schema_ready.add(path)
+            else:
+                set_maintenance_mode(mode)
+                
+                conn = get_read_connection()
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute("""
+                        SELECT (SELECT COUNT(*) FROM quarterly_summaries) > 0
+                           AND (SELECT COUNT(*) FROM yearly_summaries) > 0
+                           AND (SELECT COUNT(*) FROM client_metrics) > 0
+                    """)
+                    populated = cursor.fetchone()[0]
+                finally:
+                    conn.close()
+                if not populated and not populate_all_summaries():
+                    return False
+                
+                def store_fingerprint(conn):
+                    cursor = conn.cursor()
+                    _ensure_metadata_table(cursor)
+                    cursor.execute("""
+                        INSERT INTO app_metadata (key, value, updated_at)
+                        VALUES (?, ?, datetime('now'))
+                        ON CONFLICT(key) DO UPDATE SET
+                            value = excluded.value,
+                            updated_at = excluded.updated_at
+                    """, (_FINGERPRINT_KEY, _schema_fingerprint(cursor, mode)))
+                
+                run_write(store_fingerprint)
+            
+            _initialized.add(path)
+            return True
+        
+        except Exception as e:
+            print(f"Error initializing summaries: {str(e)}")
+            return False
+
+# Far-future period used by verify_summary_maintenance(); never holds real payments
+_PROBE_YEAR = 9999
+_PROBE_FEE = 123.45
+
+def verify_summary_maintenance(mode: Optional[str] = None) -> Dict[str, bool]:
+    """
+    Check that a maintenance mode keeps every summary table current, without changing data.
+    
+    Inserts a probe payment, checks the quarterly, yearly and client metrics
+    rows it should produce, deletes it and checks the quarter is gone. All of
+    it, including installing or removing the summary triggers for the mode,
+    runs inside a SAVEPOINT that is always rolled back. Intended for offline
+    health checks (healthcheck.py), not for startup or page loads.
+    
+    Args:
+        mode: Mode to verify; defaults to the active maintenance mode
+    
+    Returns:
+        Dict[str, bool]: Result per check ('quarterly', 'yearly', 'client_metrics', 'delete')
+    """
+    from .triggers import install_summary_triggers, remove_summary_triggers
+    
+    mode = (mode or get_maintenance_mode()).lower()
+    if mode not in MAINTENANCE_MODES:
+        raise ValueError(f"Unknown summary maintenance mode '{mode}'. Expected one of: {', '.join(MAINTENANCE_MODES)}")
+    
+    def probe(conn):
+        global _dirty_pending
+        invalidates()  # Rolled back below, so no cached read changes
+        cursor = conn.cursor()
+        schema_ready = set(_schema_ready)
+        dirty_pending = _dirty_pending
+        cursor.execute("SAVEPOINT verify_summaries")
+        try:
+            _ensure_summary_schema(cursor)
+            if mode == 'trigger':
+                install_summary_triggers(cursor)
+            else:
+                remove_summary_triggers(cursor)
+            return _run_probe(cursor, mode)
+        finally:
+            cursor.execute("ROLLBACK TO verify_summaries")
+            cursor.execute("RELEASE verify_summaries")
+            # Nothing the probe did survives, so neither may its bookkeeping
+            _schema_ready.clear()
+            _schema_ready.update(schema_ready)
+            _dirty_pending = dirty_pending
+    
+    return run_write(probe)
+
+def _run_probe(cursor: sqlite3.Cursor, mode: str) -> Dict[str, bool]:
+    cursor.execute("""
+        SELECT client_id, contract_id FROM contracts
+        WHERE active = 'TRUE' ORDER BY client_id LIMIT 1
+    """)
+    contract = cursor.fetchone()
+    if not contract:
+        raise Exception("Verification needs at least one active contract")
+    client_id = contract[0]
+    
+    cursor.execute("""
+        INSERT INTO payments (
+            client_id, contract_id, received_date,
+            applied_start_quarter, applied_start_year,
+            applied_end_quarter, applied_end_year,
+            total_assets, actual_fee, method, notes
+        ) VALUES (?, ?, ?, 1, ?, 1, ?, 100000, ?, 'TEST', 'summary verification')
+    """, (client_id, contract[1], f"{_PROBE_YEAR}-12-31", _PROBE_YEAR, _PROBE_YEAR, _PROBE_FEE))
+    payment_id = cursor.lastrowid
+    payment = get_payment_contribution(cursor, payment_id)
+    _maintain_for_mode(cursor, mode, None, payment)
+    if mode == 'deferred':
+        _flush_dirty_periods(cursor)
+    
+    results = {}
+    cursor.execute("""
+        SELECT total_payments FROM quarterly_summaries
+        WHERE client_id = ? AND year = ? AND quarter = 1
+    """, (client_id, _PROBE_YEAR))
+    row = cursor.fetchone()
+    results['quarterly'] = bool(row) and abs(row[0] - _PROBE_FEE) < 0.005
+    
+    cursor.execute("""
+        SELECT total_payments FROM yearly_summaries
+        WHERE client_id = ? AND year = ?
+    """, (client_id, _PROBE_YEAR))
+    row = cursor.fetchone()
+    results['yearly'] = bool(row) and abs(row[0] - _PROBE_FEE) < 0.005
+    
+    cursor.execute("SELECT last_payment_date FROM client_metrics WHERE client_id = ?", (client_id,))
+    row = cursor.fetchone()
+    results['client_metrics'] = bool(row) and row[0] == f"{_PROBE_YEAR}-12-31"
+    
+    cursor.execute("DELETE FROM payments WHERE payment_id = ?", (payment_id,))
+    _maintain_for_mode(cursor, mode, payment, None)
+    if mode == 'deferred':
+        _flush_dirty_periods(cursor)
+    cursor.execute("""
+        SELECT COUNT(*) FROM quarterly_summaries
+        WHERE client_id = ? AND year = ?
+    """, (client_id, _PROBE_YEAR))
+    results['delete'] = cursor.fetchone()[0] == 0
+    return results
+
+# Deferred mode: recompute dirty periods whenever the writer has nothing else to do
+add_idle_hook(_flush_dirty_job, lambda: _dirty_pending)
 
 def update_all_summaries(client_id: int, year: int, quarter: int) -> bool:
     """
@@ -31,20 +686,7 @@ def update_all_summaries(client_id: int, year: int, quarter: int) -> bool:
         # Start transaction
         cursor.execute("BEGIN TRANSACTION")
         
-        # Update quarterly first as yearly depends on it
-        success = _update_quarterly_summary(cursor, client_id, year, quarter)
-        if not success:
-            raise Exception("Failed to update quarterly summary")
-            
-        # Update yearly next as it depends on quarterly
-        success = _update_yearly_summary(cursor, client_id, year)
-        if not success:
-            raise Exception("Failed to update yearly summary")
-            
-        # Finally update client metrics
-        success = _update_client_metrics(cursor, client_id)
-        if not success:
-            raise Exception("Failed to update client metrics")
+        update_summaries_in_transaction(cursor, client_id, year, quarter)
         
         # If we got here, all updates succeeded
         conn.commit()
@@ -58,6 +700,25 @@ def update_all_summaries(client_id: int, year: int, quarter: int) -> bool:
     finally:
         conn.close()
 
+def update_summaries_in_transaction(cursor: sqlite3.Cursor, client_id: int, year: int, quarter: int) -> None:
+    """
+    Update all summaries for a period using a cursor whose transaction the caller owns.
+    Used by writes running on the background writer so the payment change and its
+    summaries commit together. Raises if any update fails.
+    """
+    _require_summary_schema(cursor)
+    # Update quarterly first as yearly depends on it
+    if not _update_quarterly_summary(cursor, client_id, year, quarter):
+        raise Exception("Failed to update quarterly summary")
+        
+    # Update yearly next as it depends on quarterly
+    if not _update_yearly_summary(cursor, client_id, year):
+        raise Exception("Failed to update yearly summary")
+        
+    # Finally update client metrics
+    if not _update_client_metrics(cursor, client_id):
+        raise Exception("Failed to update client metrics")
+
 def _update_quarterly_summary(cursor: sqlite3.Cursor, client_id: int, year: int, quarter: int) -> bool:
     """Internal function to update quarterly summary using existing cursor."""
     try:
@@ -67,7 +728,10 @@ def _update_quarterly_summary(cursor: sqlite3.Cursor, client_id: int, year: int,
                 SUM(actual_fee) as total_payments,
                 AVG(total_assets) as avg_assets,
                 COUNT(*) as payment_count,
-                MAX(expected_fee) as expected_total
+                MAX(expected_fee) as expected_total,
+                COUNT(actual_fee) as fee_count,
+                SUM(total_assets) as assets_sum,
+                COUNT(total_assets) as assets_count
             FROM payments
             WHERE client_id = ?
             AND applied_start_year = ?
@@ -91,8 +755,9 @@ def _update_quarterly_summary(cursor: sqlite3.Cursor, client_id: int, year: int,
                 INSERT INTO quarterly_summaries (
                     client_id, year, quarter, total_payments,
                     total_assets, payment_count, avg_payment,
-                    expected_total, last_updated
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                    expected_total, fee_count, assets_sum,
+                    assets_count, last_updated
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
                 ON CONFLICT(client_id, year, quarter) 
                 DO UPDATE SET
                     total_payments = excluded.total_payments,
@@ -100,6 +765,9 @@ def _update_quarterly_summary(cursor: sqlite3.Cursor, client_id: int, year: int,
                     payment_count = excluded.payment_count,
                     avg_payment = excluded.avg_payment,
                     expected_total = excluded.expected_total,
+                    fee_count = excluded.fee_count,
+                    assets_sum = excluded.assets_sum,
+                    assets_count = excluded.assets_count,
                     last_updated = excluded.last_updated
             """, (
                 client_id, year, quarter,
@@ -107,7 +775,10 @@ def _update_quarterly_summary(cursor: sqlite3.Cursor, client_id: int, year: int,
                 payment_data[1],  # avg_assets
                 payment_data[2],  # payment_count
                 avg_payment,      # avg_payment
-                payment_data[3]   # expected_total
+                payment_data[3],  # expected_total
+                payment_data[4],  # fee_count
+                payment_data[5],  # assets_sum
+                payment_data[6]   # assets_count
             ))
         
         return True
@@ -124,7 +795,10 @@ def _update_yearly_summary(cursor: sqlite3.Cursor, client_id: int, year: int) ->
             SELECT 
                 SUM(total_payments) as yearly_total,
                 AVG(total_assets) as avg_assets,
-                SUM(payment_count) as total_payments
+                SUM(payment_count) as total_payments,
+                COUNT(*) as quarter_count,
+                SUM(total_assets) as assets_sum,
+                COUNT(total_assets) as assets_count
             FROM quarterly_summaries
             WHERE client_id = ? AND year = ?
         """, (client_id, year))
@@ -161,8 +835,9 @@ def _update_yearly_summary(cursor: sqlite3.Cursor, client_id: int, year: int) ->
         cursor.execute("""
             INSERT INTO yearly_summaries (
                 client_id, year, total_payments, total_assets,
-                payment_count, avg_payment, yoy_growth, last_updated
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                payment_count, avg_payment, yoy_growth,
+                quarter_count, assets_sum, assets_count, last_updated
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
             ON CONFLICT(client_id, year) 
             DO UPDATE SET
                 total_payments = excluded.total_payments,
@@ -170,6 +845,9 @@ def _update_yearly_summary(cursor: sqlite3.Cursor, client_id: int, year: int) ->
                 payment_count = excluded.payment_count,
                 avg_payment = excluded.avg_payment,
                 yoy_growth = excluded.yoy_growth,
+                quarter_count = excluded.quarter_count,
+                assets_sum = excluded.assets_sum,
+                assets_count = excluded.assets_count,
                 last_updated = excluded.last_updated
         """, (
             client_id, year,
@@ -177,7 +855,10 @@ def _update_yearly_summary(cursor: sqlite3.Cursor, client_id: int, year: int) ->
             current_year_data[1],  # avg_assets
             current_year_data[2],  # payment_count
             avg_payment,           # avg_payment
-            yoy_growth            # yoy_growth
+            yoy_growth,            # yoy_growth
+            current_year_data[3],  # quarter_count
+            current_year_data[4],  # assets_sum
+            current_year_data[5]   # assets_count
         ))
         
         return True
@@ -281,6 +962,7 @@ def update_yearly_summary(client_id: int, year: int) -> bool:
     conn = get_database_connection()
     try:
         cursor = conn.cursor()
+        _require_summary_schema(cursor)
         success = _update_yearly_summary(cursor, client_id, year)
         if success:
             conn.commit()
@@ -306,57 +988,211 @@ def update_client_metrics(client_id: int) -> bool:
     finally:
         conn.close()
 
-def populate_all_summaries() -> bool:
-    """Populate all summary tables from scratch."""
-    conn = get_database_connection()
-    try:
+REBUILD_MODES = ('set', 'rows')
+
+def populate_all_summaries(mode: str = 'set') -> bool:
+    """
+    Populate all summary tables from scratch in a single transaction.
+    
+    Args:
+        mode: 'set' rebuilds each table with one INSERT ... SELECT (default);
+              'rows' recomputes every period with the per-period update functions
+    """
+    if mode not in REBUILD_MODES:
+        raise ValueError(f"Unknown rebuild mode '{mode}'. Expected one of: {', '.join(REBUILD_MODES)}")
+    
+    def rebuild(conn):
         cursor = conn.cursor()
         
-        # Get all client IDs
-        cursor.execute("SELECT DISTINCT client_id FROM clients")
-        client_ids = [row[0] for row in cursor.fetchall()]
-        
-        # Get all year/quarter combinations
-        cursor.execute("""
-            SELECT DISTINCT 
-                client_id,
-                applied_start_year as year,
-                applied_start_quarter as quarter
-            FROM payments
-            ORDER BY year, quarter
-        """)
-        periods = cursor.fetchall()
-        
-        # Clear existing summaries
+        # Clear existing summaries; a full rebuild also covers any deferred periods
         cursor.execute("DELETE FROM quarterly_summaries")
         cursor.execute("DELETE FROM yearly_summaries")
         cursor.execute("DELETE FROM client_metrics")
+        _ensure_summary_schema(cursor)
+        cursor.execute("DELETE FROM summary_dirty_periods")
         
-        # Process each period
-        for client_id, year, quarter in periods:
-            update_quarterly_summary(client_id, year, quarter)
-        
-        # Process each year
-        years = set((client_id, year) for client_id, year, _ in periods)
-        for client_id, year in years:
-            update_yearly_summary(client_id, year)
-        
-        # Update current metrics for each client
-        for client_id in client_ids:
-            update_client_metrics(client_id)
-        
-        conn.commit()
+        if mode == 'set':
+            _rebuild_summaries_set_based(cursor)
+        else:
+            _rebuild_summaries_by_period(cursor)
+    
+    try:
+        run_write(rebuild)
         return True
-        
     except Exception as e:
         print(f"Error populating summaries: {str(e)}")
         return False
-    finally:
-        conn.close()
+
+def _rebuild_summaries_set_based(cursor: sqlite3.Cursor) -> None:
+    """Recompute every summary table with one grouped INSERT per table."""
+    # Quarterly: same figures as _update_quarterly_summary, for every period at once
+    cursor.execute("""
+        INSERT INTO quarterly_summaries (
+            client_id, year, quarter, total_payments,
+            total_assets, payment_count, avg_payment,
+            expected_total, fee_count, assets_sum,
+            assets_count, last_updated
+        )
+        SELECT 
+            client_id,
+            applied_start_year,
+            applied_start_quarter,
+            SUM(actual_fee),
+            AVG(total_assets),
+            COUNT(*),
+            CAST(SUM(actual_fee) AS REAL) / COUNT(*),
+            MAX(expected_fee),
+            COUNT(actual_fee),
+            SUM(total_assets),
+            COUNT(total_assets),
+            datetime('now')
+        FROM payments
+        GROUP BY client_id, applied_start_year, applied_start_quarter
+        HAVING SUM(actual_fee) IS NOT NULL
+    """)
+    
+    # Yearly: roll up the quarters, with growth against the calendar year before.
+    # Upserts, because the summary triggers may already have added rows.
+    cursor.execute("""
+        WITH yearly AS (
+            SELECT 
+                client_id,
+                year,
+                SUM(total_payments) AS total_payments,
+                AVG(total_assets) AS total_assets,
+                SUM(payment_count) AS payment_count,
+                COUNT(*) AS quarter_count,
+                SUM(total_assets) AS assets_sum,
+                COUNT(total_assets) AS assets_count
+            FROM quarterly_summaries
+            GROUP BY client_id, year
+            HAVING SUM(total_payments) IS NOT NULL
+        )
+        INSERT INTO yearly_summaries (
+            client_id, year, total_payments, total_assets,
+            payment_count, avg_payment, yoy_growth,
+            quarter_count, assets_sum, assets_count, last_updated
+        )
+        SELECT 
+            cur.client_id,
+            cur.year,
+            cur.total_payments,
+            cur.total_assets,
+            cur.payment_count,
+            CASE WHEN cur.payment_count > 0
+                 THEN CAST(cur.total_payments AS REAL) / cur.payment_count ELSE 0 END,
+            CASE WHEN prev.total_payments > 0
+                 THEN CAST(cur.total_payments - prev.total_payments AS REAL) / prev.total_payments * 100 END,
+            cur.quarter_count,
+            cur.assets_sum,
+            cur.assets_count,
+            datetime('now')
+        FROM yearly cur
+        LEFT JOIN yearly prev ON 
+            prev.client_id = cur.client_id AND 
+            prev.year = cur.year - 1
+        WHERE true
+        ON CONFLICT(client_id, year) 
+        DO UPDATE SET
+            total_payments = excluded.total_payments,
+            total_assets = excluded.total_assets,
+            payment_count = excluded.payment_count,
+            avg_payment = excluded.avg_payment,
+            yoy_growth = excluded.yoy_growth,
+            quarter_count = excluded.quarter_count,
+            assets_sum = excluded.assets_sum,
+            assets_count = excluded.assets_count,
+            last_updated = excluded.last_updated
+    """)
+    
+    # Client metrics: latest payment per client plus YTD and quarterly averages
+    cursor.execute("""
+        WITH ranked AS (
+            SELECT 
+                client_id,
+                received_date,
+                actual_fee,
+                applied_start_quarter,
+                applied_start_year,
+                total_assets,
+                ROW_NUMBER() OVER (
+                    PARTITION BY client_id 
+                    ORDER BY received_date DESC, payment_id DESC
+                ) AS rn
+            FROM payments
+        ),
+        ytd AS (
+            SELECT client_id, SUM(actual_fee) AS total
+            FROM payments
+            WHERE applied_start_year = ?
+            GROUP BY client_id
+        ),
+        quarterly AS (
+            SELECT client_id, AVG(total_payments) AS avg_payment
+            FROM quarterly_summaries
+            WHERE total_payments > 0
+            GROUP BY client_id
+        )
+        INSERT INTO client_metrics (
+            client_id, last_payment_date, last_payment_amount,
+            last_payment_quarter, last_payment_year,
+            total_ytd_payments, avg_quarterly_payment,
+            last_recorded_assets, last_updated
+        )
+        SELECT 
+            r.client_id,
+            r.received_date,
+            r.actual_fee,
+            r.applied_start_quarter,
+            r.applied_start_year,
+            COALESCE(ytd.total, 0),
+            COALESCE(q.avg_payment, 0),
+            r.total_assets,
+            datetime('now')
+        FROM ranked r
+        LEFT JOIN ytd ON ytd.client_id = r.client_id
+        LEFT JOIN quarterly q ON q.client_id = r.client_id
+        WHERE r.rn = 1
+        ON CONFLICT(client_id) 
+        DO UPDATE SET
+            last_payment_date = excluded.last_payment_date,
+            last_payment_amount = excluded.last_payment_amount,
+            last_payment_quarter = excluded.last_payment_quarter,
+            last_payment_year = excluded.last_payment_year,
+            total_ytd_payments = excluded.total_ytd_payments,
+            avg_quarterly_payment = excluded.avg_quarterly_payment,
+            last_recorded_assets = excluded.last_recorded_assets,
+            last_updated = excluded.last_updated
+    """, (datetime.now().year,))
+
+def _rebuild_summaries_by_period(cursor: sqlite3.Cursor) -> None:
+    """Recompute every summary one period at a time on a single cursor."""
+    cursor.execute("""
+        SELECT DISTINCT 
+            client_id,
+            applied_start_year as year,
+            applied_start_quarter as quarter
+        FROM payments
+        ORDER BY client_id, year, quarter
+    """)
+    periods = cursor.fetchall()
+    
+    for client_id, year, quarter in periods:
+        if not _update_quarterly_summary(cursor, client_id, year, quarter):
+            raise Exception("Failed to update quarterly summary")
+    
+    # Years in order so growth can use the year before
+    for client_id, year in sorted(set((client_id, year) for client_id, year, _ in periods)):
+        if not _update_yearly_summary(cursor, client_id, year):
+            raise Exception("Failed to update yearly summary")
+    
+    for client_id in sorted(set(client_id for client_id, _, _ in periods)):
+        if not _update_client_metrics(cursor, client_id):
+            raise Exception("Failed to update client metrics")
 
 def get_latest_summaries(client_id: int) -> Dict[str, Any]:
     """Get latest summary data for a client."""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         
@@ -8,6 +8,12 @@ This module manages SQLite triggers that maintain summary table consistency.
 It provides functions to create and manage triggers that automatically update
 summary tables when payments are added, modified, or deleted.
 
+The triggers are only installed while the summary maintenance mode is
+'trigger' (see set_maintenance_mode in utils/summaries.py); in the other
+modes the application keeps the summaries current instead. The public
+helpers below change the mode rather than the triggers directly, so the two
+mechanisms never run together.
+
 Key Components:
 - Trigger creation/management for quarterly summaries
 - Trigger creation/management for yearly summaries  
@@ -15,219 +21,135 @@ Key Components:
 - Helper functions for trigger maintenance
 """
 
+import sqlite3
 from typing import List
-from .utils import get_database_connection
+from .database import get_database_connection
 
-def create_summary_triggers() -> bool:
-    """Create all necessary triggers for maintaining summary tables."""
-    conn = get_database_connection()
-    try:
-        cursor = conn.cursor()
-        
-        # First drop existing triggers
-        drop_all_triggers()
-        
-        # Create triggers for payment changes
-        triggers = [
-            # After INSERT trigger for quarterly summaries
-            """
-            CREATE TRIGGER IF NOT EXISTS update_quarterly_after_insert
-            AFTER INSERT ON payments
-            BEGIN
-                INSERT INTO quarterly_summaries (
-                    client_id, year, quarter, total_payments,
-                    total_assets, payment_count, avg_payment,
-                    expected_total, last_updated
-                )
-                SELECT 
-                    NEW.client_id,
-                    NEW.applied_start_year,
-                    NEW.applied_start_quarter,
-                    COALESCE(SUM(actual_fee), 0),
-                    AVG(total_assets),
-                    COUNT(*),
-                    CASE 
-                        WHEN COUNT(*) > 0 THEN COALESCE(SUM(actual_fee), 0) / COUNT(*)
-                        ELSE 0
-                    END,
-                    MAX(expected_fee),
-                    datetime('now')
-                FROM payments
-                WHERE client_id = NEW.client_id
-                AND applied_start_year = NEW.applied_start_year
-                AND applied_start_quarter = NEW.applied_start_quarter
-                ON CONFLICT(client_id, year, quarter) DO UPDATE SET
-                    total_payments = excluded.total_payments,
-                    total_assets = excluded.total_assets,
-                    payment_count = excluded.payment_count,
-                    avg_payment = excluded.avg_payment,
-                    expected_total = excluded.expected_total,
-                    last_updated = excluded.last_updated;
-            END;
-            """,
+# Summary triggers all share this prefix; other triggers (e.g. version_*) are never touched
+SUMMARY_TRIGGER_PREFIX = 'update_'
 
-            # After UPDATE trigger for quarterly summaries
-            """
-            CREATE TRIGGER IF NOT EXISTS update_quarterly_after_update
-            AFTER UPDATE ON payments
-            BEGIN
-                -- Update old quarter summary
+def _quarterly_refresh_sql(row: str) -> str:
+    """Recompute the quarterly summary for the period of OLD or NEW."""
+    return f"""
                 INSERT INTO quarterly_summaries (
                     client_id, year, quarter, total_payments,
                     total_assets, payment_count, avg_payment,
-                    expected_total, last_updated
+                    expected_total, fee_count, assets_sum,
+                    assets_count, last_updated
                 )
                 SELECT 
-                    OLD.client_id,
-                    OLD.applied_start_year,
-                    OLD.applied_start_quarter,
-                    COALESCE(SUM(actual_fee), 0),
+                    client_id,
+                    applied_start_year,
+                    applied_start_quarter,
+                    SUM(actual_fee),
                     AVG(total_assets),
                     COUNT(*),
-                    CASE 
-                        WHEN COUNT(*) > 0 THEN COALESCE(SUM(actual_fee), 0) / COUNT(*)
-                        ELSE 0
-                    END,
+                    CAST(SUM(actual_fee) AS REAL) / COUNT(*),
                     MAX(expected_fee),
+                    COUNT(actual_fee),
+                    SUM(total_assets),
+                    COUNT(total_assets),
                     datetime('now')
                 FROM payments
-                WHERE client_id = OLD.client_id
-                AND applied_start_year = OLD.applied_start_year
-                AND applied_start_quarter = OLD.applied_start_quarter
+                WHERE client_id = {row}.client_id
+                AND applied_start_year = {row}.applied_start_year
+                AND applied_start_quarter = {row}.applied_start_quarter
+                GROUP BY client_id, applied_start_year, applied_start_quarter
+                HAVING SUM(actual_fee) IS NOT NULL
                 ON CONFLICT(client_id, year, quarter) DO UPDATE SET
                     total_payments = excluded.total_payments,
                     total_assets = excluded.total_assets,
                     payment_count = excluded.payment_count,
                     avg_payment = excluded.avg_payment,
                     expected_total = excluded.expected_total,
+                    fee_count = excluded.fee_count,
+                    assets_sum = excluded.assets_sum,
+                    assets_count = excluded.assets_count,
                     last_updated = excluded.last_updated;
 
-                -- Update new quarter summary
-                INSERT INTO quarterly_summaries (
-                    client_id, year, quarter, total_payments,
-                    total_assets, payment_count, avg_payment,
-                    expected_total, last_updated
-                )
-                SELECT 
-                    NEW.client_id,
-                    NEW.applied_start_year,
-                    NEW.applied_start_quarter,
-                    COALESCE(SUM(actual_fee), 0),
-                    AVG(total_assets),
-                    COUNT(*),
-                    CASE 
-                        WHEN COUNT(*) > 0 THEN COALESCE(SUM(actual_fee), 0) / COUNT(*)
-                        ELSE 0
-                    END,
-                    MAX(expected_fee),
-                    datetime('now')
-                FROM payments
-                WHERE client_id = NEW.client_id
-                AND applied_start_year = NEW.applied_start_year
-                AND applied_start_quarter = NEW.applied_start_quarter
-                ON CONFLICT(client_id, year, quarter) DO UPDATE SET
-                    total_payments = excluded.total_payments,
-                    total_assets = excluded.total_assets,
-                    payment_count = excluded.payment_count,
-                    avg_payment = excluded.avg_payment,
-                    expected_total = excluded.expected_total,
-                    last_updated = excluded.last_updated;
-            END;
-            """,
-
-            # After DELETE trigger for quarterly summaries
-            """
-            CREATE TRIGGER IF NOT EXISTS update_quarterly_after_delete
-            AFTER DELETE ON payments
-            BEGIN
-                INSERT INTO quarterly_summaries (
-                    client_id, year, quarter, total_payments,
-                    total_assets, payment_count, avg_payment,
-                    expected_total, last_updated
-                )
-                SELECT 
-                    OLD.client_id,
-                    OLD.applied_start_year,
-                    OLD.applied_start_quarter,
-                    COALESCE(SUM(actual_fee), 0),
-                    AVG(total_assets),
-                    COUNT(*),
-                    CASE 
-                        WHEN COUNT(*) > 0 THEN COALESCE(SUM(actual_fee), 0) / COUNT(*)
-                        ELSE 0
-                    END,
-                    MAX(expected_fee),
-                    datetime('now')
-                FROM payments
-                WHERE client_id = OLD.client_id
-                AND applied_start_year = OLD.applied_start_year
-                AND applied_start_quarter = OLD.applied_start_quarter
-                ON CONFLICT(client_id, year, quarter) DO UPDATE SET
-                    total_payments = excluded.total_payments,
-                    total_assets = excluded.total_assets,
-                    payment_count = excluded.payment_count,
-                    avg_payment = excluded.avg_payment,
-                    expected_total = excluded.expected_total,
-                    last_updated = excluded.last_updated;
-
-                -- Remove empty summaries
                 DELETE FROM quarterly_summaries
-                WHERE payment_count = 0;
-            END;
-            """,
+                WHERE client_id = {row}.client_id
+                AND year = {row}.applied_start_year
+                AND quarter = {row}.applied_start_quarter
+                AND NOT EXISTS (
+                    SELECT 1 FROM payments
+                    WHERE client_id = {row}.client_id
+                    AND applied_start_year = {row}.applied_start_year
+                    AND applied_start_quarter = {row}.applied_start_quarter
+                    AND actual_fee IS NOT NULL
+                );
+    """
 
-            # After quarterly summary changes, update yearly summary
-            """
-            CREATE TRIGGER IF NOT EXISTS update_yearly_after_quarterly_change
-            AFTER INSERT ON quarterly_summaries
-            BEGIN
+def _yearly_refresh_sql(row: str) -> str:
+    """Recompute the yearly summary for the year of OLD or NEW, and growth for the year after."""
+    return f"""
                 INSERT INTO yearly_summaries (
                     client_id, year, total_payments, total_assets,
-                    payment_count, avg_payment, yoy_growth, last_updated
+                    payment_count, avg_payment, yoy_growth,
+                    quarter_count, assets_sum, assets_count, last_updated
                 )
                 SELECT 
-                    NEW.client_id,
-                    NEW.year,
-                    COALESCE(SUM(total_payments), 0),
-                    AVG(total_assets),
-                    SUM(payment_count),
+                    qs.client_id,
+                    qs.year,
+                    SUM(qs.total_payments),
+                    AVG(qs.total_assets),
+                    SUM(qs.payment_count),
                     CASE 
-                        WHEN SUM(payment_count) > 0 
-                        THEN COALESCE(SUM(total_payments), 0) / SUM(payment_count)
+                        WHEN SUM(qs.payment_count) > 0 
+                        THEN CAST(SUM(qs.total_payments) AS REAL) / SUM(qs.payment_count)
                         ELSE 0
                     END,
                     CASE
-                        WHEN (SELECT total_payments FROM yearly_summaries 
-                              WHERE client_id = NEW.client_id 
-                              AND year = NEW.year - 1) > 0
-                        THEN ((COALESCE(SUM(total_payments), 0) - 
-                              (SELECT total_payments FROM yearly_summaries 
-                               WHERE client_id = NEW.client_id 
-                               AND year = NEW.year - 1)) /
-                              (SELECT total_payments FROM yearly_summaries 
-                               WHERE client_id = NEW.client_id 
-                               AND year = NEW.year - 1)) * 100
-                        ELSE NULL
+                        WHEN prev.total_payments > 0
+                        THEN CAST(SUM(qs.total_payments) - prev.total_payments AS REAL) / prev.total_payments * 100
                     END,
+                    COUNT(*),
+                    SUM(qs.total_assets),
+                    COUNT(qs.total_assets),
                     datetime('now')
-                FROM quarterly_summaries
-                WHERE client_id = NEW.client_id AND year = NEW.year
-                GROUP BY client_id, year
+                FROM quarterly_summaries qs
+                LEFT JOIN yearly_summaries prev ON 
+                    prev.client_id = qs.client_id AND 
+                    prev.year = qs.year - 1
+                WHERE qs.client_id = {row}.client_id AND qs.year = {row}.applied_start_year
+                GROUP BY qs.client_id, qs.year
+                HAVING SUM(qs.total_payments) IS NOT NULL
                 ON CONFLICT(client_id, year) DO UPDATE SET
                     total_payments = excluded.total_payments,
                     total_assets = excluded.total_assets,
                     payment_count = excluded.payment_count,
                     avg_payment = excluded.avg_payment,
                     yoy_growth = excluded.yoy_growth,
+                    quarter_count = excluded.quarter_count,
+                    assets_sum = excluded.assets_sum,
+                    assets_count = excluded.assets_count,
                     last_updated = excluded.last_updated;
-            END;
-            """,
 
-            # After any payment change, update client metrics
-            """
-            CREATE TRIGGER IF NOT EXISTS update_client_metrics_after_payment_change
-            AFTER INSERT ON payments
-            BEGIN
+                DELETE FROM yearly_summaries
+                WHERE client_id = {row}.client_id
+                AND year = {row}.applied_start_year
+                AND NOT EXISTS (
+                    SELECT 1 FROM quarterly_summaries
+                    WHERE client_id = {row}.client_id
+                    AND year = {row}.applied_start_year
+                    AND total_payments IS NOT NULL
+                );
+
+                UPDATE yearly_summaries
+                SET yoy_growth = (
+                    SELECT CASE WHEN prev.total_payments > 0
+                                THEN CAST(yearly_summaries.total_payments - prev.total_payments AS REAL)
+                                     / prev.total_payments * 100 END
+                    FROM yearly_summaries prev
+                    WHERE prev.client_id = yearly_summaries.client_id
+                    AND prev.year = yearly_summaries.year - 1
+                )
+                WHERE client_id = {row}.client_id AND year = {row}.applied_start_year + 1;
+    """
+
+def _client_metrics_refresh_sql(row: str) -> str:
+    """Recompute client metrics for the client of OLD or NEW."""
+    return f"""
                 INSERT INTO client_metrics (
                     client_id, last_payment_date, last_payment_amount,
                     last_payment_quarter, last_payment_year,
@@ -243,17 +165,20 @@ def create_summary_triggers() -> bool:
                     (SELECT COALESCE(SUM(actual_fee), 0)
                      FROM payments 
                      WHERE client_id = p.client_id 
-                     AND applied_start_year = strftime('%Y', 'now')),
-                    (SELECT AVG(total_payments)
+                     AND applied_start_year = CAST(strftime('%Y', 'now', 'localtime') AS INTEGER)),
+                    (SELECT COALESCE(AVG(total_payments), 0)
                      FROM quarterly_summaries
                      WHERE client_id = p.client_id
-                     AND total_payments > 0
-                     ORDER BY year DESC, quarter DESC
-                     LIMIT 4),
+                     AND total_payments > 0),
                     p.total_assets,
                     datetime('now')
                 FROM payments p
-                WHERE p.payment_id = NEW.payment_id
+                WHERE p.payment_id = (
+                    SELECT payment_id FROM payments
+                    WHERE client_id = {row}.client_id
+                    ORDER BY received_date DESC, payment_id DESC
+                    LIMIT 1
+                )
                 ON CONFLICT(client_id) DO UPDATE SET
                     last_payment_date = excluded.last_payment_date,
                     last_payment_amount = excluded.last_payment_amount,
@@ -263,45 +188,93 @@ def create_summary_triggers() -> bool:
                     avg_quarterly_payment = excluded.avg_quarterly_payment,
                     last_recorded_assets = excluded.last_recorded_assets,
                     last_updated = excluded.last_updated;
+
+                DELETE FROM client_metrics
+                WHERE client_id = {row}.client_id
+                AND NOT EXISTS (SELECT 1 FROM payments WHERE client_id = {row}.client_id);
+    """
+
+def _summary_trigger_statements() -> List[str]:
+    """CREATE TRIGGER statements that keep every summary table current.
+    
+    Each trigger refreshes the affected quarter, then its year, then the
+    client's metrics, computing exactly what update_summaries_in_transaction
+    does in application mode.
+    """
+    return [
+        f"""
+            CREATE TRIGGER IF NOT EXISTS update_summaries_after_insert
+            AFTER INSERT ON payments
+            BEGIN
+                {_quarterly_refresh_sql('NEW')}
+                {_yearly_refresh_sql('NEW')}
+                {_client_metrics_refresh_sql('NEW')}
+            END;
+        """,
+        f"""
+            CREATE TRIGGER IF NOT EXISTS update_summaries_after_update
+            AFTER UPDATE ON payments
+            BEGIN
+                {_quarterly_refresh_sql('OLD')}
+                {_quarterly_refresh_sql('NEW')}
+                {_yearly_refresh_sql('OLD')}
+                {_yearly_refresh_sql('NEW')}
+                {_client_metrics_refresh_sql('OLD')}
+                {_client_metrics_refresh_sql('NEW')}
+            END;
+        """,
+        f"""
+            CREATE TRIGGER IF NOT EXISTS update_summaries_after_delete
+            AFTER DELETE ON payments
+            BEGIN
+                {_quarterly_refresh_sql('OLD')}
+                {_yearly_refresh_sql('OLD')}
+                {_client_metrics_refresh_sql('OLD')}
             END;
-            """
-        ]
+        """,
+    ]
 
-        # Create each trigger
-        for trigger in triggers:
-            cursor.execute(trigger)
-        
-        conn.commit()
+def install_summary_triggers(cursor: sqlite3.Cursor) -> None:
+    """Replace any summary triggers with the current definitions, using the caller's transaction."""
+    remove_summary_triggers(cursor)
+    for trigger in _summary_trigger_statements():
+        cursor.execute(trigger)
+
+def remove_summary_triggers(cursor: sqlite3.Cursor) -> None:
+    """Drop every summary trigger, using the caller's transaction."""
+    cursor.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'trigger' AND name LIKE ?
+    """, (SUMMARY_TRIGGER_PREFIX + '%',))
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+def create_summary_triggers() -> bool:
+    """Switch summary maintenance to 'trigger' mode, (re)creating the summary triggers.
+    
+    Goes through set_maintenance_mode() so the application stops applying
+    its own deltas; triggers and application never both update the summaries.
+    """
+    from .summaries import set_maintenance_mode
+    try:
+        set_maintenance_mode('trigger')
         return True
         
     except Exception as e:
         print(f"Error creating triggers: {str(e)}")
         return False
-    finally:
-        conn.close()
 
 def drop_all_triggers() -> bool:
-    """Drop all existing summary table triggers."""
-    conn = get_database_connection()
+    """Drop the summary triggers; if they were maintaining the summaries, the application takes over."""
+    from .summaries import get_maintenance_mode, set_maintenance_mode
     try:
-        cursor = conn.cursor()
-        
-        # Get list of all triggers
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='trigger';")
-        triggers = cursor.fetchall()
-        
-        # Drop each trigger
-        for trigger in triggers:
-            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger[0]};")
-        
-        conn.commit()
+        mode = get_maintenance_mode()
+        set_maintenance_mode('application' if mode == 'trigger' else mode)
         return True
         
     except Exception as e:
         print(f"Error dropping triggers: {str(e)}")
         return False
-    finally:
-        conn.close()
 
 def check_triggers_exist() -> List[str]:
     """Check which summary triggers exist.
@@ -318,8 +291,8 @@ def check_triggers_exist() -> List[str]:
             SELECT name 
             FROM sqlite_master 
             WHERE type='trigger'
-            AND name LIKE 'update_%';
-        """)
+            AND name LIKE ?;
+        """, (SUMMARY_TRIGGER_PREFIX + '%',))
         
         return [row[0] for row in cursor.fetchall()]
         
@@ -327,73 +300,27 @@ def check_triggers_exist() -> List[str]:
         conn.close()
 
 def verify_trigger_functionality() -> bool:
-    """Verify that all summary triggers are functioning correctly."""
-    conn = get_database_connection()
+    """Verify that the summary triggers keep every summary table current.
+    
+    Installs the current trigger definitions, inserts and deletes a probe
+    payment and checks the summaries, all inside a SAVEPOINT that is rolled
+    back, so no data or trigger changes survive.
+    """
+    from .summaries import verify_summary_maintenance
     try:
-        cursor = conn.cursor()
-        
-        # Insert test payment
-        cursor.execute("""
-            INSERT INTO payments (
-                client_id, contract_id, received_date,
-                applied_start_quarter, applied_start_year,
-                applied_end_quarter, applied_end_year,
-                total_assets, actual_fee, method
-            ) VALUES (
-                1, 1, date('now'),
-                1, strftime('%Y', 'now'),
-                1, strftime('%Y', 'now'),
-                100000, 1000, 'TEST'
-            );
-        """)
-        
-        # Verify quarterly summary was created
-        cursor.execute("""
-            SELECT COUNT(*)
-            FROM quarterly_summaries
-            WHERE client_id = 1
-            AND year = strftime('%Y', 'now')
-            AND quarter = 1;
-        """)
-        quarterly_exists = cursor.fetchone()[0] > 0
-        
-        # Verify yearly summary was updated
-        cursor.execute("""
-            SELECT COUNT(*)
-            FROM yearly_summaries
-            WHERE client_id = 1
-            AND year = strftime('%Y', 'now');
-        """)
-        yearly_exists = cursor.fetchone()[0] > 0
-        
-        # Verify client metrics were updated
-        cursor.execute("""
-            SELECT COUNT(*)
-            FROM client_metrics
-            WHERE client_id = 1;
-        """)
-        metrics_exist = cursor.fetchone()[0] > 0
-        
-        # Cleanup test data
-        cursor.execute("DELETE FROM payments WHERE method = 'TEST';")
-        conn.commit()
-        
-        return quarterly_exists and yearly_exists and metrics_exist
+        results = verify_summary_maintenance('trigger')
+        failed = [check for check, ok in results.items() if not ok]
+        if failed:
+            print(f"Trigger verification failed: {', '.join(failed)}")
+        return not failed
         
     except Exception as e:
         print(f"Error verifying triggers: {str(e)}")
         return False
-    finally:
-        conn.close()
 
 def initialize_triggers() -> bool:
-    """Initialize or reinitialize all summary triggers."""
+    """Switch to 'trigger' maintenance with fresh trigger definitions and verify them."""
     try:
-        # Drop existing triggers
-        if not drop_all_triggers():
-            return False
-            
-        # Create new triggers
         if not create_summary_triggers():
             return False
             
@@ -405,4 +332,4 @@ def initialize_triggers() -> bool:
         
     except Exception as e:
         print(f"Error initializing triggers: {str(e)}")
-        return False
\ No newline at end of file
+        return False
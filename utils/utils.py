@@ -1,5 +1,6 @@
 # utils/utils.py
 import sqlite3
+import json
 import streamlit as st
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple
@@ -12,7 +13,21 @@ from .summaries import (
     update_yearly_summary,
     update_client_metrics
 )
-from .database import get_database_connection
+from .database import (
+    get_database_connection,
+    database_connection,
+    get_read_connection,
+    read_connection,
+    get_write_connection,
+    write_connection,
+)
+from .writer import run_write, invalidates
+from .events import (
+    publish, PaymentChanged, ContractChanged, ContactChanged, ClientChanged,
+    ADDED, UPDATED, DELETED
+)
+from .cache import cached
+from .payment_ledger import get_payment_ledger, get_payment_ledger_page
 
 """
 File Path Handling System Documentation
@@ -84,28 +99,10 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def get_database_connection():
-    """Create and return a database connection to the local database."""
-    try:
-        # Use a simple relative path from the project root
-        database_path = 'DATABASE/401kDATABASE.db'
-        
-        if not os.path.exists(database_path):
-            raise FileNotFoundError(
-                "Database file not found. Please ensure:\n"
-                "1. The DATABASE folder exists in the project root\n"
-                f"2. The database file exists at: {database_path}"
-            )
-
-        return sqlite3.connect(database_path)
-        
-    except Exception as e:
-        logger.error(f"Error connecting to database: {str(e)}")
-        raise
-
+@cached(lambda: ['clients'])
 def get_clients():
     """Get all clients from the database"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -120,7 +117,7 @@ def get_clients():
 
 def get_active_contract(client_id):
     """Get active contract for a client"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -145,7 +142,7 @@ def get_active_contract(client_id):
 
 def get_client_contracts(client_id: int):
     """Get all contracts for a client ordered by active status and start date."""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -175,7 +172,7 @@ def get_client_contracts(client_id: int):
 
 def get_latest_payment(client_id):
     """Get latest payment for a client"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -193,7 +190,7 @@ def get_latest_payment(client_id):
 
 def get_client_details(client_id):
     """Get client details"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -238,7 +235,7 @@ def calculate_rate_conversions(rate_value, fee_type, schedule):
 
 def get_contacts(client_id):
     """Get all contacts for a client"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -262,7 +259,7 @@ def get_contacts(client_id):
 
 def get_all_contracts(client_id):
     """Get all contracts for a client"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -281,72 +278,24 @@ def get_all_contracts(client_id):
 
 def get_payment_history(client_id, years=None, quarters=None):
     """Get payment history for a client with optional year/quarter filters"""
-    ensure_summaries_initialized()  # Add this line
-    
-    base_query = """
-        SELECT 
-            c.provider_name,
-            p.applied_start_quarter,
-            p.applied_start_year,
-            p.applied_end_quarter,
-            p.applied_end_year,
-            c.payment_schedule,
-            p.received_date,
-            p.total_assets,
-            p.expected_fee,
-            p.actual_fee,
-            p.notes,
-            p.payment_id,
-            p.method
-        FROM payments p
-        JOIN contracts c ON p.contract_id = c.contract_id
-        JOIN quarterly_summaries qs ON  -- Add this JOIN
-            p.client_id = qs.client_id AND
-            p.applied_start_year = qs.year AND
-            p.applied_start_quarter = qs.quarter
-        WHERE p.client_id = ?
-    """
-    
-    params = [client_id]
-    
-    if years and len(years) > 0:
-        year_placeholders = ','.join(['?' for _ in years])
-        base_query += f" AND p.applied_start_year IN ({year_placeholders})"
-        params.extend(years)
-    
-    if quarters and len(quarters) > 0:
-        quarter_placeholders = ','.join(['?' for _ in quarters])
-        base_query += f" AND p.applied_start_quarter IN ({quarter_placeholders})"
-        params.extend(quarters)
-    
-    base_query += " ORDER BY p.received_date DESC, p.payment_id DESC"
-    
-    conn = get_database_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(base_query, params)
-        return cursor.fetchall()
-    finally:
-        conn.close()
+    return get_payment_ledger(client_id, years=years, quarters=quarters)
 
 
 def update_payment_note(payment_id, new_note):
     """Update payment note"""
-    conn = get_database_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
+    def write(conn):
+        conn.execute("""
             UPDATE payments 
             SET notes = ? 
             WHERE payment_id = ?
         """, (new_note, payment_id))
-        conn.commit()
-        
-        # Clear any cached data that might include this payment
-        if 'get_payment_history' in st.session_state:
-            st.session_state.get_payment_history.clear()
-    finally:
-        conn.close()
+        invalidates()  # No cached read includes notes
+    
+    run_write(write)
+    
+    # Clear any cached data that might include this payment
+    if 'get_payment_history' in st.session_state:
+        st.session_state.get_payment_history.clear()
     
     return True
 
@@ -388,8 +337,7 @@ def add_contact(client_id, contact_type, contact_data):
     # Clean up contact type to match database values
     contact_type = contact_type.split()[0]  # Extract first word (Primary/Authorized/Provider)
     
-    conn = get_database_connection()
-    try:
+    def write(conn):
         cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO contacts (
@@ -406,36 +354,38 @@ def add_contact(client_id, contact_type, contact_data):
             contact_data.get('physical_address'),
             contact_data.get('mailing_address')
         ))
-        conn.commit()
-        contact_id = cursor.lastrowid
+        publish(ContactChanged(ADDED, cursor.lastrowid, client_id))
+        return cursor.lastrowid
+    
+    contact_id = run_write(write)
+    
+    # Clear contact-related caches
+    if hasattr(st.session_state, 'get_contacts'):
+        st.session_state.get_contacts.clear()
+    if hasattr(st.session_state, 'get_client_dashboard_data'):
+        st.session_state.get_client_dashboard_data.clear()
         
-        # Clear contact-related caches
-        if hasattr(st.session_state, 'get_contacts'):
-            st.session_state.get_contacts.clear()
-        if hasattr(st.session_state, 'get_client_dashboard_data'):
-            st.session_state.get_client_dashboard_data.clear()
-            
-        return contact_id
-    finally:
-        conn.close()
+    return contact_id
+
+def _contact_client_id(conn, contact_id):
+    """Return the client a contact belongs to, or None if it does not exist."""
+    row = conn.execute("SELECT client_id FROM contacts WHERE contact_id = ?", (contact_id,)).fetchone()
+    return row[0] if row else None
 
 def delete_contact(contact_id):
     """Delete a contact from the database"""
-    conn = get_database_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM contacts WHERE contact_id = ?", (contact_id,))
-        conn.commit()
-        return True
-    finally:
-        conn.close()
+    def write(conn):
+        client_id = _contact_client_id(conn, contact_id)
+        conn.execute("DELETE FROM contacts WHERE contact_id = ?", (contact_id,))
+        publish(ContactChanged(DELETED, contact_id, client_id))
+    
+    run_write(write)
+    return True
 
 def update_contact(contact_id, contact_data):
     """Update an existing contact in the database"""
-    conn = get_database_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
+    def write(conn):
+        conn.execute("""
             UPDATE contacts 
             SET contact_name = ?, 
                 phone = ?, 
@@ -453,14 +403,14 @@ def update_contact(contact_id, contact_data):
             contact_data.get('mailing_address'),
             contact_id
         ))
-        conn.commit()
-        return True
-    finally:
-        conn.close()
+        publish(ContactChanged(UPDATED, contact_id, _contact_client_id(conn, contact_id)))
+    
+    run_write(write)
+    return True
 
 def get_total_payment_count(client_id):
     """Get total number of payments for a client."""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -474,7 +424,7 @@ def get_total_payment_count(client_id):
 
 def get_payment_year_quarters(client_id):
     """Get all available year/quarter combinations for quick navigation."""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -489,54 +439,19 @@ def get_payment_year_quarters(client_id):
     finally:
         conn.close()
 
-def get_paginated_payment_history(client_id, offset=0, limit=None, years=None, quarters=None):
-    """Get paginated payment records with optional year/quarter filters."""
-    base_query = """
-        SELECT 
-            c.provider_name,
-            p.applied_start_quarter,
-            p.applied_start_year,
-            p.applied_end_quarter,
-            p.applied_end_year,
-            c.payment_schedule,
-            p.received_date,
-            p.total_assets,
-            p.expected_fee,
-            p.actual_fee,
-            p.notes,
-            p.payment_id,
-            p.method
-        FROM payments p
-        JOIN contracts c ON p.contract_id = c.contract_id
-        WHERE p.client_id = ?
+# Payments per page in the client payment history
+PAYMENT_PAGE_SIZE = 25
+
+def get_paginated_payment_history(client_id, page_token=None, limit=PAYMENT_PAGE_SIZE, years=None, quarters=None):
     """
+    Get one page of a client's payment history, newest first, with optional year/quarter filters.
     
-    params = [client_id]
+    Keyset pagination on (received_date, payment_id); see utils/payment_ledger.py.
     
-    # Handle multiple years filter
-    if years and len(years) > 0:
-        year_placeholders = ','.join(['?' for _ in years])
-        base_query += f" AND p.applied_start_year IN ({year_placeholders})"
-        params.extend(years)
-    
-    # Handle multiple quarters filter
-    if quarters and len(quarters) > 0:
-        quarter_placeholders = ','.join(['?' for _ in quarters])
-        base_query += f" AND p.applied_start_quarter IN ({quarter_placeholders})"
-        params.extend(quarters)
-    
-    base_query += " ORDER BY p.received_date DESC, p.payment_id DESC"
-    
-    if limit is not None:
-        base_query += f" LIMIT {limit} OFFSET {offset}"
-    
-    conn = get_database_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(base_query, params)
-        return cursor.fetchall()
-    finally:
-        conn.close()
+    Returns:
+        tuple: (rows, next_page_token); next_page_token is None on the last page
+    """
+    return get_payment_ledger_page(client_id, page_token=page_token, limit=limit, years=years, quarters=quarters)
 
 def format_payment_data(payments):
     """Format payment data for display with consistent formatting."""
@@ -607,7 +522,7 @@ def format_payment_data(payments):
 
 def get_active_contracts_for_client(client_id):
     """Get all active contracts for a client for payment provider selection"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -701,81 +616,180 @@ def validate_payment_data(data):
     
     return errors
 
+def _publish_payment_change(action, payment_id, *contributions):
+    """Publish a PaymentChanged event for the periods of the payment's contributions."""
+    contributions = [c for c in contributions if c]
+    if not contributions:
+        return
+    periods = tuple(sorted(set((c[1], c[2]) for c in contributions)))
+    publish(PaymentChanged(action, payment_id, contributions[-1][0], periods))
+
+_INSERT_PAYMENT_SQL = """
+    INSERT INTO payments (
+        client_id, contract_id, received_date,
+        applied_start_quarter, applied_start_year,
+        applied_end_quarter, applied_end_year,
+        total_assets, expected_fee, actual_fee,
+        method, notes
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def _payment_values(client_id, contract_id, payment_data):
+    """Return the _INSERT_PAYMENT_SQL parameters for a payment form, converting months to quarters."""
+    schedule = (payment_data.get('payment_schedule') or '').lower()
+    if schedule == 'monthly':
+        start_quarter = (payment_data['applied_start_period'] - 1) // 3 + 1
+        end_quarter = (payment_data['applied_end_period'] - 1) // 3 + 1
+    else:
+        start_quarter = payment_data['applied_start_period']
+        end_quarter = payment_data['applied_end_period']
+    
+    return (
+        client_id,
+        contract_id,
+        payment_data['received_date'],
+        start_quarter,
+        payment_data['applied_start_year'],
+        end_quarter,
+        payment_data['applied_end_year'],
+        format_currency_db(payment_data.get('total_assets')),
+        format_currency_db(payment_data.get('expected_fee')),
+        format_currency_db(payment_data.get('actual_fee')),
+        payment_data.get('method'),
+        payment_data.get('notes', '')
+    )
+
 def add_payment(client_id, payment_data):
     """Add a new payment to the database"""
-    from .summaries import update_all_summaries
+    from .summaries import maintain_summaries, ensure_maintenance_mode, get_payment_contribution
     
-    max_retries = 3
-    retry_count = 0
+    contract = get_active_contract(client_id)
+    print(f"Active Contract: {contract}")
+    if not contract:
+        print("No active contract found!")
+        return None
     
-    while retry_count < max_retries:
-        try:
-            contract = get_active_contract(client_id)
-            print(f"Active Contract: {contract}")
-            if not contract:
-                print("No active contract found!")
-                return None
-            
-            conn = get_database_connection()
-            cursor = conn.cursor()
-            
-            schedule = payment_data.get('payment_schedule', '').lower()
-            if schedule == 'monthly':
-                start_quarter = (payment_data['applied_start_period'] - 1) // 3 + 1
-                end_quarter = (payment_data['applied_end_period'] - 1) // 3 + 1
-            else:
-                start_quarter = payment_data['applied_start_period']
-                end_quarter = payment_data['applied_end_period']
-            
-            values = (
+    values = _payment_values(client_id, contract[0], payment_data)
+    
+    def write(conn):
+        cursor = conn.cursor()
+        cursor.execute(_INSERT_PAYMENT_SQL, values)
+        payment_id = cursor.lastrowid
+        
+        # Summaries (or their deferred marker) commit together with the payment
+        contribution = get_payment_contribution(cursor, payment_id)
+        maintain_summaries(cursor, after=contribution)
+        _publish_payment_change(ADDED, payment_id, contribution)
+        return payment_id
+    
+    try:
+        ensure_maintenance_mode()
+        return run_write(write)
+    except Exception as e:
+        print(f"Database error adding payment: {e}")
+        return None
+
+def get_active_contracts_by_client(client_ids):
+    """Return {client_id: active contract} for many clients in one query (same columns as get_active_contract)."""
+    conn = get_read_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT 
                 client_id,
-                contract[0],
-                payment_data['received_date'],
-                start_quarter,
-                payment_data['applied_start_year'],
-                end_quarter,
-                payment_data['applied_end_year'],
-                format_currency_db(payment_data.get('total_assets')),
-                format_currency_db(payment_data.get('expected_fee')),
-                format_currency_db(payment_data.get('actual_fee')),
-                payment_data.get('method'),
-                payment_data.get('notes', '')
-            )
-            
-            cursor.execute("""
-                INSERT INTO payments (
-                    client_id, contract_id, received_date,
-                    applied_start_quarter, applied_start_year,
-                    applied_end_quarter, applied_end_year,
-                    total_assets, expected_fee, actual_fee,
-                    method, notes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, values)
-            
-            payment_id = cursor.lastrowid
-            
-            # Commit the payment first
-            conn.commit()
-            
-            # Now update summaries in a separate transaction
-            update_all_summaries(client_id, payment_data['applied_start_year'], start_quarter)
-            
-            return payment_id
-            
-        except sqlite3.Error as e:
-            print(f"Database error (attempt {retry_count + 1}): {e}")
-            if conn:
-                conn.close()
-            retry_count += 1
-            if retry_count < max_retries:
-                import time
-                time.sleep(0.5)
-            
-    return None
+                contract_id,
+                provider_name,
+                contract_number,
+                payment_schedule,
+                fee_type,
+                percent_rate,
+                flat_rate,
+                num_people
+            FROM contracts 
+            WHERE client_id IN (SELECT value FROM json_each(?))
+            AND active = 'TRUE'
+            AND valid_to IS NULL
+            ORDER BY client_id, rowid
+        """, (json.dumps(sorted(set(int(client_id) for client_id in client_ids))),))
+        contracts = {}
+        for row in cursor.fetchall():
+            contracts.setdefault(row[0], row[1:])
+        return contracts
+    finally:
+        conn.close()
+
+def add_payments_bulk(payments):
+    """
+    Add many payments in one write transaction.
+    
+    Every payment is checked before anything is written: a client without an
+    active contract or a payment failing validate_payment_data() is reported
+    and skipped. The rest are inserted with one executemany(), each affected
+    summary period is recomputed once, and everything commits together; if
+    the transaction fails, every remaining payment is reported with its error.
+    
+    Args:
+        payments: (client_id, payment_data) pairs, payment_data as for add_payment()
+    
+    Returns:
+        list: one (payment_id, error) pair per payment, in order; payment_id is
+        None and error a message for payments that were not added
+    """
+    from .summaries import maintain_summaries_for_periods, ensure_maintenance_mode, PAYMENT_CONTRIBUTION_COLUMNS
+    
+    results = [(None, None)] * len(payments)
+    contracts = get_active_contracts_by_client(client_id for client_id, _ in payments)
+    pending = []  # (position, insert values)
+    for position, (client_id, payment_data) in enumerate(payments):
+        contract = contracts.get(client_id)
+        if not contract:
+            results[position] = (None, "No active contract found")
+            continue
+        payment_data = dict(payment_data, payment_schedule=payment_data.get('payment_schedule') or contract[3])
+        errors = validate_payment_data(payment_data)
+        if errors:
+            results[position] = (None, "; ".join(errors))
+            continue
+        pending.append((position, _payment_values(client_id, contract[0], payment_data)))
+    
+    if not pending:
+        return results
+    
+    def write(conn):
+        cursor = conn.cursor()
+        # The writer holds the write lock, so every payment_id above the current
+        # maximum belongs to this batch, in insertion order
+        cursor.execute("SELECT COALESCE(MAX(payment_id), 0) FROM payments")
+        last_id = cursor.fetchone()[0]
+        cursor.executemany(_INSERT_PAYMENT_SQL, [values for _, values in pending])
+        cursor.execute(f"""
+            SELECT payment_id, {PAYMENT_CONTRIBUTION_COLUMNS}
+            FROM payments WHERE payment_id > ? ORDER BY payment_id
+        """, (last_id,))
+        inserted = cursor.fetchall()
+        
+        # Summaries (or their deferred markers) commit together with the payments
+        maintain_summaries_for_periods(cursor, [row[1:4] for row in inserted])
+        for row in inserted:
+            _publish_payment_change(ADDED, row[0], row[1:])
+        return [row[0] for row in inserted]
+    
+    try:
+        ensure_maintenance_mode()
+        payment_ids = run_write(write)
+    except Exception as e:
+        print(f"Database error adding payments: {e}")
+        for position, _ in pending:
+            results[position] = (None, f"Database error: {e}")
+        return results
+    
+    for (position, _), payment_id in zip(pending, payment_ids):
+        results[position] = (payment_id, None)
+    return results
 
 def get_payment_by_id(payment_id):
     """Get complete payment data for editing"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -801,7 +815,7 @@ def get_payment_by_id(payment_id):
 
 def get_client_dashboard_data(client_id):
     """Get all necessary client data for the dashboard in a single database call"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         
@@ -908,32 +922,29 @@ def get_client_dashboard_data(client_id):
 
 def delete_payment(payment_id):
     """Delete a payment from the database"""
-    from .summaries import update_all_summaries
+    from .summaries import maintain_summaries, ensure_maintenance_mode, get_payment_contribution
     
-    conn = get_database_connection()
-    try:
+    def write(conn):
         cursor = conn.cursor()
         
         # Get payment data for summary updates
-        cursor.execute("SELECT client_id, applied_start_year, applied_start_quarter FROM payments WHERE payment_id = ?", (payment_id,))
-        payment_data = cursor.fetchone()
+        payment_data = get_payment_contribution(cursor, payment_id)
         
         cursor.execute("DELETE FROM payments WHERE payment_id = ?", (payment_id,))
         
-        # Commit the deletion first
-        conn.commit()
-        
-        # Now update summaries in a separate transaction
+        # Summaries commit together with the deletion
         if payment_data:
-            update_all_summaries(payment_data[0], payment_data[1], payment_data[2])
-        
-        return True
-    finally:
-        conn.close()
+            maintain_summaries(cursor, before=payment_data)
+        _publish_payment_change(DELETED, payment_id, payment_data)
+    
+    ensure_maintenance_mode()
+    run_write(write)
+    return True
 
+@cached(lambda: ['payments'])
 def get_unique_payment_methods():
     """Get all unique payment methods from the database, including 'None Specified' and 'Other'"""
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -953,18 +964,16 @@ def get_unique_payment_methods():
 
 def update_payment(payment_id: int, form_data: Dict[str, Any]) -> bool:
     """Update an existing payment in the database."""
-    from .summaries import update_all_summaries
+    from .summaries import maintain_summaries, ensure_maintenance_mode, get_payment_contribution
     
-    try:
+    def write(conn):
         total_assets = format_currency_db(form_data.get('total_assets'))
         actual_fee = format_currency_db(form_data.get('actual_fee'))
         
-        conn = get_database_connection()
         cursor = conn.cursor()
         
         # Get original payment data for summary updates
-        cursor.execute("SELECT client_id, applied_start_year, applied_start_quarter FROM payments WHERE payment_id = ?", (payment_id,))
-        old_data = cursor.fetchone()
+        old_data = get_payment_contribution(cursor, payment_id)
         
         cursor.execute("""
             UPDATE payments
@@ -991,21 +1000,18 @@ def update_payment(payment_id: int, form_data: Dict[str, Any]) -> bool:
             payment_id
         ))
         
-        # Commit the update first
-        conn.commit()
-        
-        # Now update summaries for both old and new periods in separate transactions
-        update_all_summaries(old_data[0], old_data[1], old_data[2])  # Update old period
-        if old_data[1] != form_data['applied_start_year'] or old_data[2] != form_data['applied_start_period']:
-            update_all_summaries(old_data[0], form_data['applied_start_year'], form_data['applied_start_period'])  # Update new period
-        
+        # Move the payment's contribution from its old period to its new one in the same transaction
+        new_data = get_payment_contribution(cursor, payment_id)
+        maintain_summaries(cursor, before=old_data, after=new_data)
+        _publish_payment_change(UPDATED, payment_id, old_data, new_data)
+    
+    try:
+        ensure_maintenance_mode()
+        run_write(write)
         return True
-        
     except Exception as e:
         st.error(f"Error updating payment: {str(e)}")
         return False
-    finally:
-        conn.close()
 
 def save_contract(client_id: int, contract_data: Dict[str, Any], mode: str = 'add') -> bool:
     """Save contract to database.
@@ -1018,8 +1024,7 @@ def save_contract(client_id: int, contract_data: Dict[str, Any], mode: str = 'ad
     Returns:
         bool: True if save was successful, False otherwise
     """
-    conn = get_database_connection()
-    try:
+    def write(conn):
         cursor = conn.cursor()
         
         # If adding new contract, deactivate current active contract
@@ -1076,13 +1081,15 @@ def save_contract(client_id: int, contract_data: Dict[str, Any], mode: str = 'ad
                 contract_data.get('contract_id')
             ))
         
-        conn.commit()
+        contract_id = cursor.lastrowid if mode == 'add' else contract_data.get('contract_id')
+        publish(ContractChanged(ADDED if mode == 'add' else UPDATED, contract_id, client_id))
+    
+    try:
+        run_write(write)
         return True
     except Exception as e:
         print(f"Error saving contract: {e}")
         return False
-    finally:
-        conn.close()
 
 def validate_contract_data(data: Dict[str, Any]) -> list:
     """Validate contract data before saving.
@@ -1131,8 +1138,7 @@ def add_client(display_name: str, **optional_fields) -> int:
     if not display_name:
         raise ValueError("display_name is required")
         
-    conn = get_database_connection()
-    try:
+    def write(conn):
         cursor = conn.cursor()
         
         # Build the query dynamically based on provided fields
@@ -1146,10 +1152,10 @@ def add_client(display_name: str, **optional_fields) -> int:
         """
         
         cursor.execute(query, values)
-        conn.commit()
+        publish(ClientChanged(ADDED, cursor.lastrowid, cursor.lastrowid))
         return cursor.lastrowid
-    finally:
-        conn.close()
+    
+    return run_write(write)
 
 def update_client(client_id: int, **fields_to_update) -> bool:
     """
@@ -1165,8 +1171,7 @@ def update_client(client_id: int, **fields_to_update) -> bool:
     if not fields_to_update:
         return False
         
-    conn = get_database_connection()
-    try:
+    def write(conn):
         cursor = conn.cursor()
         
         # Build the update query dynamically
@@ -1180,10 +1185,10 @@ def update_client(client_id: int, **fields_to_update) -> bool:
         """
         
         cursor.execute(query, values)
-        conn.commit()
-        return True
-    finally:
-        conn.close()
+        publish(ClientChanged(UPDATED, client_id, client_id))
+    
+    run_write(write)
+    return True
 
 def delete_client(client_id: int) -> bool:
     """
@@ -1195,12 +1200,18 @@ def delete_client(client_id: int) -> bool:
     Returns:
         bool: True if successful
     """
-    conn = get_database_connection()
-    try:
+    from .summaries import maintain_summaries_for_periods, ensure_maintenance_mode
+    
+    def write(conn):
         cursor = conn.cursor()
         
-        # Start a transaction
-        cursor.execute("BEGIN TRANSACTION")
+        # Periods whose figures lose this client's payments
+        cursor.execute("""
+            SELECT DISTINCT applied_start_year, applied_start_quarter
+            FROM payments WHERE client_id = ?
+            ORDER BY applied_start_year, applied_start_quarter
+        """, (client_id,))
+        periods = tuple((year, quarter) for year, quarter in cursor.fetchall())
         
         # Delete related records first (foreign key relationships)
         cursor.execute("DELETE FROM payments WHERE client_id = ?", (client_id,))
@@ -1210,16 +1221,18 @@ def delete_client(client_id: int) -> bool:
         # Finally delete the client
         cursor.execute("DELETE FROM clients WHERE client_id = ?", (client_id,))
         
-        # Commit the transaction
-        conn.commit()
+        # Drop the client's summaries (or mark their periods dirty) in the same transaction
+        maintain_summaries_for_periods(cursor, [(client_id, year, quarter) for year, quarter in periods])
+        publish(ClientChanged(DELETED, client_id, client_id, periods))
+    
+    # All deletes commit together; the writer rolls them back on error
+    try:
+        ensure_maintenance_mode()
+        run_write(write)
         return True
     except Exception as e:
-        # Rollback on error
-        conn.rollback()
         logger.error(f"Error deleting client {client_id}: {str(e)}")
         return False
-    finally:
-        conn.close()
 
 def get_client_file_paths(client_id: int) -> dict:
     """Get document file paths for a specific client.
@@ -1234,7 +1247,7 @@ def get_client_file_paths(client_id: int) -> dict:
             - meetings
         Returns None if client not found
     """
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -1362,41 +1375,12 @@ def reconstruct_full_path(relative_path: str) -> Optional[str]:
         return None
 
 def ensure_summaries_initialized() -> bool:
-    """Ensure summary tables are populated and triggers are active."""
-    from .summaries import populate_all_summaries
-    from .triggers import check_triggers_exist, initialize_triggers
+    """Ensure summary tables are populated and the summary maintenance mode is applied.
     
-    conn = get_database_connection()
-    try:
-        cursor = conn.cursor()
-        
-        # Check if summary tables have data
-        cursor.execute("SELECT COUNT(*) FROM quarterly_summaries")
-        has_quarterly = cursor.fetchone()[0] > 0
-        
-        cursor.execute("SELECT COUNT(*) FROM yearly_summaries")
-        has_yearly = cursor.fetchone()[0] > 0
-        
-        cursor.execute("SELECT COUNT(*) FROM client_metrics")
-        has_metrics = cursor.fetchone()[0] > 0
-        
-        # Initialize triggers if needed
-        if not check_triggers_exist():
-            if not initialize_triggers():
-                return False
-        
-        # Populate summaries if empty
-        if not (has_quarterly and has_yearly and has_metrics):
-            if not populate_all_summaries():
-                return False
-        
-        return True
-        
-    except Exception as e:
-        print(f"Error initializing summaries: {str(e)}")
-        return False
-    finally:
-        conn.close()
+    app.py initializes the summaries at startup, so this is a no-op afterwards.
+    """
+    from .summaries import initialize_summaries
+    return initialize_summaries()
 
 def get_summary_metrics(client_id: int, year: int = None, quarter: int = None) -> Dict[str, Any]:
     """Get summary metrics for a client with optional period filtering."""
@@ -1405,7 +1389,7 @@ def get_summary_metrics(client_id: int, year: int = None, quarter: int = None) -
     if quarter is None:
         quarter = (datetime.now().month - 1) // 3 + 1
         
-    conn = get_database_connection()
+    conn = get_read_connection()
     try:
         cursor = conn.cursor()
         
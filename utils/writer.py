@@ -0,0 +1,390 @@
+"""
+Writer Module
+=============
+
+Single background writer for all database mutations.
+
+SQLite allows one writer at a time. Instead of every session racing for the
+write lock (and retrying when it loses), mutations are queued to one writer
+thread that owns the write connection. Callers get a Future back and usually
+wait on it straight away, so the functions in utils.py keep their existing
+return values and error behaviour.
+
+The writer groups whatever is waiting in the queue into one transaction and
+one commit. Each job runs inside its own SAVEPOINT, so a failing job is rolled
+back on its own without affecting the rest of the batch. When the queue runs
+empty, registered idle hooks get a batch of their own (deferred summary
+maintenance uses this).
+
+Jobs can declare which cached reads they change with invalidates(); after
+the commit, commit listeners (the read cache) receive the declared tags, or
+None for jobs that declared nothing, meaning anything may have changed.
+Jobs can also register after_commit() callbacks, which run only if the job
+commits (utils/events.py delivers change events this way).
+
+Key Components:
+- submit_write(): queue a job and get a concurrent.futures.Future
+- run_write(): queue a job and wait for its result
+- add_idle_hook(): run background work whenever the queue drains
+- get_writer_stats(): queue depth, batch sizes and write latency
+- get_write_version(): counter bumped by every commit, for cache invalidation
+- invalidates(): declare the cache tags the running job changes
+- add_commit_listener(): be told which tags each commit invalidated
+- after_commit(): run a callback once the running job has committed
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from .database import get_pool
+
+logger = logging.getLogger(__name__)
+
+# Longest a caller waits on run_write() before giving up (seconds)
+DEFAULT_WRITE_TIMEOUT = 30
+
+_STOP = object()
+
+# Bumped after every commit that applied at least one job. Kept at module
+# level so it keeps increasing across reset_writer().
+_write_version = 0
+_version_lock = threading.Lock()
+
+# Called after each commit with the union of the committed jobs' tags
+_commit_listeners: List[Callable[[Optional[Set[Hashable]]], None]] = []
+
+# The job the writer thread is running, for invalidates()
+_job_local = threading.local()
+
+
+def _bump_write_version() -> None:
+    global _write_version
+    with _version_lock:
+        _write_version += 1
+
+
+def _run_after_commit(jobs: List['_WriteJob']) -> None:
+    for job in jobs:
+        for callback in job.callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"After-commit callback failed: {str(e)}")
+
+
+def _notify_commit(jobs: List['_WriteJob']) -> None:
+    tags: Optional[Set[Hashable]] = set()
+    for job in jobs:
+        if job.tags is None:
+            tags = None  # Undeclared job: anything may have changed
+            break
+        tags |= job.tags
+    for listener in list(_commit_listeners):
+        try:
+            listener(tags)
+        except Exception as e:
+            logger.error(f"Commit listener failed: {str(e)}")
+
+
+class _WriteJob:
+    """A queued mutation and the future its caller is waiting on."""
+
+    __slots__ = ('fn', 'args', 'kwargs', 'future', 'submitted_at', 'tags', 'callbacks')
+
+    def __init__(self, fn: Callable, args: Tuple, kwargs: Dict[str, Any]):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+        self.tags: Optional[Set[Hashable]] = None
+        self.callbacks: List[Callable[[], None]] = []
+
+
+class WriteQueue:
+    """Queue of mutations applied by a single background writer thread.
+
+    Jobs are callables taking the writer's connection as their first
+    argument. They must not commit, roll back or open other write
+    connections; the writer owns the transaction.
+    """
+
+    def __init__(self, max_batch: int = 100):
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._idle_hooks: List[Tuple[Callable, Callable[[], bool]]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'batches': 0,
+            'commits': 0,
+            'max_batch_size': 0,
+            'max_queue_depth': 0,
+            'latency_total': 0.0,
+            'latency_max': 0.0,
+            'commit_time_total': 0.0,
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn(conn, *args, **kwargs) and return a Future for its result."""
+        job = _WriteJob(fn, args, kwargs)
+        self._ensure_started()
+        self._queue.put(job)
+        with self._stats_lock:
+            self._stats['submitted'] += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], self._queue.qsize())
+        return job.future
+
+    def add_idle_hook(self, job: Callable, pending: Callable[[], bool]) -> None:
+        """Run job(conn) as its own batch whenever the queue drains and pending() is true."""
+        self._idle_hooks.append((job, pending))
+
+    def _run_idle_hooks(self) -> None:
+        for job, pending in list(self._idle_hooks):
+            if not self._queue.empty():
+                return  # New work arrived; it goes first
+            try:
+                if pending():
+                    idle_job = _WriteJob(job, (), {})
+                    self._apply_batch([idle_job])
+                    if idle_job.future.exception() is not None:
+                        raise idle_job.future.exception()
+            except Exception as e:
+                logger.error(f"Writer idle hook failed: {str(e)}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Finish queued jobs and stop the writer thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            batch = [job]
+            stop_after = False
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    stop_after = True
+                    break
+                batch.append(job)
+
+            try:
+                self._apply_batch(batch)
+            except Exception as e:
+                # Never let the writer thread die; fail whatever is unresolved
+                logger.error(f"Writer batch failed: {str(e)}")
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+
+            if stop_after:
+                return
+            if self._queue.empty():
+                self._run_idle_hooks()
+
+    def _apply_batch(self, batch: List[_WriteJob]) -> None:
+        pool = get_pool('write')
+        conn = pool.checkout()
+        try:
+            try:
+                pool.begin_write(conn)
+            except sqlite3.Error as e:
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                self._record(batch, [], 0.0)
+                return
+
+            succeeded = []
+            failed = []
+            for i, job in enumerate(batch):
+                # Jobs whose callers gave up waiting were cancelled and must not run
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                savepoint = f"write_job_{i}"
+                conn.execute(f"SAVEPOINT {savepoint}")
+                _job_local.job = job
+                try:
+                    result = job.fn(conn, *job.args, **job.kwargs)
+                except BaseException as e:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                    failed.append((job, e))
+                else:
+                    conn.execute(f"RELEASE {savepoint}")
+                    succeeded.append((job, result))
+                finally:
+                    _job_local.job = None
+
+            commit_start = time.perf_counter()
+            try:
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                failed.extend((job, e) for job, _ in succeeded)
+                succeeded = []
+            commit_time = time.perf_counter() - commit_start
+        finally:
+            pool.release(conn)
+
+        if succeeded:
+            _bump_write_version()
+            _notify_commit([job for job, _ in succeeded])
+            _run_after_commit([job for job, _ in succeeded])
+        # Resolve futures only once the outcome is durable
+        for job, result in succeeded:
+            job.future.set_result(result)
+        for job, error in failed:
+            job.future.set_exception(error)
+        self._record(batch, succeeded, commit_time)
+
+    def _record(self, batch: List[_WriteJob], succeeded: List, commit_time: float) -> None:
+        now = time.perf_counter()
+        cancelled = sum(1 for job in batch if job.future.cancelled())
+        with self._stats_lock:
+            stats = self._stats
+            stats['batches'] += 1
+            stats['max_batch_size'] = max(stats['max_batch_size'], len(batch))
+            stats['completed'] += len(succeeded)
+            stats['failed'] += len(batch) - len(succeeded) - cancelled
+            stats['cancelled'] += cancelled
+            if succeeded:
+                stats['commits'] += 1
+                stats['commit_time_total'] += commit_time
+            for job in batch:
+                latency = now - job.submitted_at
+                stats['latency_total'] += latency
+                stats['latency_max'] = max(stats['latency_max'], latency)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, batch sizes and submit-to-result latency."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        finished = stats['completed'] + stats['failed']
+        stats['avg_latency'] = stats['latency_total'] / finished if finished else 0.0
+        stats['avg_batch_size'] = finished / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+
+_writer: Optional[WriteQueue] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> WriteQueue:
+    """Return the process-wide write queue, creating it on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = WriteQueue()
+    return _writer
+
+
+def add_idle_hook(job: Callable, pending: Callable[[], bool]) -> None:
+    """Register job(conn) to run on the writer whenever its queue drains and pending() is true."""
+    get_writer().add_idle_hook(job, pending)
+
+
+def submit_write(fn: Callable, *args, **kwargs) -> Future:
+    """Queue fn(conn, *args, **kwargs) on the background writer."""
+    return get_writer().submit(fn, *args, **kwargs)
+
+
+def run_write(fn: Callable, *args, **kwargs) -> Any:
+    """Queue a write, wait for it to commit and return its result.
+
+    Exceptions raised by fn (or by the commit) are re-raised in the caller.
+    If the job has not started within DEFAULT_WRITE_TIMEOUT it is cancelled
+    and TimeoutError is raised, so a write reported as failed never commits
+    later. A job that has already started is waited for until it finishes.
+    """
+    future = submit_write(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=DEFAULT_WRITE_TIMEOUT)
+    except FutureTimeoutError:
+        if future.cancel():
+            raise
+        return future.result()
+
+
+def invalidates(*tags: Hashable) -> None:
+    """Declare cache tags changed by the running write job (see utils/cache.py).
+
+    Only the declared tags are invalidated when the job commits; a job that
+    never calls this invalidates everything. Calling it with no tags declares
+    that the job changes no cached reads. Outside a write job it does nothing.
+    """
+    job = getattr(_job_local, 'job', None)
+    if job is None:
+        return
+    if job.tags is None:
+        job.tags = set()
+    job.tags.update(tags)
+
+
+def after_commit(callback: Callable[[], None]) -> None:
+    """Run callback() once the running write job commits; never if it rolls back.
+
+    Outside a write job the callback runs immediately.
+    """
+    job = getattr(_job_local, 'job', None)
+    if job is None:
+        callback()
+        return
+    job.callbacks.append(callback)
+
+
+def add_commit_listener(listener: Callable[[Optional[Set[Hashable]]], None]) -> None:
+    """Call listener(tags) after every commit; tags is None when anything may have changed."""
+    _commit_listeners.append(listener)
+
+
+def get_write_version() -> int:
+    """Return a counter that changes whenever a write commits; cached reads compare against it."""
+    return _write_version
+
+
+def get_writer_stats() -> Dict[str, Any]:
+    """Return statistics for the background writer."""
+    return get_writer().stats()
+
+
+def reset_writer() -> WriteQueue:
+    """Stop the current writer after it drains and start a fresh queue."""
+    global _writer
+    with _writer_lock:
+        hooks = []
+        if _writer is not None:
+            _writer.stop()
+            hooks = _writer._idle_hooks
+        _writer = WriteQueue()
+        _writer._idle_hooks = list(hooks)
+    return _writer